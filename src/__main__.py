@@ -1,21 +1,37 @@
 import os
 import sys
+import threading
 import flet as ft
 from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 
 from core import HeatLoadCalculator as HLC
+from input_schema import input_validator
 from logger_config import setup_logger
 from typing import Optional, Callable
-from load_configuration import load_config
-from product_recommender import update_recommendations
+from load_configuration import ConfigManager
+from product_catalog import WIDTH_TOLERANCE, ProductCatalog
+from product_recommender import RecommendationTable, update_recommendations
+from result_store import ResultStore
+from units import to_engine_units, unit_options
 from version import __version__, __date__, __project_name__, __team__, __author__
 logger = setup_logger()
 
 # 在 main() 外部定义消息队列和锁
 message_queue = []
 priority_order = {"error": 0, "warning": 1, "info": 2, "success": 3}
-config = load_config("config.toml")
-product_info = load_config("product_config.toml")
+# 配置文件管理，产品配置修改后无需重启即可生效
+config_manager = ConfigManager(("config.toml", "product_config.toml"))
+config = config_manager.get("config.toml")
+# 编译后的产品目录，打包环境中直接使用配置快照中编译好的目录；产品配置变化时只重新编译变化的产品
+product_catalog = config_manager.compiled("product_config.toml")
+if product_catalog is None:
+    product_catalog = ProductCatalog(config_manager.get("product_config.toml"))
+# 按车厢宽度筛选产品时允许的偏差 m
+product_catalog.width_tolerance = config.get("width_tolerance", WIDTH_TOLERANCE)
+config_manager.subscribe(
+    "config.toml", lambda data, diff: setattr(product_catalog, "width_tolerance", data.get("width_tolerance", WIDTH_TOLERANCE)))
+config_manager.subscribe("product_config.toml", product_catalog.update)
 
 # 按需提取数据
 default_length = config["default_length"]
@@ -31,6 +47,9 @@ surface_emissivity_prevalues = config["surface_emissivity_prevalues"]
 frozen_goods_prevalues = config["frozen_goods_prevalues"]
 chilled_goods_prevalues = config["chilled_goods_prevalues"]
 
+# 输入变化后延迟重新计算的时间（秒），在此时间内的连续输入只触发一次计算
+RECALC_DEBOUNCE = 0.6
+
 
 def main(page: ft.Page):
     def message_show(page, msg: str, msg_type: str = "error"):
@@ -111,6 +130,7 @@ def main(page: ft.Page):
                 connect_update(text_dropdown.value)
             text_field.value = text_dropdown.value
             page.update()
+            schedule_recalc()
         
         auto_menu_height = 240 if len(preset_options) > 6 else None
 
@@ -157,6 +177,7 @@ def main(page: ft.Page):
         def dropdown_changed(e):
             text_field.value = preset_options[dropdown.value]
             page.update()
+            schedule_recalc()
         
         dropdown = ft.Dropdown(
             label=dd_label,
@@ -184,13 +205,13 @@ def main(page: ft.Page):
     # ------------------------------------------------------------
     # 尺寸参数控件组
     # ------------------------------------------------------------
-    length, length_unit, length_row = create_two_dropdown_row(label="长度", dd_label="常用尺寸", preset_options=default_length, connect_update=connect_update_wh, unit_options=["m", "cm", "mm"], default_unit="m")
+    length, length_unit, length_row = create_two_dropdown_row(label="长度", dd_label="常用尺寸", preset_options=default_length, connect_update=connect_update_wh, unit_options=unit_options('length'), default_unit="m")
 
-    width, width_unit, width_row = create_dropdown_row(label="宽度", text_kwargs={"width": 100, 'value': default_width[str(default_length[0])]}, unit_options=["m", "cm", "mm"], default_unit="m", row_kwargs={"visible": False})
+    width, width_unit, width_row = create_dropdown_row(label="宽度", text_kwargs={"width": 100, 'value': default_width[str(default_length[0])]}, unit_options=unit_options('length'), default_unit="m", row_kwargs={"visible": False})
 
-    height, height_unit, height_row = create_dropdown_row(label="高度", text_kwargs={"width": 100, 'value': default_height[str(default_length[0])]}, unit_options=["m", "cm", "mm"], default_unit="m", row_kwargs={"visible": False})
+    height, height_unit, height_row = create_dropdown_row(label="高度", text_kwargs={"width": 100, 'value': default_height[str(default_length[0])]}, unit_options=unit_options('length'), default_unit="m", row_kwargs={"visible": False})
 
-    thickness, thickness_unit, thickness_row = create_dropdown_row(label="箱体厚度", text_kwargs={"width": 100, "value":8}, unit_options=["m", "cm", "mm"], default_unit="cm", row_kwargs={"visible": False})
+    thickness, thickness_unit, thickness_row = create_dropdown_row(label="箱体厚度", text_kwargs={"width": 100, "value":8}, unit_options=unit_options('length'), default_unit="cm", row_kwargs={"visible": False})
 
     # ------------------------------------------------------------
     # 换热参数控件组
@@ -220,7 +241,7 @@ def main(page: ft.Page):
     thermal_cond_walls, _, thermal_cond_walls_row = create_text_unit_row(label="厢体各层导热率", unit_text="  W/(m·K)", text_kwargs={"width": 150, "value": "0.048 0.044 0.048"}, tooltip="厢体各层材料导热率（支持多层或单层输入，如纤维板-聚苯乙烯泡沫-纤维板 则输入 0.048 0.044 0.048）", row_kwargs={"visible": False})
 
     # 厚度参数
-    thickness_walls, thickness_walls_unit, thickness_walls_row = create_dropdown_row(label="箱体各层厚度", text_kwargs={"width": 150, "value": "0.5 7 0.5", "tooltip": "请输入厢体各层材料厚度（支持多层或单层输入）"}, unit_options=["m", "cm", "mm"], default_unit="cm", row_kwargs={"visible": False})
+    thickness_walls, thickness_walls_unit, thickness_walls_row = create_dropdown_row(label="箱体各层厚度", text_kwargs={"width": 150, "value": "0.5 7 0.5", "tooltip": "请输入厢体各层材料厚度（支持多层或单层输入）"}, unit_options=unit_options('length'), default_unit="cm", row_kwargs={"visible": False})
 
     # ------------------------------------------------------------
     # 漏气倍数控件组
@@ -228,7 +249,7 @@ def main(page: ft.Page):
     leak_multiple, _, leak_multiple_row = create_text_unit_row(label="漏气倍数", unit_text="  1/h", text_kwargs={"width": 100, "value": 0.3}, row_kwargs={"visible": False}, tooltip="GB/T 29753: Area≤20㎡ L≤6.3，20㎡≤Area≤40㎡ L≤3.8，Area≥40㎡ L≤3")
 
     # 车速参数
-    speed, speed_unit, speed_row = create_dropdown_row(label="车速", text_kwargs={"width": 100, "value": 60, "tooltip": "行驶平均速度，用于太阳辐射计算，默认值为 60 km/h。"}, unit_options=["km/h", "m/s"], default_unit="km/h", row_kwargs={"visible": False})
+    speed, speed_unit, speed_row = create_dropdown_row(label="车速", text_kwargs={"width": 100, "value": 60, "tooltip": "行驶平均速度，用于太阳辐射计算，默认值为 60 km/h。"}, unit_options=unit_options('speed'), default_unit="km/h", row_kwargs={"visible": False})
 
 
     # 冷藏车示意图
@@ -269,9 +290,9 @@ def main(page: ft.Page):
     carriage_parameter_controls = ft.Container(content=carriage_parameter, expand=True, padding=20)
 
     # 温度参数控件组
-    env_temp, env_temp_unit, env_temp_row = create_two_dropdown_row(label="环境温度", dd_label="常用数值", preset_options=default_env_temp, text_kwargs={"value": 30}, unit_options=["℃", "K"], default_unit="℃", unit_width=85)
-    chi_temp, chi_temp_unit, chi_temp_row = create_two_dropdown_row(label="冷藏温度", dd_label="常用数值", preset_options=default_chi_temp, text_kwargs={"value": 0}, unit_options=["℃", "K"], default_unit="℃", unit_width=85)
-    fro_temp, fro_temp_unit, fro_temp_row = create_two_dropdown_row(label="冷冻温度", dd_label="常用数值", preset_options=default_fro_temp, text_kwargs={"value": -20}, unit_options=["℃", "K"], default_unit="℃", unit_width=85)
+    env_temp, env_temp_unit, env_temp_row = create_two_dropdown_row(label="环境温度", dd_label="常用数值", preset_options=default_env_temp, text_kwargs={"value": 30}, unit_options=unit_options('temp'), default_unit="℃", unit_width=85)
+    chi_temp, chi_temp_unit, chi_temp_row = create_two_dropdown_row(label="冷藏温度", dd_label="常用数值", preset_options=default_chi_temp, text_kwargs={"value": 0}, unit_options=unit_options('temp'), default_unit="℃", unit_width=85)
+    fro_temp, fro_temp_unit, fro_temp_row = create_two_dropdown_row(label="冷冻温度", dd_label="常用数值", preset_options=default_fro_temp, text_kwargs={"value": -20}, unit_options=unit_options('temp'), default_unit="℃", unit_width=85)
 
 
     # 湿度参数
@@ -290,7 +311,7 @@ def main(page: ft.Page):
     # 辐射参数
     radiation_area_ratio = ft.TextField(label="辐射面积系数", width=100, value=0.5, tooltip="车厢受太阳辐射面积系数，一般取值范围为 35%~50%")
 
-    radiation_time, radiation_time_unit, radiation_time_row = create_dropdown_row(label="太阳辐射时长", text_kwargs={"width": 100, "value": 14}, unit_options=["h", "min", "s"], default_unit="h", unit_width=85, tooltip="车厢受太阳辐射时间，通常取值为 12~14 小时")
+    radiation_time, radiation_time_unit, radiation_time_row = create_dropdown_row(label="太阳辐射时长", text_kwargs={"width": 100, "value": 14}, unit_options=unit_options('time'), default_unit="h", unit_width=85, tooltip="车厢受太阳辐射时间，通常取值为 12~14 小时")
 
     # 布局列定义
     opc_col1 = ft.Column([
@@ -323,7 +344,7 @@ def main(page: ft.Page):
     # 冷冻货物参数
     fro_specific_heat, fro_specific_heat_row = create_dropdown_values_row(label="比热容", dd_label="常用数值", unit_text="  J/kg·K", preset_options=frozen_goods_prevalues, tooltip="对于冷冻工况，肉类、雪糕等货品为冻品，不存在呼吸热。默认值为猪肉的比热容")
 
-    fro_out_temp, fro_out_temp_unit, fro_out_temp_row = create_two_dropdown_row(label="出库温度", dd_label="常用数值", preset_options=default_fro_out_temp, text_kwargs={'value': -18}, unit_options=["℃", "K"], default_unit="℃", unit_width=80)
+    fro_out_temp, fro_out_temp_unit, fro_out_temp_row = create_two_dropdown_row(label="出库温度", dd_label="常用数值", preset_options=default_fro_out_temp, text_kwargs={'value': -18}, unit_options=unit_options('temp'), default_unit="℃", unit_width=80)
 
     fro_load_mass, _, fro_load_mass_row = create_text_unit_row(label="载重量", unit_text="  吨/天", text_kwargs={"width": 100, "value": 4})
 
@@ -333,7 +354,7 @@ def main(page: ft.Page):
     chi_load_mass, _, chi_load_mass_row = create_text_unit_row(label="载重量", unit_text="  吨/天", text_kwargs={"width": 100, "value": 4})
 
     # 预冷参数
-    cabin_precool_time, cabin_precool_time_unit, cabin_precool_time_row = create_dropdown_row(label="预冷时长", text_kwargs={"width": 100, "value": 2}, unit_options=["h", "min", "s"], default_unit="h", unit_width=85, tooltip="冷藏车预冷时间（与冷藏货物预冷时间相同），默认值为 2 小时", row_kwargs={"visible": False})
+    cabin_precool_time, cabin_precool_time_unit, cabin_precool_time_row = create_dropdown_row(label="预冷时长", text_kwargs={"width": 100, "value": 2}, unit_options=unit_options('time'), default_unit="h", unit_width=85, tooltip="冷藏车预冷时间（与冷藏货物预冷时间相同），默认值为 2 小时", row_kwargs={"visible": False})
 
     # 布局列定义
     gpc_col1 = ft.Column([
@@ -366,11 +387,11 @@ def main(page: ft.Page):
 
     fan_power, _, fan_power_row = create_text_unit_row(label="风机功率", unit_text="  W", text_kwargs={"width": 100, "value": 90}, tooltip="车厢风机总功率")
 
-    fan_time, fan_time_unit, fan_time_row = create_dropdown_row(label="风机时长", text_kwargs={"width": 100, "value": 14}, unit_options=["h", "min", "s"], default_unit="h")
+    fan_time, fan_time_unit, fan_time_row = create_dropdown_row(label="风机时长", text_kwargs={"width": 100, "value": 14}, unit_options=unit_options('time'), default_unit="h")
 
     light_power, _, light_power_row = create_text_unit_row(label="照明功率", unit_text="  W", text_kwargs={"width": 100, "value": 5})
 
-    light_time, light_time_unit, light_time_row = create_dropdown_row(label="照明时长", text_kwargs={"width": 100, "value": 2}, unit_options=["h", "min", "s"], default_unit="h")
+    light_time, light_time_unit, light_time_row = create_dropdown_row(label="照明时长", text_kwargs={"width": 100, "value": 2}, unit_options=unit_options('time'), default_unit="h")
 
     # ------------------------------------------------------------
     # 高级特性控件组
@@ -558,48 +579,15 @@ def main(page: ft.Page):
             vertical_alignment=ft.CrossAxisAlignment.START,  # 确保子控件在垂直方向上也对齐顶部
             spacing=20
         )
-    # 新增推荐产品表格
-    def create_recommendation_table():
-        return ft.DataTable(
-            width=200,
-            # column_spacing=20,
-            data_row_max_height=40,
-            heading_row_height=40,
-            columns=[
-                # 型号 - 左对齐
-                ft.DataColumn(ft.Text("型号", text_align=ft.TextAlign.LEFT), numeric=False),
-
-                # 冷藏能力 - 左对齐
-                ft.DataColumn(ft.Text("冷藏能力", text_align=ft.TextAlign.LEFT), numeric=False),
-
-                # 冷冻能力 - 左对齐
-                ft.DataColumn(ft.Text("冷冻能力", text_align=ft.TextAlign.LEFT), numeric=False),
-
-                # 单位 - 居中对齐
-                ft.DataColumn(ft.Text("单位", text_align=ft.TextAlign.CENTER), numeric=False),
-            ],
-            visible=False
-        )
-    
-    # 首先定义 result_output_tabs
+    # 推荐产品表格（分页显示，行控件复用）
     result_output_tabs = ft.Tabs(
         tabs=[
-            ft.Tab(text="仅冷藏", content=ft.Column()),
-            ft.Tab(text="仅冷冻", content=ft.Column()),
-            ft.Tab(text="全满足", content=ft.Column()),
+            ft.Tab(text="仅冷藏", content=RecommendationTable("无仅冷藏产品")),
+            ft.Tab(text="仅冷冻", content=RecommendationTable("无仅冷冻产品")),
+            ft.Tab(text="全满足", content=RecommendationTable("无同时满足产品")),
         ],
     )
 
-    # 创建三个不同的DataTable
-    recommendation_table_chilled_only = create_recommendation_table()
-    recommendation_table_frozen_only = create_recommendation_table()
-    recommendation_table_both = create_recommendation_table()
-
-    # 然后再设置每个 Tab 的内容
-    result_output_tabs.tabs[0].content = recommendation_table_chilled_only
-    result_output_tabs.tabs[1].content = recommendation_table_frozen_only
-    result_output_tabs.tabs[2].content = recommendation_table_both
-
     # 最后定义 result_output_control
     result_output_control = ft.Container(
         content=ft.Column([
@@ -786,54 +774,166 @@ def main(page: ft.Page):
 
 
 
-    def run(e, sections, htc_advanced, precool):
-        page = e.page
+    # ------------------------------------------------------------
+    # 后台计算调度
+    # ------------------------------------------------------------
+    # 计算放到单线程后台执行器中进行，界面线程只负责提交任务和回填结果；
+    # generation 每提交一次自增，只有最新一次提交的计算结果才会写回界面
+    calc_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="heat_load_calc")
+    calc_lock = threading.Lock()
+    calc_state = {"generation": 0, "future": None, "timer": None, "live": False}
+
+    # 后台轮询配置文件，产品目录更新后下一次推荐即使用新目录
+    config_manager.start()
+
+    # 计算记录库，打开失败时不影响计算
+    try:
+        result_store = ResultStore()
+    except Exception as ex:
+        logger.warning(f"计算记录库打开失败，本次运行不保存计算记录: {ex}")
+        result_store = None
+
+    def shutdown():
+        """退出前等待进行中的计算完成、停止配置轮询，并把队列中的计算记录写入数据库"""
+        with calc_lock:
+            if calc_state["timer"] is not None:
+                calc_state["timer"].cancel()
+        calc_executor.shutdown(wait=True, cancel_futures=True)
+        config_manager.stop()
+        if result_store is not None:
+            result_store.close()
+
+    def on_window_event(e):
+        if e.type == ft.WindowEventType.CLOSE:
+            shutdown()
+            page.window.destroy()
+
+    # 拦截关闭窗口，先完成清理再退出
+    page.window.prevent_close = True
+    page.window.on_event = on_window_event
+
+    def quiet_message_show(page, msg: str, msg_type: str = "error"):
+        """实时重算时使用的消息方法，只记录日志不弹出提示，error 时同样中断计算"""
+        logger.debug(f"[实时计算] {msg}")
+        if msg_type == "error":
+            raise ValueError(f"Error occurred: {msg}")
+
+    def compute(inputs, htc_advanced, precool, notify):
+        """在后台线程中执行计算，不读写任何界面控件"""
+        hlc = HLC(inputs, page, notify)
+        logger.info("-----------获取结果-----------")
+        result = hlc.calculate_all(htc_advanced, precool)
+        formatted_result = {}
+        logger.info("----------格式化结果----------")
+        for key, value in result.items():
+            try:
+                # 尝试将值转换为float
+                float_value = float(value)
+                # 保留两位小数
+                formatted_result[key] = round(float_value, 2)
+            except ValueError:
+                # 如果转换失败，保留原值
+                formatted_result[key] = value
+        logger.info(f"计算结果为: {formatted_result}")  # 调试输出，确认键名
+        return formatted_result
+
+    def apply_result(future, generation, live, inputs, htc_advanced, precool):
+        """计算完成回调：仅当该次计算仍是最新提交时才回填结果并保存计算记录"""
+        if future.cancelled():
+            return
+        with calc_lock:
+            if generation != calc_state["generation"]:
+                logger.debug(f"丢弃过期的计算结果（第 {generation} 次提交）")
+                return
+        try:
+            formatted_result = future.result()
+        except Exception as ex:  # 捕获具体异常对象
+            logger.info("-----------发生错误-----------")
+            if live:
+                logger.debug(f"实时计算未完成: {str(ex)}")
+                return
+            logger.error(f"计算过程中发生错误: {str(ex)}", exc_info=True)  # 添加完整堆栈信息
+            try:
+                message_show(page, f"发生错误: {str(ex)}", 'error')  # 显示具体错误
+            except ValueError:
+                pass
+            page.update()
+            return
+
+        logger.info("-----------上传结果-----------")
+        for k, v in formatted_result.items():
+            Q_output[k].value=v
+
+        # 新增：执行推荐逻辑并更新表格，只推荐适用于当前车厢宽度的产品（温度和宽度换算为 ℃、m）
+        engine_inputs = to_engine_units(inputs)
+        recommendations = update_recommendations(formatted_result["Q_total1_chi"], formatted_result["Q_total1_fro"], result_output_tabs,
+                                                 engine_inputs['env_temp'], engine_inputs['chi_temp'], engine_inputs['fro_temp'],
+                                                 product_catalog, page, engine_inputs['width'], message_show)
+
+        if result_store is not None:
+            chilled_only, frozen_only, both = recommendations
+            result_store.add({
+                'inputs': inputs,
+                'outputs': formatted_result,
+                'htc_advanced': htc_advanced,
+                'precool': precool,
+                'source': 'gui',
+                # 同时满足冷藏和冷冻负荷、排名第一的产品作为选定产品
+                'product': both[0][0] if both else None,
+                'recommendations': {'chilled_only': chilled_only, 'frozen_only': frozen_only, 'both': both},
+            })
+
+        if not live:
+            visible_tabs = [i for i, tab in enumerate(sections.tabs) if tab.visible]
+            if visible_tabs:
+                sections.selected_index = len(visible_tabs)-1 # “输出参数”是最后一个Tab
+            # 首次手动求解成功后开启实时重算
+            calc_state["live"] = True
+        logger.info("-----------结束计算-----------")
+        page.update()
 
+    def submit_calculation(htc_advanced, precool, live=False):
+        """校验输入并把计算提交到后台执行器，旧的未开始任务会被取消"""
         logger.info("-----------开始计算-----------")
-        
+
         inputs = get_inputs()
         logger.info(f"获得输入: {inputs}")
         # 执行校验
         logger.info("-----------校验输入-----------")
         if errors := validate_inputs(inputs, htc_advanced, precool):
+            if live:
+                logger.debug(f"输入校验未通过，跳过实时计算：{"  ".join(errors)}")
+                return
             logger.error(f"输入校验未通过：{"  ".join(errors)}")
             message_show(page, f"输入校验未通过：{"  ".join(errors)}", 'error')
-        else:
-            hlc = HLC(inputs, page, message_show)
-            try:
-                logger.info("-----------获取结果-----------")
-                result = hlc.calculate_all(htc_advanced, precool)
-                formatted_result = {}
-                logger.info("----------格式化结果----------")
-                for key, value in result.items():
-                    try:
-                        # 尝试将值转换为float
-                        float_value = float(value)
-                        # 保留两位小数
-                        formatted_result[key] = round(float_value, 2)
-                    except ValueError:
-                        # 如果转换失败，保留原值
-                        formatted_result[key] = value
-                logger.info(f"计算结果为: {formatted_result}")  # 调试输出，确认键名
-
-                logger.info("-----------上传结果-----------")
-                for k, v in formatted_result.items():
-                    Q_output[k].value=v
-                
-                # 新增：执行推荐逻辑并更新表格
-                update_recommendations(formatted_result["Q_total1_chi"], formatted_result["Q_total1_fro"], result_output_tabs, env_temp, chi_temp, fro_temp, product_info, page)
-                
-
-                visible_tabs = [i for i, tab in enumerate(sections.tabs) if tab.visible]
-                if visible_tabs:
-                    sections.selected_index = len(visible_tabs)-1 # “输出参数”是最后一个Tab
-                logger.info("-----------结束计算-----------")
-            except Exception as ex:  # 捕获具体异常对象
-                logger.info("-----------发生错误-----------")
-                logger.error(f"计算过程中发生错误: {str(ex)}", exc_info=True)  # 添加完整堆栈信息
-                message_show(page, f"发生错误: {str(ex)}", 'error')  # 显示具体错误
-            
-            page.update()
+
+        notify = quiet_message_show if live else message_show
+        with calc_lock:
+            calc_state["generation"] += 1
+            generation = calc_state["generation"]
+            if calc_state["future"] is not None:
+                calc_state["future"].cancel()  # 尚未开始执行的旧任务直接取消
+            future = calc_executor.submit(compute, inputs, htc_advanced, precool, notify)
+            calc_state["future"] = future
+        future.add_done_callback(lambda f: apply_result(f, generation, live, inputs, htc_advanced, precool))
+
+    def schedule_recalc(e=None):
+        """输入变化时的防抖重算，仅在首次手动求解之后生效"""
+        if not calc_state["live"]:
+            return
+        with calc_lock:
+            if calc_state["timer"] is not None:
+                calc_state["timer"].cancel()
+            timer = threading.Timer(RECALC_DEBOUNCE, lambda: submit_calculation(htc_advanced.selected, precool.selected, live=True))
+            timer.daemon = True
+            calc_state["timer"] = timer
+        timer.start()
+
+    def run(e, sections, htc_advanced, precool):
+        with calc_lock:
+            if calc_state["timer"] is not None:
+                calc_state["timer"].cancel()
+        submit_calculation(htc_advanced, precool)
 
     Q_output = {
         "Q_electric": Q_electric,
@@ -855,6 +955,22 @@ def main(page: ft.Page):
         "Q_cabin_precool_fro": Q_cabin_precool_fro,
     }
 
+    # 输入控件变化时触发防抖重算
+    for control in (
+        length, length_unit, width, width_unit, height, height_unit, thickness, thickness_unit,
+        speed, speed_unit, leak_multiple, density_walls, specific_heat_walls, thermal_cond_walls,
+        thickness_walls, thickness_walls_unit,
+        env_temp, env_temp_unit, chi_temp, chi_temp_unit, fro_temp, fro_temp_unit,
+        chi_relative_humidity, fro_relative_humidity, env_relative_humidity,
+        solar_radiation, surface_absorptivity, surface_emissivity, radiation_area_ratio,
+        radiation_time, radiation_time_unit,
+        open_close_frequency, fro_specific_heat, fro_out_temp, fro_out_temp_unit, fro_load_mass,
+        chi_resp_heat, chi_load_mass, cabin_precool_time, cabin_precool_time_unit,
+        safety_coeff, fan_power, fan_time, fan_time_unit, light_power, light_time, light_time_unit,
+        thermal_bridging_coeff, htc, beta, diff_insuf_with_inair,
+    ):
+        control.on_change = schedule_recalc
+
     def get_inputs():
         carriage_parameter_controls_dict = {
             'length': length.value,
@@ -937,75 +1053,8 @@ def main(page: ft.Page):
         return inputs_dict
 
     def validate_inputs(inputs_dict, htc_advanced, precool):
-        """输入校验逻辑"""
-        errors = []
-        # 构建豁免字段集合
-        skip_required = set()
-        # 根据开关状态设置豁免字段
-        if not htc_advanced:
-            skip_required.update({'speed', 'thermal_cond_walls', 'thickness_walls', 
-                                'thermal_bridging_coeff', 'beta', 
-                                'diff_insuf_with_inair', 'htc'})
-            
-        if not precool:
-            skip_required.update({'density_walls', 'specific_heat_walls', 
-                                'thickness_walls'})
-        # 必填校验
-        for key, value in inputs_dict.items():
-            if key in skip_required:
-                continue
-                
-            if value in (None, '') and 'unit' not in key:
-                var = globals()[key]
-                errors.append(f"{var.label}: 不能为空")
-                
-                    
-        # 数值有效性校验
-        if not errors:
-            for key, value in inputs_dict.items():
-                if any(k in key for k in ['unit', '_unit']):
-                    continue
-                    
-                if key in skip_required:
-                    continue
-                
-                if key in ('density_walls', 'specific_heat_walls', 'thermal_cond_walls', 'thickness_walls'):
-                    continue
-                    
-                try:
-                    float(value)
-                except ValueError:
-                    var = globals()[key]
-                    errors.append(f"{var.label}: 必须为有效数字")
-
-        # 特殊范围校验（仅当数值有效时执行）
-        if not errors:
-            special_checks = {
-                'length': (0 <= float(inputs_dict['length']), "长应大于0"),
-                'width': (0 <= float(inputs_dict['width']), "宽应大于0"),
-                'height': (0 <= float(inputs_dict['height']), "高应大于0"),
-                'thickness': (0 <= float(inputs_dict['thickness']), "厚度应大于0"),
-                'speed': (0 <= float(inputs_dict['speed']), "车速应大于0"),
-                'leak_multiple': (0 < float(inputs_dict['leak_multiple']) <= 10, "漏气倍数应在0-10之间"),
-                'safety_coeff': (float(inputs_dict['safety_coeff']) >= 1, "冗余系数应≥1"),
-                'surface_absorptivity': (0 <= float(inputs_dict['surface_absorptivity']) <= 1, "吸收率应为0-1之间的小数"),
-                'surface_emissivity': (0 <= float(inputs_dict['surface_emissivity']) <= 1, "发射率应为0-1之间的小数"),
-                'radiation_area_ratio': (0 <= float(inputs_dict['radiation_area_ratio']) <= 1, "辐射面积系数应为0-1之间的小数"),
-                'radiation_time': (0 <= float(inputs_dict['radiation_time']) <= 24, "一天内的辐射时长应为0-24之间的数"),
-                'chi_relative_humidity': (0 <= float(inputs_dict['chi_relative_humidity']) <= 1, "冷藏相对湿度应为0-1之间的小数"),
-                'fro_relative_humidity': (0 <= float(inputs_dict['fro_relative_humidity']) <= 1, "冷冻相对湿度应为0-1之间的小数"),
-                'env_relative_humidity': (0 <= float(inputs_dict['env_relative_humidity']) <= 1, "环境相对湿度应为0-1之间的小数"),
-
-            }
-            
-            for name, (condition, msg) in special_checks.items():
-                try:
-                    if not condition:
-                        errors.append(msg)
-                except:
-                    continue  # 已在前面的校验中捕获错误
-
-        return errors
+        """输入校验逻辑，规则见 input_schema.INPUT_SCHEMA，输入换算为计算单位后校验"""
+        return input_validator.validate(inputs_dict, htc_advanced, precool)
 
     def update_calc_advanced_visible(e,calc_adv_visible):
         width_row.visible = calc_adv_visible
@@ -1077,7 +1126,8 @@ def main(page: ft.Page):
             RefrTruck_Schematic.width = 350
             carriage_parameter.spacing = 20
 
-        thermal_cond_walls_row.visible = htc_visible
+        # 预冷瞬态导热计算同样需要各层导热率
+        thermal_cond_walls_row.visible = htc_visible or precool_visible
         
 
         thermal_bridging_coeff_row.visible = htc_visible
@@ -1086,6 +1136,7 @@ def main(page: ft.Page):
 
         htc_row.visible = not htc_visible
         e.page.update()
+        schedule_recalc()
 
     def update_precool_visible(e, htc_visible, precool_visible):
         if htc_visible or precool_visible:
@@ -1115,12 +1166,14 @@ def main(page: ft.Page):
 
         density_walls_row.visible = precool_visible
         specific_heat_walls_row.visible = precool_visible
+        thermal_cond_walls_row.visible = htc_visible or precool_visible
         cabin_precool_time_row.visible = precool_visible
 
         Q_goods_precool_chi_cells.visible = precool_visible
         Q_cabin_precool_chi_cells.visible = precool_visible
         Q_cabin_precool_fro_cells.visible = precool_visible
         e.page.update()
+        schedule_recalc()
 
     def update_detailed_result_visible(e, detailed_visible):
         sections.tabs[5].visible = detailed_visible
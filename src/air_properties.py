@@ -1,12 +1,201 @@
 import math
+import numpy as np
+from dual import exp, log
 from logger_config import setup_logger
 
 logger = setup_logger()
+# 饱和水蒸气压插值表参数，单位 ℃
+SATU_TABLE_T_MIN = -100.0
+SATU_TABLE_T_MAX = 200.0
+SATU_TABLE_STEP = 0.1
+
+_satu_tables = None
+_satu_table_array = None
+
+# 系数定义（按霍纳法则排序）
+DENSITY_COEFFS = [
+    9.779381204240007e-16,
+    -1.044387334699978e-12,
+    4.058276919737977e-10,
+    -7.793160257006469e-08,
+    1.394452090867944e-05,
+    -0.004253950660426637,
+    1.2825222223126087
+]
+THERM_COND_COEFFS = [
+    -2.3572115917107644e-13,
+    1.3446703357265586e-10,
+    -3.34023615477079e-08,
+    7.51588447776211e-05,
+    0.02415885444726379
+]
+KINEMATIC_VISC_COEFFS = [
+    -4.8623014385789635e-14,
+    1.1106612398551261e-10,
+    8.616037812993472e-08,
+    1.3388608811431725e-05
+]
+DYNAMIC_VISC_COEFFS = [
+    3.121881021638468e-14,
+    -4.0747762815088714e-11,
+    5.0261032795989934e-08,
+    1.7209405690807253e-05
+]
+HEAT_CAPACITY_COEFFS = [
+    9.644494938773155e-15,
+    -7.996769026471137e-12,
+    -1.3098407581498805e-09,
+    3.6264765598416506e-06,
+    -0.0016216909506396135,
+    0.3333034613775682,
+    -33.083287512903205,
+    2289.176881933999
+]
+
+
+
+def saturation_pressure(T):
+    """Hyland-Wexler 公式计算饱和水蒸气压，单位 Pa"""
+    Tk = T + 273.15 # 单位 K
+    if T < 0: # 在温度-100~0℃范围内（标准大气压），饱和水蒸气的饱和压力计算。单位 Pa
+        return exp(_ln_saturation_pressure_ice(Tk))
+    # 在温度0~200℃范围内（标准大气压），饱和水蒸气的饱和压力计算公式
+    return exp(_ln_saturation_pressure_water(Tk))
+
+
+def _log(x):
+    """自然对数，numpy 数组按元素计算，其余（普通数值、Dual）交给 dual.log"""
+    return np.log(x) if isinstance(x, np.ndarray) else log(x)
+
+
+def _ln_saturation_pressure_ice(Tk):
+    """冰面饱和水蒸气压的自然对数，Tk 单位 K，可以是数值、Dual 或 numpy 数组"""
+    term1 = -5674.5359 / Tk
+    term2 = 6.3925247
+    term3 = -0.009677843 * Tk
+    term4 = 6.2215701e-7 * Tk**2
+    term5 = 2.0747825e-9 * Tk**3
+    term6 = -9.484024e-13 * Tk**4
+    term7 = 4.1635019 * _log(Tk)
+    return term1 + term2 + term3 + term4 + term5 + term6 + term7
+
+
+def _ln_saturation_pressure_water(Tk):
+    """水面饱和水蒸气压的自然对数，Tk 单位 K，可以是数值、Dual 或 numpy 数组"""
+    term1 = -5800.2206 / Tk
+    term2 = 1.3914993
+    term3 = -0.048640239 * Tk
+    term4 = 4.1764768e-5 * Tk**2
+    term5 = -1.4452093e-8 * Tk**3
+    term6 = 6.5459673 * _log(Tk)
+    return term1 + term2 + term3 + term4 + term5 + term6
+
+
+def _lagrange4(ys, u):
+    """以 0,1,2,3 为节点的三次 Lagrange 插值"""
+    y0, y1, y2, y3 = ys
+    return (-y0 * (u - 1) * (u - 2) * (u - 3) / 6
+            + y1 * u * (u - 2) * (u - 3) / 2
+            - y2 * u * (u - 1) * (u - 3) / 2
+            + y3 * u * (u - 1) * (u - 2) / 6)
+
+
+def _cubic_coeffs(values):
+    """把节点值转换为每个区间上的三次多项式系数 (a, b, c, d)，p = a + b·t + c·t² + d·t³
+
+    区间 [i, i+1] 使用 i-1 ~ i+2 四个节点，边界处模板向内平移。
+    """
+    n = len(values)
+    coeffs = []
+    for i in range(n - 1):
+        s = min(max(i - 1, 0), n - 4)
+        ys = values[s:s + 4]
+        y0, y1, y2, y3 = (_lagrange4(ys, i - s + t) for t in (-1, 0, 1, 2))
+        coeffs.append((
+            y1,
+            -y0 / 3 - y1 / 2 + y2 - y3 / 6,
+            y0 / 2 - y1 + y2 / 2,
+            -y0 / 6 + y1 / 2 - y2 / 2 + y3 / 6,
+        ))
+    return coeffs
+
+
+def _build_saturation_tables():
+    """按 SATU_TABLE_STEP 等间距生成冰面（-100~0℃）和水面（0~200℃）两段插值系数表
+
+    两段分别建表，插值模板不会跨过 0℃ 处公式的切换点。
+    """
+    n_ice = round(-SATU_TABLE_T_MIN / SATU_TABLE_STEP) + 1
+    n_water = round(SATU_TABLE_T_MAX / SATU_TABLE_STEP) + 1
+    ice = [math.exp(_ln_saturation_pressure_ice(SATU_TABLE_T_MIN + i * SATU_TABLE_STEP + 273.15)) for i in range(n_ice)]
+    water = [math.exp(_ln_saturation_pressure_water(i * SATU_TABLE_STEP + 273.15)) for i in range(n_water)]
+    return _cubic_coeffs(ice), _cubic_coeffs(water)
+
+
+def saturation_pressure_tabulated(T):
+    """查表并三次插值计算饱和水蒸气压，单位 Pa
+
+    表格在首次调用时生成。步长 0.1℃ 时在 -100~200℃ 范围内与 Hyland-Wexler 公式的
+    最大相对误差约为 5.1e-9，T 超出该范围时应使用 saturation_pressure。
+    """
+    global _satu_tables
+    if _satu_tables is None:
+        _satu_tables = _build_saturation_tables()
+
+    if T < 0:
+        coeffs = _satu_tables[0]
+        x = (T - SATU_TABLE_T_MIN) / SATU_TABLE_STEP
+    else:
+        coeffs = _satu_tables[1]
+        x = T / SATU_TABLE_STEP
+
+    i = int(x)
+    if i >= len(coeffs):
+        i = len(coeffs) - 1
+    t = x - i
+    a, b, c, d = coeffs[i]
+    return a + t * (b + t * (c + t * d))
+
+
+def saturation_pressure_tabulated_array(T):
+    """saturation_pressure_tabulated 的向量化版本，T 为数组，单位 ℃，返回 Pa
+
+    冰面和水面两段步长相同、在 0℃ 处首尾相接，因此拼接为一个 (4, 区间数) 的系数表，
+    用同一个区间号 np.take 取出系数后以霍纳法则求值；0℃ 以下恰好落在拼接点上的元素
+    退回冰面段最后一个区间。T 应在 -100~200℃ 范围内。
+    """
+    global _satu_tables, _satu_table_array
+    if _satu_table_array is None:
+        if _satu_tables is None:
+            _satu_tables = _build_saturation_tables()
+        _satu_table_array = np.ascontiguousarray(np.array(_satu_tables[0] + _satu_tables[1]).T)
+    n_ice = len(_satu_tables[0])
+
+    T = np.asarray(T, dtype=float)
+    x = (T - SATU_TABLE_T_MIN) * (1 / SATU_TABLE_STEP)
+    i = x.astype(np.intp)
+    np.minimum(i, _satu_table_array.shape[1] - 1, out=i)
+    i -= (i == n_ice) & (T < 0)
+    t = x - i
+    a, b, c, d = (np.take(coeffs, i) for coeffs in _satu_table_array)
+    return a + t * (b + t * (c + t * d))
+
+
 class AirProperties():
-    def __init__(self):
-        pass
+    # 全局开关：为 True 时 moist 默认使用饱和水蒸气压插值表
+    tabulated = False
+
+    def __init__(self, tabulated=None):
+        if tabulated is not None:
+            self.tabulated = tabulated
+
+    def moist(self, T, phi, tabulated=None):
+        """计算湿空气物性
 
-    def moist(self, T, phi):
+        :param T: 温度，单位 ℃
+        :param phi: 相对湿度
+        :param tabulated: 是否使用饱和水蒸气压插值表，None 时使用实例或全局设置
+        """
         p_atm = 101325  # 单位 Pa
         
         Tk = T + 273.15 # 单位 K
@@ -15,24 +204,13 @@ class AirProperties():
             logger.error("温度值无效，绝对温度需大于 0K")
 
         # Hyland-Wexler 公式 计算饱和水蒸气压 p_satu
-        if T < 0: # 在温度-100~0℃范围内（标准大气压），饱和水蒸气的饱和压力计算。单位 Pa
-            term1 = -5674.5359 / Tk
-            term2 = 6.3925247
-            term3 = -0.009677843 * Tk
-            term4 = 6.2215701e-7 * Tk**2
-            term5 = 2.0747825e-9 * Tk**3
-            term6 = -9.484024e-13 * Tk**4
-            term7 = 4.1635019 * math.log(Tk)
-            p_satu = math.exp(term1 + term2 + term3 + term4 + term5 + term6 + term7)
-        else: # 在温度0~200℃范围内（标准大气压），饱和水蒸气的饱和压力计算公式
-            term1 = -5800.2206 / Tk
-            term2 = 1.3914993
-            term3 = -0.048640239 * Tk
-            term4 = 4.1764768e-5 * Tk**2
-            term5 = -1.4452093e-8 * Tk**3
-            term6 = 6.5459673 * math.log(Tk)
-            p_satu = math.exp(term1 + term2 + term3 + term4 + term5 + term6)
-        
+        if tabulated is None:
+            tabulated = self.tabulated
+        if tabulated and SATU_TABLE_T_MIN <= T <= SATU_TABLE_T_MAX:
+            p_satu = saturation_pressure_tabulated(T)
+        else:
+            p_satu = saturation_pressure(T)
+
         # 水蒸气分压力 = 水蒸气饱和分压力 * 相对湿度
         p_water_vap = p_satu * phi
         if p_water_vap >= p_atm:
@@ -43,10 +221,10 @@ class AirProperties():
 
         # 计算露点温度
         if T >= 0 and T < 93:
-            log_p = math.log(p_water_vap)
+            log_p = log(p_water_vap)
             T_dewpoint = 6.54 + 14.526 * log_p + 0.7389 * log_p**2 + 0.09486 * log_p**3 + 0.4569 * (p_water_vap**0.1984)
         elif T < 0:
-            log_p = math.log(p_water_vap)
+            log_p = log(p_water_vap)
             T_dewpoint = 6.09 + 12.608 * log_p + 0.4959 * log_p**2
         else:
             logger.error(f"温度 {T}°C 超出露点公式适用范围")
@@ -71,47 +249,101 @@ class AirProperties():
             'enthalpy': enthalpy
         }
     
-    def dry(self, T):
-        # 系数定义（按霍纳法则排序）
-        DENSITY_COEFFS = [
-            9.779381204240007e-16,
-            -1.044387334699978e-12,
-            4.058276919737977e-10,
-            -7.793160257006469e-08,
-            1.394452090867944e-05,
-            -0.004253950660426637,
-            1.2825222223126087
-        ]
-        THERM_COND_COEFFS = [
-            -2.3572115917107644e-13,
-            1.3446703357265586e-10,
-            -3.34023615477079e-08,
-            7.51588447776211e-05,
-            0.02415885444726379
-        ]
-        KINEMATIC_VISC_COEFFS = [
-            -4.8623014385789635e-14,
-            1.1106612398551261e-10,
-            8.616037812993472e-08,
-            1.3388608811431725e-05
-        ]
-        DYNAMIC_VISC_COEFFS = [
-            3.121881021638468e-14,
-            -4.0747762815088714e-11,
-            5.0261032795989934e-08,
-            1.7209405690807253e-05
-        ]
-        HEAT_CAPACITY_COEFFS = [
-            9.644494938773155e-15,
-            -7.996769026471137e-12,
-            -1.3098407581498805e-09,
-            3.6264765598416506e-06,
-            -0.0016216909506396135,
-            0.3333034613775682,
-            -33.083287512903205,
-            2289.176881933999
-        ]
+    def moist_array(self, T, phi, tabulated=None):
+        """向量化计算湿空气物性
+
+        T 与 phi 可以是任意可广播的数组，按 moist 中相同的公式逐元素计算，
+        冰面/水面以及露点公式的分支通过掩码分别求值。超出公式适用范围的元素
+        不逐个记录日志，而是在返回的 out_of_range 掩码中标记，对应的露点为 NaN。
+
+        :param T: 温度，单位 ℃
+        :param phi: 相对湿度
+        :param tabulated: 是否使用饱和水蒸气压插值表，None 时使用实例或全局设置；表格范围外的元素仍按公式计算
+        :return: 各物性数组以及 out_of_range 掩码组成的字典
+        """
+        p_atm = 101325  # 单位 Pa
+        T, phi = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(phi, dtype=float))
+
+        Tk = T + 273.15 # 单位 K
+        out_of_range = (T < SATU_TABLE_T_MIN) | (T > SATU_TABLE_T_MAX)
+
+        # 饱和水蒸气压 p_satu：开启插值表时表格范围内的元素查表，其余按 Hyland-Wexler 公式，
+        # 冰面/水面两个分支分别只在各自的元素上求值
+        if tabulated is None:
+            tabulated = self.tabulated
+        ice = T < 0
+        water = ~ice
+        p_satu = np.empty_like(Tk)
+        if tabulated:
+            table = ~out_of_range
+            p_satu[table] = saturation_pressure_tabulated_array(T[table])
+            formula_ice, formula_water = ice & out_of_range, water & out_of_range
+        else:
+            formula_ice, formula_water = ice, water
+        p_satu[formula_ice] = np.exp(_ln_saturation_pressure_ice(Tk[formula_ice]))
+        p_satu[formula_water] = np.exp(_ln_saturation_pressure_water(Tk[formula_water]))
+
+        # 水蒸气分压力 = 水蒸气饱和分压力 * 相对湿度
+        p_water_vap = p_satu * phi
+        out_of_range |= p_water_vap >= p_atm
+
+        # 含湿量，单位 kg/kg
+        moisture_content = 0.621945 * p_water_vap / (p_atm - p_water_vap)
+
+        # 计算露点温度，超出适用范围（out_of_range）的元素为 NaN
+        T_dewpoint = np.full_like(Tk, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_p = np.log(p_water_vap)
+        above = water & (T < 93)
+        lp = log_p[above]
+        T_dewpoint[above] = 6.54 + 14.526 * lp + 0.7389 * lp**2 + 0.09486 * lp**3 + 0.4569 * (p_water_vap[above]**0.1984)
+        lp = log_p[ice]
+        T_dewpoint[ice] = 6.09 + 12.608 * lp + 0.4959 * lp**2
+        out_of_range |= water & (T >= 93)
+        T_dewpoint[out_of_range] = np.nan
+
+        # 获取干空气物性参数
+        dry_properties = self.dry_array(T)
+
+        # 湿空气密度，单位 kg/m³
+        density = dry_properties['density'] * (1 + moisture_content) / (461 * Tk * (0.622 + moisture_content))
+
+        L = 2501000  # 蒸发潜热 (J/kg)
+        c_pv = 1860   # 水蒸气定压比热容 (J/(kg·K))
 
+        # 湿空气比焓 h 单位 j/kg
+        enthalpy = (dry_properties['heat_capacity'] * T) + (moisture_content * (L + c_pv * T))
+
+        return {
+            'p_water_vap': p_water_vap,
+            'moisture_content': moisture_content,
+            'T_dewpoint': T_dewpoint,
+            'density': density,
+            'enthalpy': enthalpy,
+            'out_of_range': out_of_range
+        }
+
+    def dry_array(self, T):
+        """向量化计算干空气物性，公式与分段方式与 dry 相同"""
+        T = np.asarray(T, dtype=float)
+
+        # 比热容分段计算 单位 J/kg·K
+        heat_capacity = np.select(
+            [T <= -150, T <= -100, T <= -50, T <= 40, T <= 60, T <= 100, T <= 120, T <= 140],
+            [1026, 1009 + 17*(T + 150)/50, 1005 + 4*(T + 100)/50, 1005,
+             1005 + 4*(T - 40)/20, 1009, 1009 + 4*(T - 100)/20, 1013],
+            default=np.polyval(HEAT_CAPACITY_COEFFS, T)
+        )
+
+        return {
+            'density': np.polyval(DENSITY_COEFFS, T),
+            'heat_capacity': heat_capacity,
+            'therm_cond': np.polyval(THERM_COND_COEFFS, T),
+            'kinematic_viscosity': np.polyval(KINEMATIC_VISC_COEFFS, T),
+            'Dynamic_viscosity': np.polyval(DYNAMIC_VISC_COEFFS, T)
+        }
+
+    def dry(self, T):
         # 密度计算（霍纳法则） 单位 kg/m³
         density = 0.0
         for coeff in DENSITY_COEFFS:
@@ -0,0 +1,208 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from climate import DEFAULT_CLIMATE_DIR, ClimateStore
+from compartments import MultiCompartmentCalculator
+from core import raise_message
+from htc import HTCCalculator, external_temperature_array
+from logger_config import setup_logger
+from product_catalog import CapacityGrid
+
+logger = setup_logger()
+
+# 平年各月天数，闰年（8784 小时）时二月按 29 天计
+MONTH_DAYS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+# 默认统计的负荷百分位数
+PERCENTILES = (50, 90, 99)
+# 逐时计算输出的负荷项
+HOURLY_TERMS = ('Q_wall', 'Q_partition', 'Q_leak', 'Q_radiation', 'Q_open', 'Q_resp', 'Q_load', 'Q_electric', 'Q_total')
+
+
+def month_index(n_hours):
+    """每个小时所属的月份（0~11），数据从 1 月 1 日 0 时开始"""
+    days = list(MONTH_DAYS)
+    if n_hours > 8760:
+        days[1] = 29
+    months = np.repeat(np.arange(12), np.array(days) * 24)
+    if n_hours > len(months):
+        logger.warning(f"气象数据共 {n_hours} 小时，超过一年的部分计入 12 月")
+        months = np.concatenate([months, np.full(n_hours - len(months), 11)])
+    return months[:n_hours]
+
+
+class AnnualCalculator(MultiCompartmentCalculator):
+    """逐时全年热负荷计算
+
+    以某地区逐时气象数据中的环境温度、相对湿度和太阳辐照强度代替设计工况的单一数值，
+    所有小时和隔间的负荷以 (小时数, 隔间数) 的数组一次计算。太阳辐射负荷直接使用逐时
+    辐照强度，不再乘以辐射时长比例；预冷负荷属于一次性过程，不计入逐时负荷。
+    """
+
+    def calculate_hourly(self, weather, compartments, htc_advanced):
+        """计算逐时负荷
+
+        :param weather: 字典，temp（℃）、relative_humidity（0~1）、solar_radiation（W/m²），
+                        值为长度相同的一维数组，如 ClimateData.hours() 的返回值
+        :param compartments: 隔间参数字典列表，格式见 MultiCompartmentCalculator.calculate_compartments
+        :param htc_advanced: 是否使用高级换热系数计算
+        :return: 字典，HOURLY_TERMS 中各项为 (小时数, 隔间数) 的数组，单位 W；
+                 另含 T_surface（外表面温度 ℃，(小时数, 1)）
+        """
+        c = self._prepare_compartments(compartments)
+        T, phi = c['temp'], c['relative_humidity']
+        # 逐时数据作为列向量，与长度为 N 的隔间数组广播为 (小时数, N)
+        T_env = np.asarray(weather['temp'], dtype=float)[:, None]
+        phi_env = np.asarray(weather['relative_humidity'], dtype=float)[:, None]
+        solar = np.asarray(weather['solar_radiation'], dtype=float)[:, None]
+        delta_T = T_env - T
+
+        # ------------------------------------------------------------
+        # 传热系数与外表面温度
+        # ------------------------------------------------------------
+        htc_calculator = HTCCalculator(self.inputs, self.page, self.message_show, c['speed'], c['env_temp'])
+        h_in = htc_calculator.calculate_internal_convection()
+        h_out = htc_calculator.calculate_external_convection(c['speed'])
+        absorptivity = self.inputs['surface_absorptivity']
+        T_suf = external_temperature_array(T_env, solar, absorptivity, self.inputs['surface_emissivity'], h_out)
+        if htc_advanced:
+            htc_cond = 1 / htc_calculator._calculate_thermal_resistance()
+            # 外表面辐射换热系数与 HTCCalculator._calculate_radiation_htc 相同，夜间为 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                htc_radiation = np.where(solar > 0, solar * absorptivity / T_suf, 0.0)
+            htc_radiation = np.maximum(htc_radiation, 0.0)
+            htc = 1 / (1 / htc_cond + 1 / (h_out + htc_radiation) + 1 / h_in)
+            if self.inputs.get('frame_cond'):
+                htc = htc * htc_calculator._calculate_thermal_bridging_coeff(h_in, h_out)
+            else:
+                htc = htc * self.inputs['thermal_bridging_coeff']
+        else:
+            htc = self.inputs['htc']
+
+        # ------------------------------------------------------------
+        # 隔热壁、隔板、漏热、辐射与开关门
+        # ------------------------------------------------------------
+        Q_wall = self._calculate_wall_heat(htc, c['effective_area'], delta_T)
+        Q_partition = self._calculate_partition_heat(htc, c['inner_width'] * c['inner_height'], T)
+        Q_partition = np.broadcast_to(Q_partition, delta_T.shape)
+
+        air_env = self.ap.dry_array(T_env)
+        m_leak = self.inputs['leak_multiple'] * air_env['density'] * c['internal_volume'] / 3600
+        moist_env = self.ap.moist_array(T_env, phi_env)
+        moist_inn = self.ap.moist_array(T, phi)
+        cp_inn = self.ap.dry_array(T)['heat_capacity']
+        latent = 2500  # 水的汽化潜热 kJ/kg
+        Q_leak = m_leak * (
+            cp_inn * delta_T +
+            latent * (phi_env * moist_env['moisture_content'] - phi * moist_inn['moisture_content'])
+        )
+
+        ratio = self.inputs['radiation_area_ratio']
+        Q_radiation = htc * c['effective_area'] * ratio * (T_suf - T_env)
+
+        mass_flow = c['internal_volume'] * air_env['density'] * c['frequency'] / 24
+        Q_open = mass_flow * air_env['heat_capacity'] * delta_T / 3600
+
+        # ------------------------------------------------------------
+        # 货物与电气负荷（不随气象条件变化）
+        # ------------------------------------------------------------
+        Q_resp = np.broadcast_to(c['resp_heat'] * c['load_mass'], delta_T.shape)
+        Q_load = np.broadcast_to(c['specific_heat'] * (c['out_temp'] - T) * c['load_mass'] * 1000 / 24 / 3600, delta_T.shape)
+        Q_electric = np.broadcast_to(self._calculate_electric_heat() * c['internal_volume'] / c['internal_volume'].sum(), delta_T.shape)
+
+        Q_total = (Q_wall + Q_partition + Q_leak + Q_radiation + Q_open + Q_resp + Q_load + Q_electric) * self.inputs['safety_coeff']
+
+        return {
+            'Q_wall': Q_wall,
+            'Q_partition': Q_partition,
+            'Q_leak': Q_leak,
+            'Q_radiation': Q_radiation,
+            'Q_open': Q_open,
+            'Q_resp': Q_resp,
+            'Q_load': Q_load,
+            'Q_electric': Q_electric,
+            'Q_total': Q_total,
+            'T_surface': T_suf,
+        }
+
+    def calculate_annual(self, weather, compartments, htc_advanced, product_specs=None, percentiles=PERCENTILES):
+        """全年逐时负荷的月度统计
+
+        :param weather: 逐时气象数据，格式见 calculate_hourly
+        :param product_specs: 选定产品的配置（product_config.toml 中的一个产品），给出时统计能力不足的小时
+        :param percentiles: 需要统计的百分位数
+        :return: 字典
+                 monthly_peak、monthly_mean：(12, 隔间数) 的总负荷月最大值和月平均值 W
+                 monthly_percentiles：(百分位数个数, 12, 隔间数)
+                 给出产品时另含 capacity（(小时数, 隔间数) 的制冷能力 W）、
+                 shortfall（(小时数, 隔间数) 的布尔数组，负荷超过制冷能力或工况不受支持的小时为 True）
+                 和 monthly_shortfall_hours（(12, 隔间数) 的能力不足小时数）
+        """
+        hourly = self.calculate_hourly(weather, compartments, htc_advanced)
+        Q_total = hourly['Q_total']
+        months = month_index(Q_total.shape[0])
+
+        shortfall = None
+        if product_specs is not None:
+            T = np.array([compartment['temp'] for compartment in compartments], dtype=float)
+            capacity = CapacityGrid(product_specs).evaluate(np.asarray(weather['temp'], dtype=float)[:, None], T)
+            shortfall = ~(Q_total <= capacity)  # 不支持的工况（NaN）同样计为能力不足
+
+        n = Q_total.shape[1]
+        monthly_peak = np.full((12, n), np.nan)
+        monthly_mean = np.full((12, n), np.nan)
+        monthly_percentiles = np.full((len(percentiles), 12, n), np.nan)
+        monthly_shortfall_hours = np.zeros((12, n), dtype=int)
+        # 每个月的小时在数组中是连续的一段，按切片统计，无需复制
+        bounds = np.searchsorted(months, np.arange(13))
+        for m in range(12):
+            block = Q_total[bounds[m]:bounds[m + 1]]
+            if len(block):
+                monthly_peak[m] = block.max(axis=0)
+                monthly_mean[m] = block.mean(axis=0)
+                monthly_percentiles[:, m] = np.percentile(block, percentiles, axis=0)
+                if shortfall is not None:
+                    monthly_shortfall_hours[m] = shortfall[bounds[m]:bounds[m + 1]].sum(axis=0)
+
+        result = {
+            'hours': Q_total.shape[0],
+            'percentiles': tuple(percentiles),
+            'monthly_peak': monthly_peak,
+            'monthly_mean': monthly_mean,
+            'monthly_percentiles': monthly_percentiles,
+            'annual_peak': Q_total.max(axis=0),
+        }
+        if shortfall is not None:
+            result['capacity'] = capacity
+            result['shortfall'] = shortfall
+            result['monthly_shortfall_hours'] = monthly_shortfall_hours
+        return result
+
+
+def _evaluate_region(region, climate_dir, inputs, compartments, htc_advanced, product_specs, percentiles):
+    """在子进程中计算单个地区的全年负荷"""
+    weather = ClimateStore(climate_dir).open(region).hours()
+    calculator = AnnualCalculator(inputs, None, raise_message)
+    return calculator.calculate_annual(weather, compartments, htc_advanced, product_specs, percentiles)
+
+
+def evaluate_regions(inputs, compartments, htc_advanced, regions=None, climate_dir=DEFAULT_CLIMATE_DIR,
+                     product_specs=None, percentiles=PERCENTILES, max_workers=None):
+    """并行计算多个地区的全年负荷
+
+    每个地区在一个子进程中计算，子进程直接内存映射读取气象数据，只把统计结果传回。
+
+    :param regions: 地区名称列表，None 时为 climate_dir 中已导入的全部地区
+    :return: 字典 地区 -> calculate_annual 的结果
+    """
+    if regions is None:
+        regions = ClimateStore(climate_dir).regions()
+    if not regions:
+        return {}
+    inputs = dict(inputs)
+    with ProcessPoolExecutor(max_workers=max_workers or min(len(regions), 8)) as executor:
+        futures = {
+            region: executor.submit(_evaluate_region, region, climate_dir, inputs, compartments,
+                                    htc_advanced, product_specs, percentiles)
+            for region in regions
+        }
+        return {region: future.result() for region, future in futures.items()}
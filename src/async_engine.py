@@ -0,0 +1,150 @@
+import asyncio
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from core import OUTPUT_KEYS, HeatLoadCalculator, raise_message
+from input_schema import input_validator
+from logger_config import setup_logger
+from product_catalog import TABLE
+from product_recommender import RECOMMEND_TOP_K, rank_products
+from result_table import ResultTable
+from sweep import calculate_rows, init_worker, validate_columns
+
+logger = setup_logger()
+
+# 批量计算时每个任务块的默认行数
+BATCH_CHUNK_SIZE = 2000
+
+
+def _calculate(inputs, htc_advanced, precool):
+    """在子进程中计算单个工况"""
+    return HeatLoadCalculator(dict(inputs), None, raise_message).calculate_all(htc_advanced, precool)
+
+
+def _calculate_chunk(base_inputs, fields, values, valid, htc_advanced, precool):
+    """在子进程中计算一块工况，返回 ((len(OUTPUT_KEYS), 行数) 的结果, 失败数, 第一个错误)"""
+    out = np.full((len(OUTPUT_KEYS), len(values)), np.nan)
+    failed, first_error = calculate_rows(base_inputs, fields, values, valid, htc_advanced, precool, out)
+    return out, failed, first_error
+
+
+def _prepare_batch(base_inputs, columns, htc_advanced, precool):
+    """校验批量计算的输入并把变化的列排成 (行数, 字段数) 矩阵，返回值在 validate_columns 的结果后追加矩阵"""
+    base_inputs, fields, arrays, valid = validate_columns(base_inputs, columns, htc_advanced, precool)
+    matrix = np.stack(arrays, axis=1) if arrays else np.empty((len(valid), 0))
+    return base_inputs, fields, arrays, valid, matrix
+
+
+class AsyncEngine:
+    """计算引擎的 asyncio 接口
+
+    热负荷计算在进程池中执行，产品推荐在线程中执行，事件循环只负责等待。所有请求共用一个
+    信号量，同时执行的任务数不超过 max_concurrency（默认为 CPU 核数），突发的大量请求在信号量上
+    排队，不会占满 CPU 或阻塞事件循环。
+
+    每个接口都可以给出 timeout（秒），超时抛出 asyncio.TimeoutError。调用方取消或超时时，尚未开始
+    的任务会被取消，批量计算中未开始的任务块也不再执行；已经在子进程中运行的单个任务无法中断，
+    会在后台运行完毕后丢弃结果。
+
+    用法::
+
+        async with AsyncEngine() as engine:
+            result = await engine.calculate(inputs, htc_advanced=False, precool=False, timeout=5)
+    """
+
+    def __init__(self, max_concurrency=None, executor=None, timeout=None):
+        """
+        :param max_concurrency: 同时执行的任务数上限
+        :param executor: 执行计算的 concurrent.futures 执行器，默认创建同样大小的进程池
+        :param timeout: 默认超时时间（秒），None 表示不限
+        """
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.timeout = timeout
+        self._own_executor = executor is None
+        self._executor = executor or ProcessPoolExecutor(max_workers=self.max_concurrency, initializer=init_worker)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """关闭自行创建的执行器，未开始的任务被取消"""
+        if self._own_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, executor, func, *args):
+        """在信号量限制下把 func 提交到执行器并等待结果"""
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+    async def _with_timeout(self, coroutine, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        if timeout is None:
+            return await coroutine
+        return await asyncio.wait_for(coroutine, timeout)
+
+    async def calculate(self, inputs, htc_advanced, precool, timeout=None):
+        """计算单个工况
+
+        :return: calculate_all 的结果字典
+        """
+        if errors := input_validator.validate(inputs, htc_advanced, precool):
+            raise ValueError(f"输入校验未通过：{'  '.join(errors)}")
+        return await self._with_timeout(self._run(self._executor, _calculate, inputs, htc_advanced, precool), timeout)
+
+    async def calculate_batch(self, base_inputs, columns, htc_advanced, precool, chunk_size=BATCH_CHUNK_SIZE, timeout=None,
+                              store=None):
+        """批量计算，参数格式和返回值同 sweep.run_sweep
+
+        输入校验在线程中执行，与各任务块一起计入超时。工况按 chunk_size 分块，每块作为一个任务
+        排队执行，与其他请求共用并发上限。给出 store
+        （result_store.ResultStore）时按列异步保存计算结果。
+        """
+        async def run_all():
+            # 校验和整理输入在线程中执行，不阻塞事件循环，并计入超时
+            validated, fields, arrays, valid, matrix = await self._run(
+                None, _prepare_batch, base_inputs, columns, htc_advanced, precool)
+            rows = len(valid)
+            tasks = [
+                asyncio.ensure_future(self._run(
+                    self._executor, _calculate_chunk, validated, fields, matrix[start:start + chunk_size].tolist(),
+                    valid[start:start + chunk_size].tolist(), htc_advanced, precool))
+                for start in range(0, rows, chunk_size)
+            ]
+            try:
+                return validated, fields, arrays, rows, await asyncio.gather(*tasks)
+            except BaseException:
+                # 取消、超时或任一块出错时，不再执行其余任务块
+                for task in tasks:
+                    task.cancel()
+                raise
+
+        base_inputs, fields, arrays, rows, chunks = await self._with_timeout(run_all(), timeout)
+        failed = 0
+        for i, (_, chunk_failed, first_error) in enumerate(chunks):
+            if chunk_failed:
+                failed += chunk_failed
+                logger.warning(f"第 {first_error[0] + i * chunk_size} 个工况计算失败: {first_error[1]}")
+        if failed:
+            logger.warning(f"共 {failed}/{rows} 个工况计算失败，结果为 NaN")
+        table = ResultTable(capacity=rows)
+        for chunk, _, _ in chunks:
+            table.extend(chunk)
+        if store is not None:
+            store.add_table(base_inputs, dict(zip(fields, arrays)), table, htc_advanced, precool, source='batch')
+        return table
+
+    async def recommend(self, chi_load, fro_load, env_temp, chi_temp, fro_temp, product_info, k=RECOMMEND_TOP_K,
+                        weights=None, method=TABLE, box_width=None, timeout=None):
+        """产品推荐，参数和返回值同 product_recommender.rank_products
+
+        产品目录留在本进程中，推荐在线程中执行（主要为 numpy 运算）。
+        """
+        return await self._with_timeout(
+            self._run(None, lambda: rank_products(chi_load, fro_load, env_temp, chi_temp, fro_temp, product_info,
+                                                  k=k, weights=weights, method=method, box_width=box_width)),
+            timeout)
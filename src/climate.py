@@ -0,0 +1,137 @@
+import csv
+import os
+import numpy as np
+
+from logger_config import setup_logger
+
+logger = setup_logger()
+
+# 转换后的气象数据存放目录，与计算记录库放在同一用户目录下
+DEFAULT_CLIMATE_DIR = os.path.join(os.path.expanduser("~"), ".refrtruck_heatload", "climate")
+
+# 二进制文件中各字段的顺序：温度 ℃、相对湿度 0~1、太阳辐照强度 W/m²
+FIELDS = ('temp', 'relative_humidity', 'solar_radiation')
+
+# 文本气象文件中可识别的列名
+CSV_COLUMNS = {
+    'temp': ('temp', 'temperature', 'env_temp', '温度', '干球温度'),
+    'relative_humidity': ('relative_humidity', 'rh', 'humidity', 'env_relative_humidity', '相对湿度'),
+    'solar_radiation': ('solar_radiation', 'ghi', 'irradiance', '太阳辐照强度', '总辐射'),
+}
+
+# EPW 文件（EnergyPlus 气象文件，中国标准年气象数据 CSWD 常用此格式）的表头行数和所用列序号
+EPW_HEADER_LINES = 8
+EPW_COLUMNS = {'temp': 6, 'relative_humidity': 8, 'solar_radiation': 13}
+
+
+def _read_epw(path):
+    """读取 EPW 文件，相对湿度由百分数换算为小数"""
+    data = np.loadtxt(path, delimiter=',', skiprows=EPW_HEADER_LINES, usecols=list(EPW_COLUMNS.values()),
+                      dtype=float, encoding='utf-8', ndmin=2)
+    data[:, 1] /= 100
+    return data.T
+
+
+def _read_csv(path):
+    """读取带表头的逐时 CSV 文件，按 CSV_COLUMNS 识别列名"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader)]
+        rows = [row for row in reader if row]
+
+    columns = []
+    for field in FIELDS:
+        for alias in CSV_COLUMNS[field]:
+            if alias in header:
+                columns.append(header.index(alias))
+                break
+        else:
+            raise ValueError(f"气象文件 {path} 缺少 {field} 列，可用列名: {', '.join(CSV_COLUMNS[field])}")
+
+    data = np.array([[float(row[i]) for i in columns] for row in rows], dtype=float).T
+    # 相对湿度以百分数给出时换算为小数
+    if data.shape[1] and np.nanmax(data[1]) > 1.5:
+        data[1] /= 100
+    return data
+
+
+class ClimateData:
+    """单个地区的逐时气象数据
+
+    数据以 (字段数, 小时数) 的 float32 数组内存映射打开，每个字段的逐时数据在文件中连续存放，
+    按小时区间取出的是内存映射的视图，不复制数据。
+    """
+
+    def __init__(self, region, path):
+        self.region = region
+        self.path = path
+        self._data = np.load(path, mmap_mode='r')
+        self.n_hours = self._data.shape[1]
+
+    def field(self, name, start=0, stop=None):
+        """取出某个字段在 [start, stop) 小时区间的数据（只读视图）"""
+        return self._data[FIELDS.index(name), start:stop]
+
+    def hours(self, start=0, stop=None):
+        """取出 [start, stop) 小时区间的全部字段
+
+        :return: 字典，temp（℃）、relative_humidity（0~1）、solar_radiation（W/m²），值为只读视图
+        """
+        return {name: self._data[i, start:stop] for i, name in enumerate(FIELDS)}
+
+
+class ClimateStore:
+    """逐时气象数据库
+
+    每个地区的文本气象文件只需用 ingest() 转换一次，保存为 <地区>.npy；之后通过 open()
+    内存映射读取，打开的数据会被缓存，多次计算共用同一份映射。
+    """
+
+    def __init__(self, directory=DEFAULT_CLIMATE_DIR):
+        self.directory = directory
+        self._opened = {}
+
+    def _path(self, region):
+        return os.path.join(self.directory, f"{region}.npy")
+
+    def ingest(self, region, source_path):
+        """把文本气象文件转换为二进制格式
+
+        :param region: 地区名称，如 "华北平原"
+        :param source_path: EPW 文件（扩展名 .epw）或带表头的逐时 CSV 文件
+        :return: 转换得到的小时数
+        """
+        if source_path.lower().endswith('.epw'):
+            data = _read_epw(source_path)
+        else:
+            data = _read_csv(source_path)
+        if data.shape[1] == 0:
+            raise ValueError(f"气象文件 {source_path} 中没有数据")
+        if np.isnan(data).any():
+            logger.warning(f"气象文件 {source_path} 中存在缺测值（NaN）")
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(region)
+        # 先写入临时文件再替换，避免已打开的内存映射读到写了一半的文件
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, np.ascontiguousarray(data, dtype=np.float32))
+        self._opened.pop(region, None)
+        os.replace(tmp_path, path)
+        logger.info(f"已转换 {region} 气象数据 {data.shape[1]} 小时: {path}")
+        return data.shape[1]
+
+    def open(self, region):
+        """内存映射打开某个地区的气象数据"""
+        if region not in self._opened:
+            path = self._path(region)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"未找到 {region} 的气象数据，请先导入气象文件")
+            self._opened[region] = ClimateData(region, path)
+        return self._opened[region]
+
+    def regions(self):
+        """已导入气象数据的地区列表"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.directory)
+                      if name.endswith('.npy') and not name.endswith('.tmp.npy'))
@@ -0,0 +1,190 @@
+import numpy as np
+
+from core import HeatLoadCalculator
+from logger_config import setup_logger
+
+logger = setup_logger()
+
+# 单个隔间未给出的参数的默认值
+COMPARTMENT_DEFAULTS = {
+    'relative_humidity': 0.5,   # 隔间内空气相对湿度
+    'resp_heat': 0.0,           # 货物呼吸热 mW/kg
+    'specific_heat': 0.0,       # 货物比热容 J/kg·K
+    'load_mass': 0.0,           # 载重量 吨/天
+    'out_temp': None,           # 货物出库温度 ℃，未给出时视为货物以环境温度装入
+    'open_close_frequency': None,  # 开关门频次 1/天，未给出时使用整体参数
+}
+
+
+class MultiCompartmentCalculator(HeatLoadCalculator):
+    """多温区车厢热负荷计算
+
+    车厢沿长度方向被隔板分为 N 个隔间（从车头到车尾排列），各隔间共用车厢的宽、高、
+    壁厚和换热参数，拥有各自的长度、设定温度、湿度和货物参数。所有隔间的各项负荷以
+    长度为 N 的数组一次计算，相邻隔间之间通过隔板交换热量。
+    """
+
+    def calculate_compartments(self, compartments, htc_advanced, precool):
+        """计算各隔间的热负荷
+
+        :param compartments: 隔间参数字典列表，必须包含 length（m）和 temp（℃），
+                             其余参数见 COMPARTMENT_DEFAULTS
+        :param htc_advanced: 是否使用高级换热系数计算
+        :param precool: 是否计算预冷负荷
+        :return: 各项负荷组成的字典，值为长度为 N 的数组，单位 W
+        """
+        c = self._prepare_compartments(compartments)
+        T, phi, T_env = c['temp'], c['relative_humidity'], c['env_temp']
+        effective_area, internal_volume = c['effective_area'], c['internal_volume']
+        inner_width, inner_height = c['inner_width'], c['inner_height']
+        resp_heat, specific_heat, load_mass = c['resp_heat'], c['specific_heat'], c['load_mass']
+        has_out_temp, out_temp, frequency = c['has_out_temp'], c['out_temp'], c['frequency']
+
+        htc, T_suf = self._calculate_htc(htc_advanced, c['speed'], T_env)
+        delta_T = T_env - T
+
+        # ------------------------------------------------------------
+        # 隔热壁与隔板传热
+        # ------------------------------------------------------------
+        Q_wall = self._calculate_wall_heat(htc, effective_area, delta_T)
+        Q_partition = self._calculate_partition_heat(htc, inner_width * inner_height, T)
+
+        # ------------------------------------------------------------
+        # 漏热、辐射与开关门
+        # ------------------------------------------------------------
+        m_leak = self._calculate_air_leakage(internal_volume)
+        phi_env = self.inputs['env_relative_humidity']
+        moist_env = self.ap.moist(T_env, phi_env)
+        moist_inn = self.ap.moist_array(T, phi)
+        cp_inn = self.ap.dry_array(T)['heat_capacity']
+        latent = 2500  # 水的汽化潜热 kJ/kg
+        Q_leak = m_leak * (
+            cp_inn * delta_T +
+            latent * (phi_env * moist_env['moisture_content'] - phi * moist_inn['moisture_content'])
+        )
+
+        Q_radiation = self._calculate_radiation_heat(htc, effective_area, T_env, T_suf)
+
+        air_env = self.ap.dry(T_env)
+        mass_flow = internal_volume * air_env['density'] * frequency / 24
+        Q_open = mass_flow * air_env['heat_capacity'] * delta_T / 3600
+
+        # ------------------------------------------------------------
+        # 货物与电气负荷
+        # ------------------------------------------------------------
+        Q_resp = resp_heat * load_mass
+        Q_load = specific_heat * (out_temp - T) * load_mass * 1000 / 24 / 3600
+        # 风机和照明按隔间容积分摊
+        Q_electric = self._calculate_electric_heat() * internal_volume / internal_volume.sum()
+
+        Q_total = Q_wall + Q_partition + Q_leak + Q_radiation + Q_open + Q_resp + Q_load + Q_electric
+
+        result = {
+            'Q_wall': Q_wall,
+            'Q_partition': Q_partition,
+            'Q_leak': Q_leak,
+            'Q_radiation': Q_radiation,
+            'Q_open': Q_open,
+            'Q_resp': Q_resp,
+            'Q_load': Q_load,
+            'Q_electric': Q_electric,
+        }
+
+        # ------------------------------------------------------------
+        # 预冷负荷
+        # ------------------------------------------------------------
+        if precool:
+            cabin_precool_time = self.inputs['cabin_precool_time']
+            Q_cabin_precool = self._calculate_cabin_precool(effective_area, delta_T)
+            # 未给出出库温度的货物视为以环境温度装入，需要预冷
+            Q_goods_precool = np.where(has_out_temp, 0.0, specific_heat * load_mass * delta_T / cabin_precool_time)
+            Q_total = Q_total + Q_cabin_precool + Q_goods_precool
+            result['Q_cabin_precool'] = Q_cabin_precool
+            result['Q_goods_precool'] = Q_goods_precool
+
+        result['Q_total'] = Q_total * self.inputs['safety_coeff']
+        return result
+
+    def _prepare_compartments(self, compartments):
+        """整理隔间参数并计算各隔间的几何参数
+
+        :return: 字典，隔间参数（temp、relative_humidity 等，见 COMPARTMENT_DEFAULTS）为长度为 N 的数组，
+                 另含 n、env_temp（℃）、speed（m/s）、inner_width、inner_height（m）、
+                 internal_volume（m³）和 effective_area（m²）
+        """
+        if not compartments:
+            self.message_show(self.page, "至少需要一个隔间", 'error')
+        compartments = [COMPARTMENT_DEFAULTS | c for c in compartments]
+        n = len(compartments)
+
+        width = self.inputs['width']
+        height = self.inputs['height']
+        thickness = self.inputs['thickness']
+        T_env = self.inputs['env_temp']
+        speed = self.inputs['speed']
+
+        lengths = np.array([c['length'] for c in compartments], dtype=float)
+        T = np.array([c['temp'] for c in compartments], dtype=float)
+        phi = np.array([c['relative_humidity'] for c in compartments], dtype=float)
+        resp_heat = np.array([c['resp_heat'] for c in compartments], dtype=float)
+        specific_heat = np.array([c['specific_heat'] for c in compartments], dtype=float)
+        load_mass = np.array([c['load_mass'] for c in compartments], dtype=float)
+        has_out_temp = np.array([c['out_temp'] is not None for c in compartments])
+        out_temp = np.array([T[i] if c['out_temp'] is None else c['out_temp'] for i, c in enumerate(compartments)], dtype=float)
+        frequency = np.array([
+            self.inputs['open_close_frequency'] if c['open_close_frequency'] is None else c['open_close_frequency']
+            for c in compartments
+        ], dtype=float)
+
+        if np.any(lengths <= 2 * thickness):
+            self.message_show(self.page, "隔间长度必须大于两倍厢体厚度", 'error')
+
+        # ------------------------------------------------------------
+        # 计算几何参数
+        # ------------------------------------------------------------
+        # 首尾隔间各带一面端墙，只有一个隔间时两面端墙都属于它
+        end_walls = np.zeros(n)
+        end_walls[0] += 1
+        end_walls[-1] += 1
+        inner_width = width - 2 * thickness
+        inner_height = height - 2 * thickness
+        inner_lengths = lengths - end_walls * thickness
+
+        area_out = 2 * lengths * (width + height) + end_walls * width * height
+        area_in = 2 * inner_lengths * (inner_width + inner_height) + end_walls * inner_width * inner_height
+        effective_area = (area_in * area_out) ** 0.5
+        internal_volume = inner_lengths * inner_width * inner_height
+
+        return {
+            'n': n,
+            'env_temp': T_env,
+            'speed': speed,
+            'temp': T,
+            'relative_humidity': phi,
+            'resp_heat': resp_heat,
+            'specific_heat': specific_heat,
+            'load_mass': load_mass,
+            'has_out_temp': has_out_temp,
+            'out_temp': out_temp,
+            'frequency': frequency,
+            'inner_width': inner_width,
+            'inner_height': inner_height,
+            'internal_volume': internal_volume,
+            'effective_area': effective_area,
+        }
+
+    def _calculate_partition_heat(self, htc, area, T):
+        """计算相邻隔间通过隔板传入的热量，隔板传热系数未给出时与隔热壁相同"""
+        partition_htc = self.inputs.get('partition_htc', htc)
+        # q[i] 为第 i+1 个隔间传给第 i 个隔间的热量
+        q = partition_htc * area * np.diff(T)
+        # 传热系数为逐时数组时 q 的形状为 (小时数, N-1)
+        Q_partition = np.zeros(q.shape[:-1] + T.shape[-1:])
+        Q_partition[..., :-1] += q
+        Q_partition[..., 1:] -= q
+        return Q_partition
+
+    def _calculate_cabin_precool(self, area, delta_T):
+        """计算各隔间厢体预冷负荷，所有隔间的瞬态导热作为一个批次求解"""
+        T_env = self.inputs['env_temp']
+        return area * self._simulate_cabin_precool(T_env - delta_T)
@@ -1,39 +1,53 @@
 
+import numpy as np
+
 from logger_config import setup_logger
 from htc import HTCCalculator
 from air_properties import AirProperties
+from dual import Dual, value_of
+from precool import average_precool_flux, simulate_precool
+from units import ENGINE_UNITS, INPUT_QUANTITIES, conversion, input_unit, to_engine_units
 logger = setup_logger()
 
-class UnitConverter:
+# 以空格分隔的多层厢体参数，不作为自动微分的自变量
+LAYER_KEYS = ('density_walls', 'specific_heat_walls', 'thermal_cond_walls', 'thickness_walls')
 
-    @staticmethod
-    def convert(value, from_unit, to_unit, unit_type):
-        conversions = {
-            "length": {"m": 1.0, "cm": 0.01, "mm": 0.001}, 
-            "temp": {"℃": lambda x: x, "K": lambda x: x - 273.15}, 
-            "power": {"W": 1.0, "kW": 1000.0},
-            "speed": {"km/h": lambda x: x, "m/s": lambda x: x * 1000 / 3600},
-            "time": {"h": 1.0, "min": 1/60, "s": 1/3600}
-        }
 
-        if unit_type in ["temp", "speed"]:
-            return conversions[unit_type][to_unit](value)
-        return value * conversions[unit_type][from_unit] / conversions[unit_type][to_unit]
+# calculate_all 可能输出的全部负荷项（固定顺序），未开启预冷时不输出预冷负荷项
+OUTPUT_KEYS = (
+    'Q_electric', 'Q_radiation',
+    'Q_wall_chi', 'Q_leak_chi', 'Q_open_chi', 'Q_resp_chi', 'Q_cabin_precool_chi', 'Q_goods_precool_chi',
+    'Q_total_chi', 'Q_total1_chi',
+    'Q_wall_fro', 'Q_leak_fro', 'Q_open_fro', 'Q_load_fro', 'Q_cabin_precool_fro',
+    'Q_total_fro', 'Q_total1_fro',
+)
+
+
+def raise_message(page, msg, msg_type="error"):
+    """无界面时（后台进程、批量计算）使用的消息方法，只记录日志，error 时中断计算"""
+    if msg_type == "error":
+        raise ValueError(f"Error occurred: {msg}")
+    logger.debug(msg)
 
 class HeatLoadCalculator:
-    def __init__(self, inputs, page, message_show):
-        self.inputs = inputs
+    def __init__(self, inputs, page, message_show, T_surface_guess=None):
+        # 输入在此换算为计算单位（m、℃、W、m/s、h），之后的计算不再处理单位
+        self.input_units = {key: input_unit(inputs, key) for key in INPUT_QUANTITIES if key in inputs}
+        self.inputs = to_engine_units(inputs)
         self.page = page
         self.message_show = message_show
         self.ap = AirProperties()
+        # 外表面温度的热启动初值 ℃（如参数扫描中上一个工况的解），以及本次求解的结果和迭代统计
+        self.T_surface_guess = T_surface_guess
+        self.surface_solution = None
         
 
     def calculate_all(self, htc_advanced, precool):
-        # 计算车厢尺寸（转换为米）
-        length = UnitConverter.convert(self.inputs['length'], self.inputs['length_unit'], 'm', 'length')
-        width  = UnitConverter.convert(self.inputs['width'], self.inputs['width_unit'], 'm', 'length')
-        height  = UnitConverter.convert(self.inputs['height'], self.inputs['height_unit'], 'm', 'length')
-        thickness = UnitConverter.convert(self.inputs['thickness'], self.inputs['thickness_unit'], 'm', 'length')
+        # 车厢尺寸 m（输入已换算为计算单位）
+        length = self.inputs['length']
+        width  = self.inputs['width']
+        height  = self.inputs['height']
+        thickness = self.inputs['thickness']
 
         # ------------------------------------------------------------
         # 计算几何参数
@@ -45,20 +59,14 @@ class HeatLoadCalculator:
         internal_volume = self._calculate_internal_volume(length, width, height, thickness)
 
         # 获取温度参数
-        T_env = UnitConverter.convert(self.inputs['env_temp'], self.inputs['env_temp_unit'], '℃', 'temp')
-        T_chi = UnitConverter.convert(self.inputs['chi_temp'], self.inputs['chi_temp_unit'], '℃', 'temp')
-        T_fro = UnitConverter.convert(self.inputs['fro_temp'], self.inputs['fro_temp_unit'], '℃', 'temp')
-        T_fro_out = UnitConverter.convert(self.inputs['fro_out_temp'], self.inputs['fro_out_temp_unit'], '℃', 'temp')
+        T_env = self.inputs['env_temp']
+        T_chi = self.inputs['chi_temp']
+        T_fro = self.inputs['fro_temp']
+        T_fro_out = self.inputs['fro_out_temp']
 
-        speed = UnitConverter.convert(self.inputs['speed'], self.inputs['speed_unit'], 'm/s', 'speed')
+        speed = self.inputs['speed']
         
-        htc_calculator = HTCCalculator(self.inputs, self.page, self.message_show, speed, T_env, UnitConverter)
-        if htc_advanced:
-            htc, T_suf = htc_calculator.get_htc()
-        else:
-            htc_conv_out = htc_calculator.calculate_external_convection(speed)
-            T_suf = htc_calculator.calculate_external_temperature(htc_conv_out)
-            htc = self.inputs['htc']
+        htc, T_suf = self._calculate_htc(htc_advanced, speed, T_env)
         # 车厢内外温差
         delta_T_chi = T_env - T_chi
         delta_T_fro = T_env - T_fro
@@ -172,6 +180,56 @@ class HeatLoadCalculator:
 
         
     
+    def calculate_gradient(self, htc_advanced, precool):
+        """一次计算同时得到各项热负荷及其对全部数值输入的偏导数
+
+        数值输入被替换为 Dual 自变量后执行一次 calculate_all，单位和多层厢体参数不参与求导。
+        偏导数按输入时的单位给出（如长度以 cm 输入时为每 cm 的变化量）。
+        :return: (结果字典, {输出键: {输入键: 偏导数}})
+        """
+        keys = [
+            key for key, value in self.inputs.items()
+            if key not in LAYER_KEYS and isinstance(value, (int, float)) and not isinstance(value, bool)
+        ]
+        inputs = self.inputs
+        self.inputs = dict(inputs)
+        for i, key in enumerate(keys):
+            self.inputs[key] = Dual.variable(inputs[key], i, len(keys))
+        try:
+            result = self.calculate_all(htc_advanced, precool)
+        finally:
+            self.inputs = inputs
+
+        # 对计算单位下数值的偏导数乘以换算比例，得到对输入单位下数值的偏导数
+        scales = np.array([
+            conversion(INPUT_QUANTITIES[key], self.input_units[key], ENGINE_UNITS[INPUT_QUANTITIES[key]])[0]
+            if key in self.input_units else 1.0
+            for key in keys
+        ])
+        values = {}
+        gradients = {}
+        for name, q in result.items():
+            if isinstance(q, Dual):
+                values[name] = q.value
+                gradients[name] = dict(zip(keys, (q.grad * scales).tolist()))
+            else:
+                values[name] = q
+                gradients[name] = dict.fromkeys(keys, 0.0)
+        return values, gradients
+
+    def _calculate_htc(self, htc_advanced, speed, T_env):
+        """计算隔热壁传热系数和外表面温度"""
+        htc_calculator = HTCCalculator(self.inputs, self.page, self.message_show, speed, T_env, self.T_surface_guess)
+        # 内外表面对流换热系数，供预冷瞬态导热计算使用
+        self.h_in = htc_calculator.calculate_internal_convection()
+        self.h_out = htc_calculator.calculate_external_convection(speed)
+        if htc_advanced:
+            result = htc_calculator.get_htc()
+        else:
+            result = self.inputs['htc'], htc_calculator.calculate_external_temperature(self.h_out)
+        self.surface_solution = htc_calculator.surface_solution
+        return result
+
     def _calculate_internal_volume(self, l, w, h, t):
         """计算内部体积"""
         return (l-2*t) * (w-2*t) * (h-2*t)
@@ -221,7 +279,7 @@ class HeatLoadCalculator:
         """计算太阳辐射热""" 
         ratio = self.inputs['radiation_area_ratio'] # 辐射面积 = 车箱面积×辐射面积系数 系数一般取 35%~50%
         radiation_area = area * ratio
-        radiation_time = UnitConverter.convert(self.inputs['radiation_time'], self.inputs['radiation_time_unit'], 'h', 'time')
+        radiation_time = self.inputs['radiation_time']
         time_ratio = radiation_time / 24 # 车厢受辐射时长 一般取 12~14 小时
 
         return htc * radiation_area * (T_suf - T_env) * time_ratio
@@ -252,102 +310,75 @@ class HeatLoadCalculator:
 
     def _calculate_electric_heat(self):
         """计算电气热负荷"""
-        light_time = UnitConverter.convert(self.inputs['light_time'], self.inputs['light_time_unit'], 'h', 'time')
-        fan_time = UnitConverter.convert(self.inputs['fan_time'], self.inputs['fan_time_unit'], 'h', 'time')
+        light_time = self.inputs['light_time']
+        fan_time = self.inputs['fan_time']
 
         return (self.inputs['light_power'] * light_time +
                 self.inputs['fan_power'] * fan_time) / 24
 
     def _calculate_cabin_precool(self, area, delta_T_chi, delta_T_fro):
         """计算厢体预冷负荷"""
-        wall_mass = self.get_wall_mass(
-            self.inputs['density_walls'],
-            self.inputs['thickness_walls'],
-            area
-        )
-        avg_cp = self.get_average_specific_heat(
-            self.inputs['density_walls'],
-            self.inputs['specific_heat_walls'],
-            self.inputs['thickness_walls']
-        )
-        cabin_precool_time = UnitConverter.convert(self.inputs['cabin_precool_time'], self.inputs['cabin_precool_time_unit'], 'h', 'time')
-
+        T_env = self.inputs['env_temp']
+        flux = self._simulate_cabin_precool([T_env - delta_T_chi, T_env - delta_T_fro])
         return {
-            'fre': wall_mass * avg_cp * delta_T_chi / (2 * cabin_precool_time),
-            'frz': wall_mass * avg_cp * delta_T_fro / (2 * cabin_precool_time)
+            'fre': area * flux[0],
+            'frz': area * flux[1]
         }
 
+    def _simulate_cabin_precool(self, T_sets):
+        """一维瞬态导热计算预冷时长内壁面蓄热释放引起的平均附加热流（W/m²），每个设定温度一组
+
+        该项按数值计算，使用 Dual 输入时不传递梯度。
+        """
+        layers = self.get_wall_layers()
+        T_env = self.inputs['env_temp']
+        cabin_precool_time = self.inputs['cabin_precool_time']
+        T_sets = [value_of(T) for T in T_sets]
+        result = simulate_precool(
+            [layers] * len(T_sets), value_of(T_env), T_sets,
+            value_of(self.h_in), value_of(self.h_out), value_of(cabin_precool_time) * 3600
+        )
+        for T_set, t in zip(T_sets, result['time_to_setpoint']):
+            if t != t:  # NaN
+                logger.warning(f"设定温度 {T_set:.1f} ℃ 时，预冷时长内厢体内表面温度未降至稳态值附近")
+            else:
+                logger.info(f"设定温度 {T_set:.1f} ℃ 时，厢体内表面温度降至稳态值附近约需 {t / 60:.1f} 分钟")
+        return average_precool_flux(result)
+
     def _calculate_goods_precool(self, delta_T_chi):
         """计算货物预冷负荷"""
-        cabin_precool_time = UnitConverter.convert(self.inputs['cabin_precool_time'], self.inputs['cabin_precool_time_unit'], 'h', 'time')
+        cabin_precool_time = self.inputs['cabin_precool_time']
         return self.inputs['fro_specific_heat'] * self.inputs['chi_load_mass'] * delta_T_chi / cabin_precool_time
 
 
-    def get_average_specific_heat(self, density_walls, specific_heat_walls, thickness_walls):
-        """
-        计算多层结构的平均比热容（单位：J/kg·K）
+    def get_wall_layers(self):
+        """解析厢体各层材料参数
+
+        :return: [(厚度 m, 密度 kg/m³, 比热容 J/kg·K, 导热系数 W/m·K), ...]，从内到外
         """
         # 各层厢体材料密度，单位 kg/m³
-        density_walls = list(map(float, str(density_walls).split()))
+        density_walls = list(map(float, str(self.inputs['density_walls']).split()))
         # 各层厢体材料比热容，单位 J/kg·K
-        specific_heat_walls = list(map(float, str(specific_heat_walls).split()))
-        # 各层厢体材料厚度
-        thickness_walls = [
-            UnitConverter.convert(float(t_str), self.inputs['thickness_walls_unit'], 'm', 'length')
-            for t_str in str(self.inputs['thickness_walls']).split()
-        ]
-
-        if not (len(density_walls) == len(specific_heat_walls) == len(thickness_walls)):
-            logger.error(f"厢体各层参数的输入数量不一致（密度：{len(density_walls)}个值, 比热容：{len(specific_heat_walls)}, 厚度：{len(thickness_walls)}个值）")
-            self.message_show(self.page, f"厢体各层参数的输入数量不一致（密度：{len(density_walls)}, 比热容：{len(specific_heat_walls)}个值, 厚度：{len(thickness_walls)}个值）", 'error')
-
-        total_heat_capacity = 0.0 # 总热容（单位面积
-        total_mass = 0.0          # 总质量（单位面积
-        
-        for density, specific_heat, thickness in zip(density_walls, specific_heat_walls, thickness_walls):
-            if thickness <= 0:
-                logger.error("厢体单层材料厚度必须大于零，请检查输入参数")
-                self.message_show(self.page, "厢体单层材料厚度必须大于零，请检查输入参数", 'error')
-            layer_mass = density * thickness
-            total_heat_capacity += specific_heat * layer_mass
-            total_mass += layer_mass
-
-        if total_mass <= 0:
-            logger.error("总质量必须大于零，请检查输入参数")
-            self.message_show(self.page, "总质量必须大于零，请检查输入参数", 'error')
-
-        return total_heat_capacity / total_mass
-
-    def get_wall_mass(self, thickness_walls, density_walls, area):
-        # 各层厢体材料密度，单位 kg/m³
-        density_walls = list(map(float, str(density_walls).split()))
+        specific_heat_walls = list(map(float, str(self.inputs['specific_heat_walls']).split()))
+        # 各层厢体材料导热系数，单位 W/m·K
+        thermal_cond_walls = list(map(float, str(self.inputs['thermal_cond_walls']).split()))
         # 各层厢体材料厚度
         thickness_walls = [
-            UnitConverter.convert(float(t_str), self.inputs['thickness_walls_unit'], 'm', 'length')
+            float(t_str)
             for t_str in str(self.inputs['thickness_walls']).split()
         ]
-        # 检查输入列表长度一致性
-        if len(thickness_walls) != len(density_walls):
-            logger.error("厢体各层材料的导热率与密度的输入数值数量不一致")
-            self.message_show(self.page, "厢体各层材料的导热率与密度的输入数值数量不一致", 'error')
-        # 校验物理量合理性
-        for d in thickness_walls:
-            if d < 0:
-                logger.error("厢体各层材料的厚度中不能存在负数")
-                self.message_show(self.page, "厢体各层材料的厚度中不能存在负数", 'error')
-        for rho in density_walls:
-            if rho < 0:
-                logger.error("厢体各层材料的密度中不能存在负数")
-                self.message_show(self.page, "厢体各层材料的密度中不能存在负数", 'error')
-
-        # 计算总质量（单位面积）
-        total_mass = 0.0
-        for d, rho in zip(thickness_walls, density_walls):
-            total_mass += rho * d
-
-        # 乘以总面积得到最终质量
-        return total_mass * area
-
-
-
 
+        if not (len(density_walls) == len(specific_heat_walls) == len(thermal_cond_walls) == len(thickness_walls)):
+            logger.error(f"厢体各层参数的输入数量不一致（密度：{len(density_walls)}个值, 比热容：{len(specific_heat_walls)}个值, 导热率：{len(thermal_cond_walls)}个值, 厚度：{len(thickness_walls)}个值）")
+            self.message_show(self.page, f"厢体各层参数的输入数量不一致（密度：{len(density_walls)}个值, 比热容：{len(specific_heat_walls)}个值, 导热率：{len(thermal_cond_walls)}个值, 厚度：{len(thickness_walls)}个值）", 'error')
+        if any(d <= 0 for d in thickness_walls):
+            logger.error("厢体单层材料厚度必须大于零，请检查输入参数")
+            self.message_show(self.page, "厢体单层材料厚度必须大于零，请检查输入参数", 'error')
+        if any(rho < 0 for rho in density_walls) or any(cp < 0 for cp in specific_heat_walls):
+            logger.error("厢体各层材料的密度和比热容中不能存在负数")
+            self.message_show(self.page, "厢体各层材料的密度和比热容中不能存在负数", 'error')
+        if any(k <= 0 for k in thermal_cond_walls):
+            logger.error("厢体各层材料的导热系数必须大于零")
+            self.message_show(self.page, "厢体各层材料的导热系数必须大于零", 'error')
+
+        return list(zip(thickness_walls, density_walls, specific_heat_walls, thermal_cond_walls))
@@ -0,0 +1,208 @@
+import heapq
+import math
+import numpy as np
+
+from air_properties import AirProperties
+from logger_config import setup_logger
+
+logger = setup_logger()
+
+# 事件类型，数值同时决定同一时刻事件的处理顺序
+DOOR_CLOSE = 0
+RECOVERED = 1
+DOOR_OPEN = 2
+
+GRAVITY = 9.81  # 重力加速度 m/s²
+
+
+class DoorEventSimulator:
+    """多站点配送开关门离散事件仿真
+
+    把厢内空气、货物和内壁视为一个集总热容，门关闭时只有壁面传热，门打开时叠加门洞
+    冷风渗透负荷；机组在厢温高于设定温度时以额定制冷量运行，降到设定温度后维持不变。
+    两个事件之间的温度变化有解析解，因此每个事件只需常数次计算，所有车辆的事件放在
+    同一个最小堆中按时间顺序处理。
+    """
+
+    def __init__(self, volume, door_width, door_height, UA, heat_capacity, T_env, T_set, unit_capacity,
+                 phi_env=0.5, phi_set=0.9, door_flow_factor=1.0, unit_off_when_open=False):
+        """
+        :param volume: 厢体内部容积 m³
+        :param door_width: 门洞宽度 m
+        :param door_height: 门洞高度 m
+        :param UA: 壁面传热系数与面积之积 W/K
+        :param heat_capacity: 厢内空气、货物和内壁的集总热容 J/K
+        :param T_env: 环境温度 ℃
+        :param T_set: 设定温度 ℃
+        :param unit_capacity: 机组制冷量 W
+        :param phi_env: 环境相对湿度
+        :param phi_set: 厢内相对湿度
+        :param door_flow_factor: 门帘等防护措施下的渗透风量折减系数，无防护时为 1
+        :param unit_off_when_open: 开门时机组是否停机
+        """
+        self.volume = volume
+        self.UA = UA
+        self.heat_capacity = heat_capacity
+        self.T_env = T_env
+        self.T_set = T_set
+        self.unit_capacity = unit_capacity
+        self.unit_off_when_open = unit_off_when_open
+
+        ap = AirProperties()
+        rho_in = ap.dry(T_set)['density']
+        rho_env = ap.dry(T_env)['density']
+        moist_in = ap.moist(T_set, phi_set)
+        moist_env = ap.moist(T_env, phi_env)
+
+        # 门洞冷风渗透量（Gosney-Olama 公式，ASHRAE Refrigeration Handbook），单位 kg/s
+        density_factor = (2 / (1 + (rho_in / rho_env) ** (1 / 3))) ** 1.5
+        self.infiltration_mass_flow = (
+            0.221 * door_width * door_height * rho_in
+            * math.sqrt(max(1 - rho_env / rho_in, 0.0)) * math.sqrt(GRAVITY * door_height)
+            * density_factor * door_flow_factor
+        )
+        # 渗透热负荷（含潜热），单位 W
+        self.infiltration_load = self.infiltration_mass_flow * max(moist_env['enthalpy'] - moist_in['enthalpy'], 0.0)
+
+        # 开门和关门两种状态下的平衡温度以及温度响应的衰减速率 1/s
+        self.T_inf_open = self.T_env + self._net_gain(True) / UA
+        self.T_inf_closed = self.T_env + self._net_gain(False) / UA
+        self.decay_rate = UA / heat_capacity
+
+    # ------------------------------------------------------------
+    # 解析解
+    # ------------------------------------------------------------
+    def _net_gain(self, door_open):
+        """除壁面传热以外的恒定热流（渗透负荷减去机组制冷量），单位 W"""
+        gain = self.infiltration_load if door_open else 0.0
+        if not (door_open and self.unit_off_when_open):
+            gain -= self.unit_capacity
+        return gain
+
+    def _advance(self, T, dt, door_open, holding):
+        """推进 dt 秒后的厢温；holding 表示机组已把厢温维持在设定温度"""
+        if dt <= 0:
+            return T
+        if holding and not door_open:
+            return T
+        T_inf = self.T_inf_open if door_open else self.T_inf_closed
+        T_new = T_inf + (T - T_inf) * math.exp(-dt * self.decay_rate)
+        # 机组运行时厢温不会低于设定温度
+        return max(T_new, self.T_set) if T >= self.T_set else T_new
+
+    def _recovery_time(self, T):
+        """关门后厢温从 T 降回设定温度所需时间，机组能力不足时为 inf"""
+        if T <= self.T_set:
+            return 0.0
+        T_inf = self.T_inf_closed
+        if T_inf >= self.T_set:
+            return math.inf
+        return 1 / self.decay_rate * math.log((T - T_inf) / (self.T_set - T_inf))
+
+    # ------------------------------------------------------------
+    # 事件仿真
+    # ------------------------------------------------------------
+    @staticmethod
+    def _merge_stops(v, schedule):
+        """检查站点列表并合并重叠的开门
+
+        开门时刻早于上一次关门时刻的站点视为门一直开着，与上一次开门合并为一次开门；
+        开门时刻未按升序排列或开门时长为负时抛出 ValueError。
+
+        :return: [(开门时刻 s, 开门时长 s), ...]
+        """
+        merged = []
+        for open_time, duration in schedule:
+            if duration < 0:
+                raise ValueError(f"车辆 {v} 在 {open_time:.0f}s 的开门时长不能为负")
+            if merged and open_time < merged[-1][0]:
+                raise ValueError(f"车辆 {v} 的站点未按开门时刻升序排列（{open_time:.0f}s 早于 {merged[-1][0]:.0f}s）")
+            if merged and open_time < merged[-1][0] + merged[-1][1]:
+                start, last_duration = merged[-1]
+                merged[-1] = (start, max(last_duration, open_time + duration - start))
+                logger.warning(f"车辆 {v} 在 {open_time:.0f}s 的开门与上一次开门重叠，已合并为一次开门")
+                continue
+            merged.append((open_time, duration))
+        return merged
+
+    def simulate(self, schedules):
+        """仿真一组车辆的配送路线
+
+        :param schedules: 每辆车一个站点列表，站点为 (开门时刻 s, 开门时长 s)，按时间升序排列，
+                          重叠的开门合并为一次，见 _merge_stops
+        :return: 每辆车一个字典，数组字段 open_time、open_duration、temperature_rise、
+                 peak_temperature、recovery_time（s，机组能力不足无法恢复时为 inf，恢复前再次开门时为 NaN）、
+                 infiltration_energy（J），
+                 以及 total_infiltration_energy（J）和 max_temperature（℃）
+        """
+        n = len(schedules)
+        stops = [iter(self._merge_stops(v, schedule)) for v, schedule in enumerate(schedules)]
+        T = [self.T_set] * n
+        t_last = [0.0] * n
+        door_open = [False] * n
+        holding = [True] * n
+        version = [0] * n
+        open_start = [0.0] * n
+        T_open = [0.0] * n
+        records = [[] for _ in range(n)]
+
+        # 堆元素为 (时刻, 事件类型, 车辆编号, 附加数据)，同一时刻先关门、再恢复、最后开门
+        heap = []
+
+        def push_next_stop(v):
+            stop = next(stops[v], None)
+            if stop is not None:
+                heapq.heappush(heap, (stop[0], DOOR_OPEN, v, stop[1]))
+
+        for v in range(n):
+            push_next_stop(v)
+
+        while heap:
+            t, kind, v, payload = heapq.heappop(heap)
+            if kind == RECOVERED:
+                if payload != version[v]:
+                    continue  # 恢复前又发生了开门，事件已过期
+                T[v] = self.T_set
+                holding[v] = True
+                t_last[v] = t
+                records[v][-1][4] = t - records[v][-1][5]
+                continue
+
+            T[v] = self._advance(T[v], t - t_last[v], door_open[v], holding[v])
+            t_last[v] = t
+
+            if kind == DOOR_OPEN:
+                door_open[v] = True
+                holding[v] = False
+                version[v] += 1
+                open_start[v] = t
+                T_open[v] = T[v]
+                heapq.heappush(heap, (t + payload, DOOR_CLOSE, v, payload))
+            else:  # DOOR_CLOSE
+                door_open[v] = False
+                recovery = self._recovery_time(T[v])
+                # [开门时刻, 开门时长, 温升, 峰值温度, 恢复时间, 关门时刻, 渗透热量]
+                records[v].append([open_start[v], payload, T[v] - T_open[v], T[v],
+                                   math.nan if math.isfinite(recovery) else math.inf, t,
+                                   self.infiltration_load * payload])
+                if recovery == 0.0:
+                    holding[v] = True
+                    records[v][-1][4] = 0.0
+                elif math.isfinite(recovery):
+                    heapq.heappush(heap, (t + recovery, RECOVERED, v, version[v]))
+                push_next_stop(v)
+
+        results = []
+        for rows in records:
+            data = np.array(rows, dtype=float).reshape(-1, 7)
+            results.append({
+                'open_time': data[:, 0],
+                'open_duration': data[:, 1],
+                'temperature_rise': data[:, 2],
+                'peak_temperature': data[:, 3],
+                'recovery_time': data[:, 4],
+                'infiltration_energy': data[:, 6],
+                'total_infiltration_energy': data[:, 6].sum(),
+                'max_temperature': data[:, 3].max() if len(data) else self.T_set,
+            })
+        return results
@@ -0,0 +1,154 @@
+import math
+import numpy as np
+
+
+class Dual:
+    """前向模式自动微分使用的对偶数
+
+    value 为函数值，grad 为对全部自变量的偏导数组成的数组。
+    支持四则运算、乘方以及与普通数值之间的比较（比较只看函数值），
+    因此计算引擎中的代码无需修改即可同时得到结果和梯度。
+    """
+    __slots__ = ('value', 'grad')
+
+    def __init__(self, value, grad):
+        self.value = float(value)
+        self.grad = grad
+
+    @classmethod
+    def variable(cls, value, index, n):
+        """创建第 index 个自变量（共 n 个），其梯度为单位向量"""
+        grad = np.zeros(n)
+        grad[index] = 1.0
+        return cls(value, grad)
+
+    # ------------------------------------------------------------
+    # 四则运算
+    # ------------------------------------------------------------
+    def __add__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.value + other.value, self.grad + other.grad)
+        return Dual(self.value + other, self.grad)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.value - other.value, self.grad - other.grad)
+        return Dual(self.value - other, self.grad)
+
+    def __rsub__(self, other):
+        return Dual(other - self.value, -self.grad)
+
+    def __mul__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.value * other.value, self.grad * other.value + other.grad * self.value)
+        return Dual(self.value * other, self.grad * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.value / other.value,
+                        (self.grad * other.value - other.grad * self.value) / other.value**2)
+        return Dual(self.value / other, self.grad / other)
+
+    def __rtruediv__(self, other):
+        return Dual(other / self.value, -other * self.grad / self.value**2)
+
+    def __pow__(self, other):
+        if isinstance(other, Dual):
+            value = self.value ** other.value
+            return Dual(value, value * (other.grad * math.log(self.value) + other.value * self.grad / self.value))
+        return Dual(self.value ** other, other * self.value ** (other - 1) * self.grad)
+
+    def __rpow__(self, other):
+        value = other ** self.value
+        return Dual(value, value * math.log(other) * self.grad)
+
+    def __neg__(self):
+        return Dual(-self.value, -self.grad)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return -self if self.value < 0 else self
+
+    # ------------------------------------------------------------
+    # 比较与类型转换（只使用函数值）
+    # ------------------------------------------------------------
+    def _value_of(self, other):
+        return other.value if isinstance(other, Dual) else other
+
+    def __lt__(self, other):
+        return self.value < self._value_of(other)
+
+    def __le__(self, other):
+        return self.value <= self._value_of(other)
+
+    def __gt__(self, other):
+        return self.value > self._value_of(other)
+
+    def __ge__(self, other):
+        return self.value >= self._value_of(other)
+
+    def __eq__(self, other):
+        return self.value == self._value_of(other)
+
+    def __ne__(self, other):
+        return self.value != self._value_of(other)
+
+    __hash__ = None
+
+    def __float__(self):
+        return self.value
+
+    def __int__(self):
+        return int(self.value)
+
+    def __format__(self, format_spec):
+        return format(self.value, format_spec)
+
+    def __repr__(self):
+        return f"Dual({self.value}, {self.grad})"
+
+    def __str__(self):
+        return str(self.value)
+
+    # ------------------------------------------------------------
+    # 初等函数
+    # ------------------------------------------------------------
+    def exp(self):
+        value = math.exp(self.value)
+        return Dual(value, value * self.grad)
+
+    def log(self):
+        return Dual(math.log(self.value), self.grad / self.value)
+
+
+def exp(x):
+    """同时支持普通数值和 Dual 的指数函数"""
+    return x.exp() if isinstance(x, Dual) else math.exp(x)
+
+
+def log(x):
+    """同时支持普通数值和 Dual 的自然对数"""
+    return x.log() if isinstance(x, Dual) else math.log(x)
+
+
+def value_of(x):
+    """取出函数值，普通数值原样返回"""
+    return x.value if isinstance(x, Dual) else x
+
+
+def implicit_solution(x, residual, d_residual_dx):
+    """对迭代求得的隐式解 x 赋予梯度
+
+    x 满足 f(x, p) = 0 时，由隐函数定理 dx/dp = -(∂f/∂p) / (∂f/∂x)。
+    residual 为在 x 处以 Dual 参数计算的 f（其梯度即 ∂f/∂p），d_residual_dx 为 ∂f/∂x，
+    因此只需在收敛点上计算一次，而不必对迭代过程逐步求导。
+    """
+    if not isinstance(residual, Dual):
+        return x
+    return Dual(value_of(x), -residual.grad / value_of(d_residual_dx))
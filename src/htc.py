@@ -24,15 +24,88 @@ Description  :
 '''
 from logger_config import setup_logger
 logger = setup_logger()
-import math
+import numpy as np
+from dual import exp, implicit_solution, value_of
+from thermal_bridge import thermal_bridging_coeff
+
+STEFAN_BOLTZMANN = 0.0000000567  # 斯特藩-玻尔兹曼常数 W/m²·K⁴
+
+
+# 外表面温度求解的默认收敛条件：残差 W/m² 和温度误差估计 K
+SURFACE_TEMP_TOLERANCE = 0.001
+SURFACE_TEMP_XTOL = 1e-6
+SURFACE_TEMP_MAX_ITER = 50
+
+
+def solve_surface_temperature(T_env, solar, absorptivity, emissivity, htc_conv_out, T_guess=None,
+                              tolerance=SURFACE_TEMP_TOLERANCE, xtol=SURFACE_TEMP_XTOL, max_iter=SURFACE_TEMP_MAX_ITER):
+    """求解车厢外表面温度（外表面热平衡 εσT⁴ + hT = εσT₀⁴ + hT₀ + αI），支持数组
+
+    带区间保护的牛顿迭代：根一定位于 [T₀, T₀ + αI/h] 内（左端残差 ≤ 0，右端残差 ≥ 0），每步用
+    残差的符号收缩区间，牛顿步落在区间外时改用二分。冷启动从区间右端开始，方程为凸函数，
+    牛顿迭代单调收敛；给出 T_guess（如扫描或逐时计算中上一次的解）时从该值热启动，
+    相邻工况接近时一两次迭代即可收敛。
+
+    收敛条件在每次迭代前检查：|残差| < max(tolerance, xtol × 残差导数)，即残差足够小，
+    或按当前斜率估计的温度误差小于 xtol，容差随各点的斜率自适应。已收敛的点不再更新。
+
+    :param T_env: 环境温度 ℃
+    :param solar: 太阳辐照强度 W/m²，可与 T_env 广播
+    :param T_guess: 初值 ℃，None 时冷启动
+    :return: (外表面温度 ℃, 统计字典)；统计字典含 iterations（迭代次数）、residual（最终残差绝对值 W/m²）
+             和 converged（是否收敛），形状均与外表面温度相同
+    """
+    T0 = np.asarray(T_env, dtype=float) + 273.15
+    solar = np.asarray(solar, dtype=float)
+    shape = np.broadcast_shapes(T0.shape, solar.shape, np.shape(htc_conv_out))
+    radiation = emissivity * STEFAN_BOLTZMANN
+    rhs = radiation * T0**4 + htc_conv_out * T0 + absorptivity * solar
+    T_far = T0 + absorptivity * solar / htc_conv_out
+    low = np.broadcast_to(np.minimum(T0, T_far), shape).copy()
+    high = np.broadcast_to(np.maximum(T0, T_far), shape).copy()
+    if T_guess is None:
+        T = high.copy()
+    else:
+        T = np.clip(np.broadcast_to(np.asarray(T_guess, dtype=float) + 273.15, shape), low, high)
+
+    iterations = np.zeros(shape, dtype=int)
+    for i in range(max_iter + 1):
+        F = radiation * T**4 + htc_conv_out * T - rhs
+        dF = 4 * radiation * T**3 + htc_conv_out
+        active = np.abs(F) >= np.maximum(tolerance, xtol * dF)
+        if not active.any() or i == max_iter:
+            break
+        iterations += active
+        high = np.where(active & (F > 0), T, high)
+        low = np.where(active & (F < 0), T, low)
+        T_newton = T - F / dF
+        T_safe = np.where((T_newton < low) | (T_newton > high), (low + high) / 2, T_newton)
+        T = np.where(active, T_safe, T)
+    if active.any():
+        logger.warning(f"外表面温度迭代 {max_iter} 次后仍有 {int(active.sum())} 个点未收敛，最大残差 {np.abs(F).max():.3g} W/m²")
+    return T - 273.15, {'iterations': iterations, 'residual': np.abs(F), 'converged': ~active}
+
+
+def external_temperature_array(T_env, solar, absorptivity, emissivity, htc_conv_out, tolerance=SURFACE_TEMP_TOLERANCE,
+                               max_iter=SURFACE_TEMP_MAX_ITER):
+    """向量化求解车厢外表面温度，只返回温度，见 solve_surface_temperature
+
+    :return: 外表面温度 ℃，形状为广播后的形状
+    """
+    return solve_surface_temperature(T_env, solar, absorptivity, emissivity, htc_conv_out,
+                                     tolerance=tolerance, max_iter=max_iter)[0]
+
 class HTCCalculator:
-    def __init__(self, inputs, page, message_show, speed, T_env, UnitConverter):
+    def __init__(self, inputs, page, message_show, speed, T_env, T_surface_guess=None):
+        # inputs 为已换算为计算单位的输入字典，见 units.to_engine_units
         self.inputs = inputs
         self.page = page
         self.message_show = message_show
         self.speed = speed
         self.T_env = T_env
-        self.UnitConverter = UnitConverter
+        # 外表面温度的热启动初值 ℃，以及最近一次求解的结果和迭代统计
+        self.T_surface_guess = T_surface_guess
+        self.surface_solution = None
         
     def get_htc(self) -> float:
         """综合计算车厢隔热壁传热系数"""
@@ -55,7 +128,7 @@ class HTCCalculator:
         # ------------------------------------------------------------
         # 车厢隔热壁内部对流传热系数计算
         # ------------------------------------------------------------
-        htc_conv_in = self._calculate_internal_convection()
+        htc_conv_in = self.calculate_internal_convection()
 
         # ------------------------------------------------------------
         # 车厢隔热壁外部辐射传热系数计算
@@ -70,18 +143,37 @@ class HTCCalculator:
             htc_cond, htc_conv_out + htc_radiation, htc_conv_in
         )
         
-        # 热桥影响系数 根据热桥数量选定系数为1.1~1.25
-        return htc_total * self.inputs['thermal_bridging_coeff'], T_suf
+        # 热桥影响系数：给出骨架参数时由二维截面导热计算，否则按热桥数量选定系数为1.1~1.25
+        if self.inputs.get('frame_cond'):
+            bridging_coeff = self._calculate_thermal_bridging_coeff(htc_conv_in, htc_conv_out + htc_radiation)
+        else:
+            bridging_coeff = self.inputs['thermal_bridging_coeff']
+        return htc_total * bridging_coeff, T_suf
+
+    def _calculate_thermal_bridging_coeff(self, h_in, h_out) -> float:
+        """由厢体各层材料和骨架参数计算热桥影响系数"""
+        thickness_walls = [
+            float(t_str)
+            for t_str in str(self.inputs['thickness_walls']).split()
+        ]
+        thermal_conds = list(map(float, str(self.inputs['thermal_cond_walls']).split()))
+        frame = (self.inputs['frame_width'], self.inputs['frame_spacing'], self.inputs['frame_cond'])
+        if not (0 < frame[0] < frame[1]):
+            logger.error("骨架宽度应大于0且小于骨架间距")
+            self.message_show(self.page, "骨架宽度应大于0且小于骨架间距", 'error')
+        coeff = thermal_bridging_coeff(zip(thickness_walls, thermal_conds), frame, value_of(h_in), value_of(h_out))
+        logger.info(f"二维截面导热计算得到热桥影响系数为 {coeff:.3f}")
+        return coeff
 
     def _validate_inputs(self):
         """校验所有输入参数的合法性"""
         thickness_walls = [
-            self.UnitConverter.convert(float(t_str), self.inputs['thickness_walls_unit'], 'm', 'length')
+            float(t_str)
             for t_str in str(self.inputs['thickness_walls']).split()
         ]
         thermal_conds = list(map(float, str(self.inputs['thermal_cond_walls']).split()))
         
-        if len(thickness_walls) == 1 and thickness_walls[0] != self.UnitConverter.convert(float(self.inputs['thickness']), self.inputs['thickness_unit'], 'm', 'length'):
+        if len(thickness_walls) == 1 and thickness_walls[0] != float(self.inputs['thickness']):
             logger.error(f"各层厚度输入单个数值时，应当与整体参数中的厢体厚度的值一致")
             self.message_show(self.page, f"各层厚度输入单个数值时，应当与整体参数中的厢体厚度的值一致）", 'error')
         if len(thickness_walls) != len(thermal_conds):
@@ -104,7 +196,7 @@ class HTCCalculator:
         """计算热阻"""
         # 各层厢体材料厚度 单位 m
         thickness_walls = [
-            self.UnitConverter.convert(float(t_str), self.inputs['thickness_walls_unit'], 'm', 'length')
+            float(t_str)
             for t_str in str(self.inputs['thickness_walls']).split()
         ]
         # 各层厢体材料导热系数 单位：W/m2K
@@ -120,41 +212,43 @@ class HTCCalculator:
 
     def calculate_external_convection(self, speed: float) -> float:
         """计算外部对流传热系数"""
-        return 6.31 * speed**0.656 + 3.25 * math.exp(-1.91 * speed)
+        return 6.31 * speed**0.656 + 3.25 * exp(-1.91 * speed)
 
     def calculate_external_temperature(self, htc_conv_out):
+        """求解外表面温度 ℃，迭代统计保存在 self.surface_solution 中"""
         solar = self.inputs['solar_radiation']
         alpha = self.inputs['surface_absorptivity'] 
-        sigma = 0.0000000567
+        sigma = STEFAN_BOLTZMANN
         epsilon  = self.inputs['surface_emissivity']
         T0 = self.T_env+273.15
         # 定义方程和导数
-        def f(T):
+        def f(T, epsilon, htc_conv_out, T0, alpha, solar):
             return epsilon  * sigma  * T**4 + htc_conv_out * T - (epsilon  * sigma  * T0**4 + htc_conv_out * T0 + alpha * solar)
 
-        def df(T):
+        def df(T, epsilon, htc_conv_out):
             return 4 * epsilon  * sigma * T**3 + htc_conv_out
-        
-        # 牛顿迭代
-        T_initial = T0 + 20
-        tolerance = 0.001
-        max_iter = 500
-        T = T_initial
-        for _ in range(max_iter):
-            F = f(T)
-            dF = df(T)
-            T_new = T - F / dF
-            if abs(F) < tolerance:
-                break
-            T = T_new
+
+        # 迭代只对函数值进行，参数为 Dual 时收敛后再按隐函数定理求梯度
+        params = (epsilon, htc_conv_out, T0, alpha, solar)
+        values = tuple(value_of(p) for p in params)
+        T_suf, stats = solve_surface_temperature(values[2] - 273.15, values[4], values[3], values[0], values[1],
+                                                 T_guess=self.T_surface_guess)
+        T = float(T_suf) + 273.15
+        T = implicit_solution(T, f(T, *params), df(T, *values[:2]))
         T = T -273.15
 
-        logger.info(f"牛顿拉夫逊迭代求解辐射表面温度为 {T:.2f} °C，残差为 {abs(F):.6f}")
-        self.message_show(self.page, f"牛顿拉夫逊迭代求解辐射表面温度为 {T:.2f} °C，残差为 {abs(F):.6f}", 'info')
+        self.surface_solution = {
+            'T_surface': float(T_suf),
+            'iterations': int(stats['iterations']),
+            'residual': float(stats['residual']),
+            'converged': bool(stats['converged']),
+        }
+        logger.info(f"迭代求解辐射表面温度为 {T:.2f} °C，迭代 {self.surface_solution['iterations']} 次，"
+                    f"残差为 {self.surface_solution['residual']:.6f}")
 
         return T
 
-    def _calculate_internal_convection(self) -> float:
+    def calculate_internal_convection(self) -> float:
         """计算内部对流传热系数"""
         ΔT_insuf = self.inputs['diff_insuf_with_inair']
         β = self.inputs['beta'] # 与厢内空气流动和温差有关的系数，在自然循环时2.3~2.8
@@ -0,0 +1,241 @@
+import numpy as np
+
+from logger_config import setup_logger
+from units import to_engine_units
+
+logger = setup_logger()
+
+# 校验结果代码
+VALID = 0         # 校验通过或该字段在当前模式下不参与计算
+MISSING = 1       # 必填字段为空
+NOT_NUMBER = 2    # 不是有效数字
+OUT_OF_RANGE = 3  # 超出取值范围
+
+# 字段种类
+NUMBER = 'number'  # 单个数值
+LAYERS = 'layers'  # 以空格分隔的各层数值，如 "0.5 7 0.5"
+
+# 字段参与计算的条件：None 表示始终参与；其余为模式名，见 InputValidator._mode_flags
+ALWAYS = None
+HTC_ADVANCED = 'htc_advanced'    # 仅高级换热模式
+HTC_SIMPLE = 'htc_simple'        # 仅非高级换热模式
+PRECOOL = 'precool'              # 仅计算预冷负荷时
+WALL_LAYERS = 'wall_layers'      # 高级换热或预冷任一开启时
+
+# 输入参数声明：标签、种类、参与计算的条件，以及可选的取值范围
+# range 为按计算单位（见 units.ENGINE_UNITS）给出的 (下限, 上限, 包含下限, 包含上限)，任一端为 None 表示不限；
+# message 为超出范围时的提示
+INPUT_SCHEMA = {
+    # 车厢参数
+    'length': {'label': '长度', 'range': (0, None, True, True), 'message': '长应大于0'},
+    'width': {'label': '宽度', 'range': (0, None, True, True), 'message': '宽应大于0'},
+    'height': {'label': '高度', 'range': (0, None, True, True), 'message': '高应大于0'},
+    'thickness': {'label': '箱体厚度', 'range': (0, None, True, True), 'message': '厚度应大于0'},
+    'speed': {'label': '车速', 'range': (0, None, True, True), 'message': '车速应大于0'},
+    'leak_multiple': {'label': '漏气倍数', 'range': (0, 10, False, True), 'message': '漏气倍数应在0-10之间'},
+    'density_walls': {'label': '厢体各层密度', 'kind': LAYERS, 'when': PRECOOL},
+    'specific_heat_walls': {'label': '厢体各层比热容', 'kind': LAYERS, 'when': PRECOOL},
+    'thermal_cond_walls': {'label': '厢体各层导热率', 'kind': LAYERS, 'when': WALL_LAYERS},
+    'thickness_walls': {'label': '箱体各层厚度', 'kind': LAYERS, 'when': WALL_LAYERS},
+    # 运行参数
+    'env_temp': {'label': '环境温度'},
+    'chi_temp': {'label': '冷藏温度'},
+    'fro_temp': {'label': '冷冻温度'},
+    'chi_relative_humidity': {'label': '冷藏相对湿度', 'range': (0, 1, True, True), 'message': '冷藏相对湿度应为0-1之间的小数'},
+    'fro_relative_humidity': {'label': '冷冻相对湿度', 'range': (0, 1, True, True), 'message': '冷冻相对湿度应为0-1之间的小数'},
+    'env_relative_humidity': {'label': '环境相对湿度', 'range': (0, 1, True, True), 'message': '环境相对湿度应为0-1之间的小数'},
+    'solar_radiation': {'label': '太阳辐照强度'},
+    'surface_absorptivity': {'label': '车厢吸收率', 'range': (0, 1, True, True), 'message': '吸收率应为0-1之间的小数'},
+    'surface_emissivity': {'label': '车厢发散率', 'range': (0, 1, True, True), 'message': '发射率应为0-1之间的小数'},
+    'radiation_area_ratio': {'label': '辐射面积系数', 'range': (0, 1, True, True), 'message': '辐射面积系数应为0-1之间的小数'},
+    'radiation_time': {'label': '太阳辐射时长', 'range': (0, 24, True, True), 'message': '一天内的辐射时长应为0-24之间的数'},
+    # 货物参数
+    'open_close_frequency': {'label': '开关门频次'},
+    'fro_specific_heat': {'label': '比热容'},
+    'fro_out_temp': {'label': '出库温度'},
+    'fro_load_mass': {'label': '载重量'},
+    'chi_resp_heat': {'label': '呼吸热'},
+    'chi_load_mass': {'label': '载重量'},
+    'cabin_precool_time': {'label': '预冷时长', 'when': PRECOOL},
+    # 高级参数
+    'safety_coeff': {'label': '安全系数', 'range': (1, None, True, True), 'message': '冗余系数应≥1'},
+    'fan_power': {'label': '风机功率'},
+    'fan_time': {'label': '风机时长'},
+    'light_power': {'label': '照明功率'},
+    'light_time': {'label': '照明时长'},
+    'thermal_bridging_coeff': {'label': '热桥系数', 'when': HTC_ADVANCED},
+    'htc': {'label': '车厢导热系数', 'when': HTC_SIMPLE},
+    'beta': {'label': '对流系数'},
+    'diff_insuf_with_inair': {'label': '厢内面气温差'},
+}
+
+
+def _parse_number(value):
+    """把单个输入值解析为浮点数，返回 (数值, 代码)"""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return np.nan, MISSING
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return np.nan, NOT_NUMBER
+    if number != number:  # NaN 视为缺失
+        return np.nan, MISSING
+    return number, VALID
+
+
+def _parse_layers(value):
+    """检查以空格分隔的各层数值，返回代码"""
+    if value is None:
+        return MISSING
+    tokens = str(value).split()
+    if not tokens:
+        return MISSING
+    try:
+        for token in tokens:
+            float(token)
+    except ValueError:
+        return NOT_NUMBER
+    return VALID
+
+
+class InputValidator:
+    """由 INPUT_SCHEMA 编译得到的输入校验器
+
+    编译时把字段声明整理为数组（下限、上限、是否包含端点），并按模式开关缓存参与计算的
+    字段，校验时只检查参与计算的字段。批量校验时每个字段的范围检查是一次数组比较，
+    结果为 (行数, 字段数) 的代码矩阵。GUI、命令行和服务共用模块级的 input_validator。
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.fields = list(schema)
+        self.index = {name: i for i, name in enumerate(self.fields)}
+        self.labels = [spec['label'] for spec in schema.values()]
+        self.kinds = [spec.get('kind', NUMBER) for spec in schema.values()]
+        self.conditions = [spec.get('when', ALWAYS) for spec in schema.values()]
+        self.messages = [spec.get('message') for spec in schema.values()]
+
+        n = len(self.fields)
+        self.low = np.full(n, -np.inf)
+        self.high = np.full(n, np.inf)
+        self.low_inclusive = np.ones(n, dtype=bool)
+        self.high_inclusive = np.ones(n, dtype=bool)
+        for i, spec in enumerate(schema.values()):
+            if 'range' in spec:
+                low, high, low_inclusive, high_inclusive = spec['range']
+                if low is not None:
+                    self.low[i] = low
+                if high is not None:
+                    self.high[i] = high
+                self.low_inclusive[i] = low_inclusive
+                self.high_inclusive[i] = high_inclusive
+
+        self._active_cache = {}
+
+    @staticmethod
+    def _mode_flags(htc_advanced, precool):
+        return {
+            ALWAYS: True,
+            HTC_ADVANCED: htc_advanced,
+            HTC_SIMPLE: not htc_advanced,
+            PRECOOL: precool,
+            WALL_LAYERS: htc_advanced or precool,
+        }
+
+    def active_fields(self, htc_advanced, precool):
+        """当前模式下参与计算的字段序号"""
+        key = (bool(htc_advanced), bool(precool))
+        if key not in self._active_cache:
+            flags = self._mode_flags(*key)
+            self._active_cache[key] = tuple(i for i, condition in enumerate(self.conditions) if flags[condition])
+        return self._active_cache[key]
+
+    def _in_range(self, i, values):
+        """values 中各元素是否在第 i 个字段的取值范围内（values 可以是标量或数组）"""
+        above = values >= self.low[i] if self.low_inclusive[i] else values > self.low[i]
+        below = values <= self.high[i] if self.high_inclusive[i] else values < self.high[i]
+        return above & below
+
+    # ------------------------------------------------------------
+    # 单组输入
+    # ------------------------------------------------------------
+    def check(self, inputs, htc_advanced, precool):
+        """校验单组输入
+
+        输入先按 units.to_engine_units 换算为计算单位，取值范围均按计算单位给出，
+        同一工况无论以何种单位输入，校验结果都相同。
+
+        :return: 字典 字段名 -> 代码，只包含未通过校验的字段
+        """
+        inputs = to_engine_units(inputs)
+        codes = {}
+        for i in self.active_fields(htc_advanced, precool):
+            name = self.fields[i]
+            value = inputs.get(name)
+            if self.kinds[i] == LAYERS:
+                code = _parse_layers(value)
+            else:
+                number, code = _parse_number(value)
+                if code == VALID and not self._in_range(i, number):
+                    code = OUT_OF_RANGE
+            if code != VALID:
+                codes[name] = code
+        return codes
+
+    def validate(self, inputs, htc_advanced, precool):
+        """校验单组输入，返回错误提示列表，全部通过时为空列表"""
+        return [self.message(name, code) for name, code in self.check(inputs, htc_advanced, precool).items()]
+
+    def message(self, name, code):
+        """把字段的校验代码转换为提示文字"""
+        i = self.index[name]
+        if code == MISSING:
+            return f"{self.labels[i]}: 不能为空"
+        if code == NOT_NUMBER:
+            return f"{self.labels[i]}: 必须为有效数字"
+        if code == OUT_OF_RANGE:
+            return self.messages[i] or f"{self.labels[i]}: 超出取值范围"
+        return ""
+
+    # ------------------------------------------------------------
+    # 批量输入
+    # ------------------------------------------------------------
+    def validate_batch(self, columns, htc_advanced, precool):
+        """按列批量校验输入
+
+        :param columns: 字典 字段名 -> 长度相同的一列数值（列表或数组），已换算为计算单位
+                        （见 units.columns_to_engine_units）；数值列中的 NaN 视为缺失，缺少的列视为整列缺失
+        :return: (行数, 字段数) 的 uint8 代码矩阵，列顺序与 self.fields 相同；
+                 不参与计算的字段整列为 VALID。某行全部为 VALID 即可送入计算引擎
+        """
+        rows = len(next(iter(columns.values()))) if columns else 0
+        codes = np.zeros((rows, len(self.fields)), dtype=np.uint8)
+        for i in self.active_fields(htc_advanced, precool):
+            column = columns.get(self.fields[i])
+            if column is None:
+                codes[:, i] = MISSING
+                continue
+            if self.kinds[i] == LAYERS:
+                codes[:, i] = [_parse_layers(value) for value in column]
+                continue
+
+            try:
+                # 数值列直接转换，无需逐个解析
+                values = np.asarray(column, dtype=float)
+                column_codes = np.where(np.isnan(values), MISSING, VALID).astype(np.uint8)
+            except (TypeError, ValueError):
+                parsed = [_parse_number(value) for value in column]
+                values = np.fromiter((number for number, _ in parsed), dtype=float, count=rows)
+                column_codes = np.fromiter((code for _, code in parsed), dtype=np.uint8, count=rows)
+            with np.errstate(invalid='ignore'):
+                out_of_range = (column_codes == VALID) & ~self._in_range(i, values)
+            column_codes[out_of_range] = OUT_OF_RANGE
+            codes[:, i] = column_codes
+        return codes
+
+    def batch_messages(self, codes, row):
+        """批量校验结果中第 row 行的错误提示列表"""
+        return [self.message(self.fields[i], code) for i, code in enumerate(codes[row]) if code != VALID]
+
+
+input_validator = InputValidator(INPUT_SCHEMA)
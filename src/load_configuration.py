@@ -1,28 +1,268 @@
+import hashlib
 import os
+import pickle
 import sys
+import threading
 import toml
 
+from logger_config import setup_logger
 
-def load_config(config_filename:str)->dict:
+logger = setup_logger()
+
+# 配置文件轮询间隔（秒）
+POLL_INTERVAL = 2.0
+# 需要加载的配置文件
+CONFIG_FILES = ("config.toml", "product_config.toml")
+# 打包时生成的配置快照，与配置文件放在同一目录
+SNAPSHOT_FILENAME = "config_snapshot.pkl"
+SNAPSHOT_VERSION = 1
+
+# 已解析的配置文件缓存：路径 -> (文件签名, 解析结果)
+_parsed_cache = {}
+_cache_lock = threading.Lock()
+# 已读取的配置快照，None 表示尚未读取
+_snapshot = None
+
+
+def get_config_path(config_filename: str) -> str:
     """
-    加载配置文件，支持开发环境和 PyInstaller 打包环境。
+    获取配置文件的完整路径，支持开发环境和 PyInstaller 打包环境。
     :param config_filename: 配置文件名（相对于程序根目录）
-    :return: 解析后的配置字典
+    :return: 配置文件路径
     """
     # 动态获取资源路径
     if getattr(sys, 'frozen', False):  # 判断是否为 PyInstaller 打包的可执行文件
         base_path = sys._MEIPASS
         # 打包环境下，config 和 src 同级
-        config_path = os.path.join(base_path, "config", config_filename)
+        return os.path.join(base_path, "config", config_filename)
+    # 开发环境下，config 在 src 目录内部
+    base_path = os.path.abspath(".")
+    return os.path.join(base_path, "src", "config", config_filename)
+
+
+def _file_signature(path: str) -> tuple:
+    """文件签名（修改时间, 大小），用于判断文件是否变化"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _file_digest(path: str) -> str:
+    """文件内容的 SHA-256，用于判断配置文件是否与快照一致"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _load_snapshot() -> dict:
+    """读取打包时生成的配置快照，只在打包环境中使用，读取一次
+
+    :return: 字典 配置文件名 -> {'digest', 'data', 'compiled'}，没有可用快照时为空字典
+    """
+    global _snapshot
+    if _snapshot is not None:
+        return _snapshot
+    snapshot = {}
+    if getattr(sys, 'frozen', False):
+        path = get_config_path(SNAPSHOT_FILENAME)
+        try:
+            with open(path, 'rb') as f:
+                content = pickle.load(f)
+            if content.get('version') == SNAPSHOT_VERSION:
+                snapshot = content['files']
+            else:
+                logger.warning(f"配置快照版本不一致，改为解析配置文件: {path}")
+        except FileNotFoundError:
+            pass
+        except Exception as ex:
+            logger.warning(f"配置快照读取失败，改为解析配置文件: {ex}")
+    _snapshot = snapshot
+    return snapshot
+
+
+def _snapshot_entry(path: str):
+    """配置文件对应的快照条目，文件内容与快照生成时不一致（如安装后被修改）时返回 None"""
+    entry = _load_snapshot().get(os.path.basename(path))
+    if entry is not None and entry['digest'] == _file_digest(path):
+        return entry
+    return None
+
+
+def _parse(path: str) -> tuple:
+    """解析配置文件，签名未变化时直接返回缓存结果
+
+    打包环境中优先使用配置快照中的解析结果，配置文件与快照不一致时再解析 TOML。
+
+    :return: (文件签名, 解析结果)
+    """
+    signature = _file_signature(path)
+    with _cache_lock:
+        cached = _parsed_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached
+
+    entry = _snapshot_entry(path)
+    if entry is not None:
+        data = entry['data']
     else:
-        # 开发环境下，config 在 src 目录内部
-        base_path = os.path.abspath(".")
-        config_path = os.path.join(base_path, "src", "config", config_filename)
+        logger.info(f"正在加载配置文件: {path}")
+        with open(path, 'r', encoding='utf-8') as f:
+            data = toml.load(f)  # 使用 toml.load() 解析文件
+    with _cache_lock:
+        _parsed_cache[path] = (signature, data)
+    return signature, data
 
-    print(f"正在尝试加载配置文件: {config_path}")
 
+def load_config(config_filename:str)->dict:
+    """
+    加载配置文件，支持开发环境和 PyInstaller 打包环境。
+    文件未变化时返回缓存的解析结果，调用方不应修改返回的字典。
+    :param config_filename: 配置文件名（相对于程序根目录）
+    :return: 解析后的配置字典
+    """
+    config_path = get_config_path(config_filename)
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return toml.load(f)  # 使用 toml.load() 解析文件
+        return _parse(config_path)[1]
     except FileNotFoundError:
-        raise SystemExit(f"错误：配置文件未找到，请确认文件路径是否正确：{config_path}")
\ No newline at end of file
+        raise SystemExit(f"错误：配置文件未找到，请确认文件路径是否正确：{config_path}")
+
+
+def build_snapshot(output_path: str, filenames=CONFIG_FILES) -> dict:
+    """校验配置文件并生成配置快照（打包时调用）
+
+    快照中保存各配置文件的内容摘要和解析结果，产品配置同时保存编译好的 ProductCatalog
+    （制冷能力表和拟合曲面均为数组形式），打包后的程序启动时直接读取，不再解析 TOML 和编译产品目录。
+    配置文件解析失败或有产品无法编译时抛出 ValueError。
+
+    :param output_path: 快照文件路径
+    :param filenames: 配置文件名
+    :return: 字典 配置文件名 -> 快照条目
+    """
+    from product_catalog import ProductCatalog
+
+    files = {}
+    for name in filenames:
+        path = get_config_path(name)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = toml.load(f)
+        except (OSError, toml.TomlDecodeError) as ex:
+            raise ValueError(f"配置文件 {name} 解析失败: {ex}") from ex
+
+        compiled = None
+        if name == "product_config.toml":
+            compiled = ProductCatalog(data)
+            if skipped := [model for model in data if model not in compiled.grids]:
+                raise ValueError(f"配置文件 {name} 中的产品无法编译: {', '.join(skipped)}")
+        files[name] = {'digest': _file_digest(path), 'data': data, 'compiled': compiled}
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'wb') as f:
+        pickle.dump({'version': SNAPSHOT_VERSION, 'files': files}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    logger.info(f"已生成配置快照: {output_path}")
+    return files
+
+
+def diff_tables(old: dict, new: dict) -> dict:
+    """比较两份配置的顶层表（如产品型号）
+
+    :return: {'added': 新增的键, 'removed': 删除的键, 'changed': 内容变化的键}，值均为集合
+    """
+    old_keys, new_keys = set(old), set(new)
+    return {
+        'added': new_keys - old_keys,
+        'removed': old_keys - new_keys,
+        'changed': {key for key in old_keys & new_keys if old[key] != new[key]},
+    }
+
+
+class ConfigManager:
+    """配置文件热更新管理
+
+    通过轮询文件修改时间检测变化（不依赖任何平台相关的文件监听机制），只重新解析发生
+    变化的文件，并与旧内容逐个顶层表比较。新的解析结果整体替换旧结果（单次引用赋值，
+    读取方要么拿到旧配置、要么拿到新配置，不会看到更新到一半的内容），随后把差异通知
+    订阅者，由订阅者只清除与变化的产品相关的缓存。
+
+    get() 返回的字典应视为只读快照，需要时每次重新调用 get() 获取最新配置。
+    """
+
+    def __init__(self, filenames=CONFIG_FILES, poll_interval=POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._paths = {name: get_config_path(name) for name in filenames}
+        self._signatures = {}
+        self._data = {}
+        self._subscribers = {name: [] for name in filenames}
+        self._poll_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        for name in filenames:
+            self._signatures[name], self._data[name] = _parse(self._paths[name])
+
+    def get(self, filename: str) -> dict:
+        """获取配置文件当前的解析结果"""
+        return self._data[filename]
+
+    def compiled(self, filename: str):
+        """配置快照中与当前配置对应的编译结果（如产品配置的 ProductCatalog），没有时返回 None"""
+        entry = _load_snapshot().get(filename)
+        if entry is not None and entry['data'] is self._data[filename]:
+            return entry['compiled']
+        return None
+
+    def subscribe(self, filename: str, callback):
+        """订阅配置文件变化，回调参数为 (新配置, diff_tables 的比较结果)"""
+        self._subscribers[filename].append(callback)
+
+    def poll(self) -> list:
+        """检查一次所有配置文件，重新加载发生变化的文件
+
+        :return: 本次重新加载的文件名列表
+        """
+        reloaded = []
+        with self._poll_lock:
+            for name, path in self._paths.items():
+                try:
+                    signature = _file_signature(path)
+                except OSError:
+                    continue  # 编辑器保存时文件可能短暂不存在
+                if signature == self._signatures[name]:
+                    continue
+                try:
+                    signature, data = _parse(path)
+                except (OSError, toml.TomlDecodeError) as ex:
+                    # 文件可能正在写入，保留旧配置，下次文件变化时再试
+                    logger.warning(f"配置文件 {name} 解析失败，继续使用旧配置: {ex}")
+                    self._signatures[name] = signature
+                    continue
+
+                diff = diff_tables(self._data[name], data)
+                self._signatures[name] = signature
+                self._data[name] = data
+                reloaded.append(name)
+                if not any(diff.values()):
+                    continue
+                logger.info(f"配置文件 {name} 已更新：新增 {sorted(diff['added'])}，"
+                            f"删除 {sorted(diff['removed'])}，修改 {sorted(diff['changed'])}")
+                for callback in self._subscribers[name]:
+                    try:
+                        callback(data, diff)
+                    except Exception as ex:
+                        logger.error(f"配置文件 {name} 更新回调执行失败: {ex}", exc_info=True)
+        return reloaded
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.poll()
+
+    def start(self):
+        """启动后台轮询线程"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="config_watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """停止后台轮询线程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
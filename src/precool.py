@@ -0,0 +1,155 @@
+import numpy as np
+
+from logger_config import setup_logger
+
+logger = setup_logger()
+
+# 每个厢体截面在厚度方向上的网格总数
+WALL_CELLS = 60
+# 预冷过程的时间步数
+PRECOOL_STEPS = 400
+# 内表面温度与其稳态值之差小于该值时视为预冷完成，单位 K
+SETPOINT_TOLERANCE = 0.5
+
+
+def discretize_layups(layups, cells=WALL_CELLS):
+    """把多组多层壁面离散为相同数量的有限体积网格
+
+    每层按厚度比例分配网格，且至少分得一个网格，因此层数不同的壁面也能组成同一批次的数组。
+
+    :param layups: 壁面列表，每个壁面为 [(厚度 m, 密度 kg/m³, 比热容 J/kg·K, 导热系数 W/m·K), ...]，从内到外
+    :param cells: 每个壁面的网格总数
+    :return: (网格厚度, 导热系数, 单位面积热容) 三个形状为 (批次, 网格数) 的数组
+    """
+    dx = np.empty((len(layups), cells))
+    k = np.empty_like(dx)
+    heat_capacity = np.empty_like(dx)
+    for b, layers in enumerate(layups):
+        if len(layers) > cells:
+            raise ValueError(f"壁面层数 {len(layers)} 超过网格总数 {cells}")
+        thickness = np.array([layer[0] for layer in layers], dtype=float)
+        if np.any(thickness <= 0):
+            raise ValueError("厢体单层材料厚度必须大于零")
+        # 按厚度比例分配网格数，余下的网格依次分给最厚的层
+        n = np.maximum(1, np.floor(thickness / thickness.sum() * cells).astype(int))
+        while n.sum() < cells:
+            n[np.argmax(thickness / n)] += 1
+        while n.sum() > cells:
+            n[np.argmax(np.where(n > 1, n, 0))] -= 1
+        start = 0
+        for (t, rho, cp, cond), count in zip(layers, n):
+            dx[b, start:start + count] = t / count
+            k[b, start:start + count] = cond
+            heat_capacity[b, start:start + count] = rho * cp * t / count
+            start += count
+    return dx, k, heat_capacity
+
+
+def thomas_factor(lower, diag, upper):
+    """三对角矩阵的 Thomas 分解，同一矩阵多次求解时只需分解一次
+
+    所有参数形状为 (n, 批次)，lower[0] 与 upper[-1] 不参与计算。
+    :return: (消元后的上对角系数, 消元后主对角元的倒数)
+    """
+    n = diag.shape[0]
+    c = np.empty_like(diag)
+    m_inv = np.empty_like(diag)
+    m_inv[0] = 1 / diag[0]
+    c[0] = upper[0] * m_inv[0]
+    for i in range(1, n):
+        m_inv[i] = 1 / (diag[i] - lower[i] * c[i - 1])
+        c[i] = upper[i] * m_inv[i]
+    return c, m_inv
+
+
+def thomas_solve(lower, factor, rhs):
+    """利用 thomas_factor 的分解结果，同时求解一批三对角方程组（形状 (n, 批次)）"""
+    c, m_inv = factor
+    n = rhs.shape[0]
+    x = np.empty_like(rhs)
+    x[0] = rhs[0] * m_inv[0]
+    for i in range(1, n):
+        x[i] = (rhs[i] - lower[i] * x[i - 1]) * m_inv[i]
+    for i in range(n - 2, -1, -1):
+        x[i] -= c[i] * x[i + 1]
+    return x
+
+
+def simulate_precool(layups, T_env, T_set, h_in, h_out, duration, steps=PRECOOL_STEPS, cells=WALL_CELLS,
+                     tolerance=SETPOINT_TOLERANCE):
+    """一维有限体积法计算多层壁面预冷过程的瞬态导热
+
+    壁面初始温度均为环境温度，t=0 起厢内空气保持设定温度，外表面与环境对流换热。
+    时间方向采用隐式欧拉格式，三对角矩阵只分解一次，每个时间步对整批壁面做一次向量化回代。
+
+    :param layups: 壁面列表，格式见 discretize_layups
+    :param T_env: 环境温度 ℃，标量或长度为批次数的数组
+    :param T_set: 设定温度 ℃，标量或数组
+    :param h_in: 内表面换热系数 W/m²·K，标量或数组
+    :param h_out: 外表面换热系数 W/m²·K，标量或数组
+    :param duration: 模拟时长 s
+    :return: 字典，time 为时间点 (steps+1,)，q_in 为内表面热流 W/m² (批次, steps+1)，
+             q_steady 为稳态内表面热流 W/m² (批次,)，time_to_setpoint 为内表面温度降至
+             其稳态值 tolerance 以内所需时间 s (批次,)，模拟时长内未达到时为 NaN
+    """
+    dx, k, heat_capacity = discretize_layups(layups, cells)
+    # 内部按 (网格, 批次) 排列，使每个网格上的运算在内存中连续
+    dx, k, heat_capacity = dx.T.copy(), k.T.copy(), heat_capacity.T.copy()
+    batch = dx.shape[1]
+    T_env = np.broadcast_to(np.asarray(T_env, dtype=float), (batch,))
+    T_set = np.broadcast_to(np.asarray(T_set, dtype=float), (batch,))
+    h_in = np.broadcast_to(np.asarray(h_in, dtype=float), (batch,))
+    h_out = np.broadcast_to(np.asarray(h_out, dtype=float), (batch,))
+
+    # 网格之间以及网格到内外空气的热导，单位 W/m²·K
+    g = 1 / (dx[:-1] / (2 * k[:-1]) + dx[1:] / (2 * k[1:]))
+    g_in = 1 / (1 / h_in + dx[0] / (2 * k[0]))
+    g_out = 1 / (1 / h_out + dx[-1] / (2 * k[-1]))
+
+    dt = duration / steps
+    lower = np.zeros_like(dx)
+    upper = np.zeros_like(dx)
+    lower[1:] = -g
+    upper[:-1] = -g
+    diag = heat_capacity / dt
+    diag[:-1] += g
+    diag[1:] += g
+    diag[0] += g_in
+    diag[-1] += g_out
+    # 系数矩阵不随时间变化，只分解一次
+    factor = thomas_factor(lower, diag, upper)
+
+    boundary = np.zeros_like(dx)
+    boundary[0] = g_in * T_set
+    boundary[-1] = g_out * T_env
+    capacity_rate = heat_capacity / dt
+
+    R_total = 1 / h_in + np.sum(dx / k, axis=0) + 1 / h_out
+    q_steady = (T_env - T_set) / R_total
+
+    T = np.repeat(T_env[None, :], cells, axis=0)
+    q_in = np.empty((batch, steps + 1))
+    q_in[:, 0] = g_in * (T[0] - T_set)
+    time_to_setpoint = np.full(batch, np.nan)
+    for step in range(1, steps + 1):
+        T = thomas_solve(lower, factor, capacity_rate * T + boundary)
+        q_in[:, step] = g_in * (T[0] - T_set)
+        # 内表面温度与其稳态值之差 = (q_in - q_steady) / h_in
+        reached = np.isnan(time_to_setpoint) & ((q_in[:, step] - q_steady) / h_in <= tolerance)
+        time_to_setpoint[reached] = step * dt
+
+    return {
+        'time': np.linspace(0, duration, steps + 1),
+        'q_in': q_in,
+        'q_steady': q_steady,
+        'time_to_setpoint': time_to_setpoint,
+    }
+
+
+def average_precool_flux(result):
+    """预冷时长内扣除稳态导热后的平均内表面热流 W/m²，即壁面蓄热释放引起的附加负荷"""
+    excess = result['q_in'] - result['q_steady'][:, None]
+    # 梯形积分
+    dt = result['time'][1] - result['time'][0]
+    energy = dt * (excess[:, 1:] + excess[:, :-1]).sum(axis=1) / 2
+    return energy / result['time'][-1]
@@ -0,0 +1,394 @@
+import numpy as np
+from collections import namedtuple
+
+from logger_config import setup_logger
+
+logger = setup_logger()
+
+# 插值点所在网格存在不可用工况时的处理方式
+NEAREST = 'nearest'          # 取距离最近的可用工况点的制冷能力
+UNSUPPORTED = 'unsupported'  # 视为不支持，结果为 NaN
+
+# 制冷能力的计算方式
+TABLE = 'table'      # 按制冷能力表双线性插值（精确）
+SURFACE = 'surface'  # 按拟合的多项式曲面计算，全部产品一次矩阵乘法
+
+REQUIRED_FIELDS = ("env_temps", "target_temps", "cooling_capacity")
+
+# 拟合曲面的默认总次数，以及温度的归一化尺度 ℃（使多项式各项量级接近，改善最小二乘的条件数）
+SURFACE_DEGREE = 3
+TEMP_SCALE = 50.0
+# 拟合曲面最大相对误差超过该值时记录警告
+SURFACE_WARN_ERROR = 0.05
+# 产品适用车厢宽度与实际车厢宽度允许的偏差 m，界面中由 config.toml 的 width_tolerance 给出
+WIDTH_TOLERANCE = 0.05
+
+# 目录内容的快照，更新时整体替换
+#   models：产品型号列表（配置文件中的顺序），position：型号 -> 序号
+#   grids、specs、surfaces：型号 -> CapacityGrid、产品配置、CapacitySurface
+#   coefficients：曲面系数矩阵 (产品数, 项数)；bounds：(产品数, 4) 的环境温度下限、上限，目标温度下限、上限
+#   width_low、width_high：按下限升序排列的适用车厢宽度范围 m；width_order：与之对应的产品序号；
+#   unsized：未给出宽度的产品序号
+_CatalogState = namedtuple('_CatalogState', ['models', 'position', 'grids', 'specs', 'surfaces', 'coefficients',
+                                             'bounds', 'width_low', 'width_high', 'width_order', 'unsized'])
+
+
+def _to_capacity(value):
+    """把配置中的制冷能力转换为浮点数，0、空值和 "NaN" 等表示该工况不可用，返回 NaN"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return np.nan
+    return value if value > 0 else np.nan
+
+
+def _to_width(value):
+    """把配置中的适用车厢宽度转换为范围 (下限, 上限) m
+
+    width 可以是单个宽度（范围的上下限相同）或 [下限, 上限]，缺失或无效时返回 (NaN, NaN)。
+    """
+    if isinstance(value, (list, tuple)):
+        if len(value) != 2:
+            return np.nan, np.nan
+        low, high = value
+    else:
+        low = high = value
+    try:
+        low, high = float(low), float(high)
+    except (TypeError, ValueError):
+        return np.nan, np.nan
+    return (low, high) if 0 < low <= high else (np.nan, np.nan)
+
+
+class CapacityGrid:
+    """单个产品编译后的制冷能力表
+
+    cooling_capacity 中的 0 或 NaN 表示该 (环境温度, 目标温度) 组合不可用，编译时转为有效性掩码；
+    同时预先算出每个插值网格四个角点是否都可用，以及每个节点最近的可用节点，查询时只需
+    数组索引，不再逐点判断。
+    """
+
+    def __init__(self, specs):
+        self.env_temps = np.asarray(specs["env_temps"], dtype=float)
+        self.target_temps = np.asarray(specs["target_temps"], dtype=float)
+        capacity = np.array([[_to_capacity(v) for v in row] for row in specs["cooling_capacity"]], dtype=float)
+        if capacity.shape != (len(self.env_temps), len(self.target_temps)):
+            raise ValueError(f"制冷能力表的形状 {capacity.shape} 与环境温度、目标温度列表的长度不一致")
+        if np.any(np.diff(self.env_temps) <= 0) or np.any(np.diff(self.target_temps) <= 0):
+            raise ValueError("环境温度和目标温度列表必须严格升序")
+
+        self.valid = ~np.isnan(capacity)
+        # 不可用节点填 0，保证双线性插值的乘加不受 NaN 影响，是否可用由掩码决定
+        self.capacity = np.where(self.valid, capacity, 0.0)
+
+        # cell_valid[i, j]：以 (i, j) 为左下角的插值网格四个角点是否都可用
+        v = self.valid
+        i1 = np.minimum(np.arange(v.shape[0]) + 1, v.shape[0] - 1)
+        j1 = np.minimum(np.arange(v.shape[1]) + 1, v.shape[1] - 1)
+        self.cell_valid = v & v[i1, :] & v[:, j1] & v[i1][:, j1]
+
+        # nearest_valid[i, j]：按温度距离离节点 (i, j) 最近的可用节点的制冷能力，无可用节点时为 NaN
+        env_grid, target_grid = np.meshgrid(self.env_temps, self.target_temps, indexing='ij')
+        self.nearest_valid = np.full(v.shape, np.nan)
+        if v.any():
+            distance = ((env_grid[..., None] - env_grid[v]) ** 2 + (target_grid[..., None] - target_grid[v]) ** 2)
+            self.nearest_valid = capacity[v][np.argmin(distance, axis=-1)]
+
+    @property
+    def supported(self):
+        """是否存在可用工况"""
+        return bool(self.valid.any())
+
+    @staticmethod
+    def _locate(grid, x):
+        """x 在 grid 中所在区间的左端点序号和插值权重，超出范围时取边界值"""
+        x = np.clip(x, grid[0], grid[-1])
+        i = np.clip(np.searchsorted(grid, x, side='left') - 1, 0, max(len(grid) - 2, 0))
+        j = np.minimum(i + 1, len(grid) - 1)
+        span = grid[j] - grid[i]
+        w = np.where(span > 0, (x - grid[i]) / np.where(span > 0, span, 1), 0.0)
+        return i, j, w
+
+    def evaluate(self, env_temp, target_temp, fallback=NEAREST):
+        """计算任意多个工况点的制冷能力
+
+        四个角点都可用时双线性插值；否则按 fallback 取最近可用节点的值或返回 NaN。
+
+        :param env_temp, target_temp: 环境温度和目标温度 ℃，可广播的数值或数组
+        :return: 制冷能力 W，形状为两个输入广播后的形状，不支持的工况为 NaN
+        """
+        env_temp, target_temp = np.broadcast_arrays(np.asarray(env_temp, dtype=float), np.asarray(target_temp, dtype=float))
+        i0, i1, wi = self._locate(self.env_temps, env_temp)
+        j0, j1, wj = self._locate(self.target_temps, target_temp)
+        c = self.capacity
+        top = c[i0, j0] + (c[i0, j1] - c[i0, j0]) * wj
+        bottom = c[i1, j0] + (c[i1, j1] - c[i1, j0]) * wj
+        result = top + (bottom - top) * wi
+
+        if fallback == NEAREST:
+            # 查询点最近的节点，再取该节点最近的可用节点
+            ni = np.where(wi < 0.5, i0, i1)
+            nj = np.where(wj < 0.5, j0, j1)
+            replacement = self.nearest_valid[ni, nj]
+        elif fallback == UNSUPPORTED:
+            replacement = np.nan
+        else:
+            raise ValueError(f"未知的不可用工况处理方式: {fallback}")
+        return np.where(self.cell_valid[i0, j0], result, replacement)
+
+
+def surface_terms(degree):
+    """总次数不超过 degree 的二元多项式各项的指数 (环境温度次数, 目标温度次数)"""
+    return [(i, total - i) for total in range(degree + 1) for i in range(total, -1, -1)]
+
+
+def surface_basis(env_temp, target_temp, degree=SURFACE_DEGREE):
+    """多项式曲面的基函数值
+
+    :return: 形状为 (*工况形状, 项数) 的数组，与 CapacitySurface.coefficients 做内积即得制冷能力
+    """
+    x = np.asarray(env_temp, dtype=float) / TEMP_SCALE
+    y = np.asarray(target_temp, dtype=float) / TEMP_SCALE
+    x, y = np.broadcast_arrays(x, y)
+    x_powers = [np.ones_like(x)]
+    y_powers = [np.ones_like(y)]
+    for _ in range(degree):
+        x_powers.append(x_powers[-1] * x)
+        y_powers.append(y_powers[-1] * y)
+    return np.stack([x_powers[i] * y_powers[j] for i, j in surface_terms(degree)], axis=-1)
+
+
+class CapacitySurface:
+    """单个产品制冷能力表的多项式拟合曲面
+
+    只用可用工况的节点做最小二乘拟合，可用节点数少于项数时自动降低次数；系数按 degree 次的
+    全部项存放（降次后高次项系数为 0），使不同产品的系数可以拼成一个矩阵。拟合误差统计：
+    rms_error、max_error（W）和 max_relative_error（相对于节点制冷能力）。
+    """
+
+    def __init__(self, grid, degree=SURFACE_DEGREE):
+        self.degree = degree
+        self.env_range = (grid.env_temps[0], grid.env_temps[-1])
+        self.target_range = (grid.target_temps[0], grid.target_temps[-1])
+
+        env_grid, target_grid = np.meshgrid(grid.env_temps, grid.target_temps, indexing='ij')
+        env, target = env_grid[grid.valid], target_grid[grid.valid]
+        capacity = grid.capacity[grid.valid]
+
+        fit_degree = degree
+        while fit_degree > 0 and len(capacity) < len(surface_terms(fit_degree)):
+            fit_degree -= 1
+        self.fit_degree = fit_degree
+        basis = surface_basis(env, target, fit_degree)
+        coefficients = np.linalg.lstsq(basis, capacity, rcond=None)[0]
+        self.coefficients = np.zeros(len(surface_terms(degree)))
+        self.coefficients[:len(coefficients)] = coefficients  # 低次项在前，直接对齐
+
+        residual = basis @ coefficients - capacity
+        self.rms_error = float(np.sqrt(np.mean(residual ** 2)))
+        self.max_error = float(np.max(np.abs(residual)))
+        self.max_relative_error = float(np.max(np.abs(residual) / capacity))
+
+    def evaluate(self, env_temp, target_temp):
+        """计算任意多个工况点的制冷能力 W，超出制冷能力表温度范围的工况为 NaN"""
+        env_temp, target_temp = np.broadcast_arrays(np.asarray(env_temp, dtype=float), np.asarray(target_temp, dtype=float))
+        result = surface_basis(env_temp, target_temp, self.degree) @ self.coefficients
+        inside = ((env_temp >= self.env_range[0]) & (env_temp <= self.env_range[1]) &
+                  (target_temp >= self.target_range[0]) & (target_temp <= self.target_range[1]))
+        return np.where(inside, result, np.nan)
+
+
+class ProductCatalog:
+    """编译后的产品目录
+
+    加载时把每个产品的制冷能力表编译为 CapacityGrid，缺少必要字段或没有任何可用工况的产品
+    会被跳过。配置文件更新时 update() 只重新编译新增和修改的产品，编译完成后以一次赋值整体
+    替换目录内容，计算线程读取时不会看到更新到一半的目录。
+
+    surface_degree 不为 None 时同时为每个产品拟合 CapacitySurface，全部产品的系数拼成
+    (产品数, 项数) 的矩阵，按曲面计算整个目录的制冷能力只需一次矩阵乘法。曲面只保证在
+    制冷能力表的温度范围内可用，表内不可用工况附近的值为拟合外推，精度见各产品的拟合误差。
+
+    产品按 width 字段（适用车厢宽度 m，单个宽度或 [下限, 上限]）的下限建立升序索引，
+    models_for_width() 以二分查找取出适用范围（放宽 width_tolerance）覆盖车厢宽度的产品，
+    推荐时先按车厢宽度筛选再插值。
+    """
+
+    def __init__(self, product_info, surface_degree=SURFACE_DEGREE, width_tolerance=WIDTH_TOLERANCE):
+        self.surface_degree = surface_degree
+        self.width_tolerance = width_tolerance
+        empty = np.empty(0)
+        self._state = _CatalogState([], {}, {}, {}, {}, None, None, empty, empty, np.empty(0, dtype=int), np.empty(0, dtype=int))
+        self.update(product_info)
+
+    @property
+    def models(self):
+        return self._state.models
+
+    @property
+    def grids(self):
+        return self._state.grids
+
+    @property
+    def specs(self):
+        return self._state.specs
+
+    @property
+    def surfaces(self):
+        return self._state.surfaces
+
+    def fit_statistics(self):
+        """各产品拟合曲面的误差统计
+
+        :return: 字典 型号 -> {'degree', 'rms_error', 'max_error', 'max_relative_error'}
+        """
+        state = self._state
+        surfaces = state.surfaces
+        return {
+            model: {
+                'degree': surfaces[model].fit_degree,
+                'rms_error': surfaces[model].rms_error,
+                'max_error': surfaces[model].max_error,
+                'max_relative_error': surfaces[model].max_relative_error,
+            }
+            for model in state.models if model in surfaces
+        }
+
+    def update(self, product_info, diff=None):
+        """按新的产品配置更新目录
+
+        :param product_info: 产品配置字典，键为产品型号
+        :param diff: load_configuration.diff_tables 的比较结果，None 时重新编译全部产品
+        """
+        if diff is None:
+            names = set(product_info)
+            grids, specs, surfaces = {}, {}, {}
+        else:
+            names = (diff['added'] | diff['changed']) & set(product_info)
+            grids, specs, surfaces = dict(self.grids), dict(self.specs), dict(self.surfaces)
+            for name in diff['removed'] | diff['changed']:
+                grids.pop(name, None)
+                specs.pop(name, None)
+                surfaces.pop(name, None)
+
+        for name in names:
+            product = product_info[name]
+            if not isinstance(product, dict) or any(field not in product for field in REQUIRED_FIELDS):
+                logger.warning(f"产品 {name} 缺少必要字段，跳过")
+                continue
+            try:
+                grid = CapacityGrid(product)
+            except ValueError as ex:
+                logger.warning(f"产品 {name} 的制冷能力表无效，跳过: {ex}")
+                continue
+            if not grid.supported:
+                logger.warning(f"产品 {name} 没有任何可用工况，跳过")
+                continue
+            grids[name] = grid
+            specs[name] = product
+            if self.surface_degree is not None:
+                surfaces[name] = CapacitySurface(grid, self.surface_degree)
+                if surfaces[name].max_relative_error > SURFACE_WARN_ERROR:
+                    logger.warning(f"产品 {name} 制冷能力曲面拟合的最大相对误差为 "
+                                   f"{surfaces[name].max_relative_error:.1%}")
+
+        # 保持配置文件中的产品顺序
+        models = [name for name in product_info if name in grids]
+        coefficients = bounds = None
+        if self.surface_degree is not None:
+            n_terms = len(surface_terms(self.surface_degree))
+            coefficients = np.array([surfaces[name].coefficients for name in models]).reshape(len(models), n_terms)
+            bounds = np.array([surfaces[name].env_range + surfaces[name].target_range for name in models]).reshape(len(models), 4)
+
+        # 按适用车厢宽度排序的索引，未给出宽度的产品单独记录
+        widths = np.array([_to_width(specs[name].get('width')) for name in models], dtype=float).reshape(len(models), 2)
+        sized = np.flatnonzero(~np.isnan(widths[:, 0]))
+        width_order = sized[np.argsort(widths[sized, 0], kind='stable')]
+        unsized = np.flatnonzero(np.isnan(widths[:, 0]))
+        if len(unsized):
+            logger.warning(f"{len(unsized)} 个产品未给出适用车厢宽度，按车厢宽度筛选时始终保留")
+
+        self._state = _CatalogState(models, {name: i for i, name in enumerate(models)}, grids, specs, surfaces,
+                                    coefficients, bounds, widths[width_order, 0], widths[width_order, 1],
+                                    width_order, unsized)
+
+    def models_for_width(self, box_width, tolerance=None):
+        """适用于该车厢宽度的产品型号（配置文件中的顺序）
+
+        产品适用宽度范围上下各放宽 tolerance 后覆盖 box_width 即视为适用；未给出宽度的产品始终保留。
+
+        :param box_width: 车厢宽度 m，None 时返回全部产品
+        :param tolerance: 允许的偏差 m，默认为 width_tolerance
+        """
+        state = self._state
+        if box_width is None:
+            return state.models
+        tolerance = self.width_tolerance if tolerance is None else tolerance
+        # 加一个很小的余量，避免 2.3 - 2.2 之类的浮点误差把边界上的产品排除
+        eps = 1e-9
+        # 下限不超过车厢宽度的产品是按下限排序后的前缀，其中再取上限不低于车厢宽度的产品
+        count = np.searchsorted(state.width_low, box_width + tolerance + eps, side='right')
+        covering = state.width_order[:count][state.width_high[:count] >= box_width - tolerance - eps]
+        index = np.sort(np.concatenate([covering, state.unsized]))
+        return [state.models[i] for i in index.tolist()]
+
+    def attributes(self, name, models=None):
+        """产品的数值属性（如 price），缺少该字段或不是数值的产品为 NaN
+
+        :return: 长度为产品数的数组
+        """
+        specs = self.specs
+        models = self.models if models is None else models
+        values = np.full(len(models), np.nan)
+        for i, model in enumerate(models):
+            try:
+                values[i] = float(specs[model][name])
+            except (KeyError, TypeError, ValueError):
+                pass
+        return values
+
+    def __len__(self):
+        return len(self.models)
+
+    def __contains__(self, model):
+        return model in self.grids
+
+    def capacity(self, model, env_temp, target_temp, fallback=NEAREST):
+        """单个产品在任意多个工况点的制冷能力，见 CapacityGrid.evaluate"""
+        return self.grids[model].evaluate(env_temp, target_temp, fallback)
+
+    def capacities(self, env_temp, target_temp, fallback=NEAREST, models=None, method=TABLE):
+        """多个产品在同一组工况点的制冷能力
+
+        :param models: 产品型号列表，None 时为全部产品
+        :param method: TABLE 按制冷能力表插值；SURFACE 按拟合曲面计算（fallback 不起作用）
+        :return: 形状为 (产品数, *工况形状) 的数组，不支持的工况为 NaN
+        """
+        state = self._state
+        shape = np.broadcast_shapes(np.shape(env_temp), np.shape(target_temp))
+        if method == SURFACE:
+            if state.coefficients is None:
+                raise ValueError("产品目录未拟合制冷能力曲面（surface_degree 为 None）")
+            coefficients, bounds = state.coefficients, state.bounds
+            if models is not None:
+                index = np.array([state.position[model] for model in models], dtype=int)
+                coefficients, bounds = coefficients[index], bounds[index]
+            return self._evaluate_surfaces(coefficients, bounds, env_temp, target_temp, shape)
+        if method != TABLE:
+            raise ValueError(f"未知的制冷能力计算方式: {method}")
+
+        models = state.models if models is None else models
+        if not models:
+            return np.empty((0,) + shape)
+        return np.stack([state.grids[model].evaluate(env_temp, target_temp, fallback) for model in models])
+
+    def _evaluate_surfaces(self, coefficients, bounds, env_temp, target_temp, shape):
+        """全部产品的曲面在同一组工况点求值：(产品数, 项数) @ (项数, 工况数)"""
+        env_temp = np.broadcast_to(np.asarray(env_temp, dtype=float), shape).reshape(-1)
+        target_temp = np.broadcast_to(np.asarray(target_temp, dtype=float), shape).reshape(-1)
+        result = coefficients @ surface_basis(env_temp, target_temp, self.surface_degree).T
+        # 超出各产品制冷能力表温度范围的工况不外推
+        outside = ((env_temp < bounds[:, 0:1]) | (env_temp > bounds[:, 1:2]) |
+                   (target_temp < bounds[:, 2:3]) | (target_temp > bounds[:, 3:4]))
+        result[outside] = np.nan
+        return result.reshape((len(coefficients),) + shape)
@@ -1,13 +1,33 @@
+import heapq
 import logging
 import flet as ft
-from bisect import bisect_left
+import numpy as np
+
+from product_catalog import NEAREST, TABLE, CapacityGrid, ProductCatalog
 logger = logging.getLogger(__name__)
 
+# 推荐表格每页显示的产品数量
+PAGE_SIZE = 10
+# "同时满足"表格显示的排名靠前的产品数量
+RECOMMEND_TOP_K = 5 * PAGE_SIZE
+
+# 可参与排名的产品属性（product_config.toml 中的可选字段）：机组重量 kg、价格、功耗 W，均为越小越好
+RANK_ATTRIBUTES = ('weight', 'price', 'power')
+# 默认只按能力裕量排名
+DEFAULT_RANK_WEIGHTS = {'margin': 1.0}
+
+# 多机组组合的优化目标：capacity 为组合的冷藏、冷冻制冷能力之和最小（最不过量），其余为产品属性之和最小
+COMBINATION_OBJECTIVES = ('capacity',) + RANK_ATTRIBUTES
+# 组合中机组数量的默认上限
+MAX_UNITS = 2
+
 
 def interpolate_2d(matrix: list, env_temps: list, target_temps: list, env_temp_val: float, chi_temp_val: float,
-                    fro_temp_val: float) -> tuple:
+                    fro_temp_val: float, fallback: str = NEAREST) -> tuple:
     """二维线性插值函数，用于获取指定环境温度和目标温度下的冷藏与冷冻能力
 
+    制冷能力表中的 0 或 NaN 表示该工况不可用，不参与插值，处理方式见 CapacityGrid.evaluate。
+
     Parameters
     ----------
     matrix : list
@@ -22,124 +42,69 @@ def interpolate_2d(matrix: list, env_temps: list, target_temps: list, env_temp_v
         冷藏目标温度值
     fro_temp_val : float
         冷冻目标温度值
+    fallback : str
+        插值网格中存在不可用工况时的处理方式，NEAREST 或 UNSUPPORTED
 
     Returns
     -------
     tuple
-        (chilled_capacity, frozen_capacity) 插值结果或 None
+        (chilled_capacity, frozen_capacity) 插值结果，不支持的工况为 None
     """
-    def find_index(temp_list, value):
-        idx = bisect_left(temp_list, value)
-        if idx == 0:
-            return 0, 0
-        elif idx == len(temp_list):
-            return len(temp_list) - 1, len(temp_list) - 1
-        else:
-            return idx - 1, idx
-
-    def interpolate(x, x0, x1, y0, y1):
-        if x0 == x1:
-            return y0
-        return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
-
     try:
-        env_idx_low, env_idx_high = find_index(env_temps, env_temp_val)
-        env_low = env_temps[env_idx_low]
-        env_high = env_temps[env_idx_high]
-
-        chi_idx_low, chi_idx_high = find_index(target_temps, chi_temp_val)
-        temp_low = target_temps[chi_idx_low]
-        temp_high = target_temps[chi_idx_high]
-
-        fro_idx_low, fro_idx_high = find_index(target_temps, fro_temp_val)
-        fro_temp_low = target_temps[fro_idx_low]
-        fro_temp_high = target_temps[fro_idx_high]
-
-        def get_value(i, j):
-            if i < len(matrix) and j < len(matrix[i]):
-                val = matrix[i][j]
-                return float(val) if val not in ("", None) else None
-            return None
-
-        q11 = get_value(env_idx_low, chi_idx_low)
-        q12 = get_value(env_idx_low, chi_idx_high)
-        q21 = get_value(env_idx_high, chi_idx_low)
-        q22 = get_value(env_idx_high, chi_idx_high)
-
-        if None not in (q11, q12, q21, q22):
-            top = interpolate(chi_temp_val, temp_low, temp_high, q11, q12)
-            bottom = interpolate(chi_temp_val, temp_low, temp_high, q21, q22)
-            chilled_capacity = interpolate(env_temp_val, env_low, env_high, top, bottom)
-        else:
-            candidates = [x for x in [q11, q12, q21, q22] if x is not None]
-            chilled_capacity = candidates[0] if candidates else None
-
-        q11_f = get_value(env_idx_low, fro_idx_low)
-        q12_f = get_value(env_idx_low, fro_idx_high)
-        q21_f = get_value(env_idx_high, fro_idx_low)
-        q22_f = get_value(env_idx_high, fro_idx_high)
-
-        if None not in (q11_f, q12_f, q21_f, q22_f):
-            top_f = interpolate(fro_temp_val, fro_temp_low, fro_temp_high, q11_f, q12_f)
-            bottom_f = interpolate(fro_temp_val, fro_temp_low, fro_temp_high, q21_f, q22_f)
-            frozen_capacity = interpolate(env_temp_val, env_low, env_high, top_f, bottom_f)
-        else:
-            candidates_f = [x for x in [q11_f, q12_f, q21_f, q22_f] if x is not None]
-            frozen_capacity = candidates_f[0] if candidates_f else None
-
-        return chilled_capacity, frozen_capacity
-
+        grid = CapacityGrid({"env_temps": env_temps, "target_temps": target_temps, "cooling_capacity": matrix})
+        chilled_capacity, frozen_capacity = grid.evaluate(env_temp_val, [chi_temp_val, fro_temp_val], fallback)
     except Exception as e:
         logger.error(f"插值过程中发生错误：{str(e)}", exc_info=True)
         return None, None
+    return (None if np.isnan(chilled_capacity) else float(chilled_capacity),
+            None if np.isnan(frozen_capacity) else float(frozen_capacity))
 
 
-def update_recommendations(chi_load, fro_load, result_output_tabs, env_temp, chi_temp, fro_temp, product_info, page):
-    chi_load = float(chi_load or 0)
-    fro_load = float(fro_load or 0)
+def find_qualified_products(chi_load: float, fro_load: float, env_temp_val: float, chi_temp_val: float,
+                            fro_temp_val: float, product_info, method: str = TABLE, box_width: float = None) -> tuple:
+    """根据冷藏、冷冻负荷筛选满足要求的产品
 
-    table_chilled_only = result_output_tabs.tabs[0].content
-    table_frozen_only = result_output_tabs.tabs[1].content
-    table_both = result_output_tabs.tabs[2].content
+    Parameters
+    ----------
+    chi_load : float
+        冷藏总负荷
+    fro_load : float
+        冷冻总负荷
+    env_temp_val : float
+        环境温度值
+    chi_temp_val : float
+        冷藏目标温度值
+    fro_temp_val : float
+        冷冻目标温度值
+    product_info : dict or ProductCatalog
+        产品配置（键为产品型号）或已编译的产品目录
+    method : str
+        制冷能力的计算方式，TABLE 按制冷能力表插值，SURFACE 按拟合曲面计算
+    box_width : float
+        车厢宽度 m，给出时只考虑适用宽度在容差范围内的产品，见 ProductCatalog.models_for_width
 
-    for table in [table_chilled_only, table_frozen_only, table_both]:
-        table.rows.clear()
+    Returns
+    -------
+    tuple
+        (仅冷藏满足列表, 仅冷冻满足列表, 同时满足列表)，列表元素为 (型号, 冷藏能力, 冷冻能力)
+    """
+    catalog = product_info if isinstance(product_info, ProductCatalog) else ProductCatalog(product_info)
+    # 先按车厢宽度筛选，不适用的产品不做插值
+    models = catalog.models_for_width(box_width)
 
-    if chi_load <= 0 and fro_load <= 0:
-        for table in [table_chilled_only, table_frozen_only, table_both]:
-            table.visible = False
-        page.update()
-        return
+    # 产品在冷藏、冷冻两个工况点的制冷能力，形状为 (产品数, 2)
+    capacities = catalog.capacities(env_temp_val, np.array([chi_temp_val, fro_temp_val], dtype=float),
+                                    models=models, method=method)
 
     products_chilled_only = []
     products_frozen_only = []
     products_both = []
 
-    env_temp_val = float(env_temp.value)
-    chi_temp_val = float(chi_temp.value)
-    fro_temp_val = float(fro_temp.value)
-
-    for product, specs in product_info.items():
-        logger.debug(f"正在处理产品：{product}, 配置为：{specs}")
-
-        if "env_temps" not in specs or "target_temps" not in specs or "cooling_capacity" not in specs:
-            logger.warning(f"产品 {product} 缺少必要字段，跳过插值")
-            continue
-
-        env_temps = specs["env_temps"]
-        target_temps = specs["target_temps"]
-        matrix = specs["cooling_capacity"]
-
-        chilled_capacity, frozen_capacity = interpolate_2d(
-            matrix, env_temps, target_temps, env_temp_val, chi_temp_val, fro_temp_val
-        )
-
-        if chilled_capacity is None or frozen_capacity is None:
+    for product, (chilled_capacity, frozen_capacity) in zip(models, capacities.tolist()):
+        # 任一工况不支持的产品不参与推荐
+        if chilled_capacity != chilled_capacity or frozen_capacity != frozen_capacity:
             continue
 
-        chilled_capacity = float(chilled_capacity)
-        frozen_capacity = float(frozen_capacity)
-
         can_chilled = chilled_capacity >= float(chi_load)
         can_frozen = frozen_capacity >= float(fro_load)
 
@@ -152,38 +117,388 @@ def update_recommendations(chi_load, fro_load, result_output_tabs, env_temp, chi
         if can_chilled and can_frozen:
             products_both.append((product, chilled_capacity, frozen_capacity))
 
-    def add_rows(table, products):
-        for model, chilled, frozen in products:
-            cells = [
-                ft.DataCell(ft.Text(model, text_align=ft.TextAlign.LEFT)),
-                ft.DataCell(ft.Text(str(chilled), text_align=ft.TextAlign.LEFT)),
-                ft.DataCell(ft.Text(str(frozen), text_align=ft.TextAlign.LEFT)),
+    return products_chilled_only, products_frozen_only, products_both
+
+
+def _rank_scores(catalog, models, capacities, loads, weights):
+    """计算排名得分，越小越好
+
+    能力裕量为各工况 (制冷能力 - 负荷) / 负荷 的最小值，负荷不大于 0 的工况不参与；
+    属性按目录中的最大值归一化，缺少该字段的产品按最大值（1）计。
+
+    :param capacities: (产品数, *工况形状, 2) 的冷藏、冷冻制冷能力
+    :param loads: (*工况形状, 2) 的冷藏、冷冻负荷
+    :return: (产品数, *工况形状) 的得分，不满足负荷或工况不支持的产品为 inf
+    """
+    weights = DEFAULT_RANK_WEIGHTS if weights is None else weights
+    unknown = set(weights) - {'margin', *RANK_ATTRIBUTES}
+    if unknown:
+        raise ValueError(f"未知的排名指标: {', '.join(sorted(unknown))}")
+
+    required = loads > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        margin = np.where(required, (capacities - loads) / np.where(required, loads, 1), np.inf).min(axis=-1)
+    # 不支持的工况（NaN）和能力不足的产品不参与排名
+    score = np.where(margin >= 0, weights.get('margin', 0.0) * margin, np.inf)
+
+    for name in RANK_ATTRIBUTES:
+        weight = weights.get(name, 0.0)
+        if not weight:
+            continue
+        values = catalog.attributes(name, models)
+        scale = np.nanmax(values) if np.any(values > 0) else 1.0
+        normalized = np.where(np.isnan(values), 1.0, values / scale)
+        score = score + weight * normalized.reshape((-1,) + (1,) * (score.ndim - 1))
+    return score
+
+
+def rank_products(chi_load: float, fro_load: float, env_temp_val: float, chi_temp_val: float, fro_temp_val: float,
+                  product_info, k: int = RECOMMEND_TOP_K, weights: dict = None, method: str = TABLE,
+                  box_width: float = None) -> list:
+    """按得分选出同时满足冷藏、冷冻负荷的前 k 个产品
+
+    得分为 weights 中各指标的加权和，越小越好：margin 为能力裕量（偏大的机组排在后面），
+    weight、price、power 为归一化后的产品属性。用最小堆做部分选择，不对全部候选产品排序。
+
+    Parameters
+    ----------
+    product_info : dict or ProductCatalog
+        产品配置（键为产品型号）或已编译的产品目录
+    k : int
+        返回的产品数量
+    weights : dict
+        指标 -> 权重，默认 DEFAULT_RANK_WEIGHTS
+    method : str
+        制冷能力的计算方式，见 ProductCatalog.capacities
+    box_width : float
+        车厢宽度 m，给出时只考虑适用的产品
+
+    Returns
+    -------
+    list
+        按得分从小到大排列的 (型号, 冷藏能力, 冷冻能力, 得分)
+    """
+    catalog = product_info if isinstance(product_info, ProductCatalog) else ProductCatalog(product_info)
+    models = catalog.models_for_width(box_width)
+    capacities = catalog.capacities(env_temp_val, np.array([chi_temp_val, fro_temp_val], dtype=float),
+                                    models=models, method=method)
+    loads = np.array([float(chi_load), float(fro_load)])
+    scores = _rank_scores(catalog, models, capacities, loads, weights)
+
+    candidates = ((score, i) for i, score in enumerate(scores.tolist()) if score != np.inf)
+    return [
+        (models[i], float(capacities[i, 0]), float(capacities[i, 1]), score)
+        for score, i in heapq.nsmallest(k, candidates)
+    ]
+
+
+def rank_products_batch(chi_loads, fro_loads, env_temps, chi_temps, fro_temps, product_info,
+                        k: int = RECOMMEND_TOP_K, weights: dict = None, method: str = TABLE,
+                        box_width: float = None) -> tuple:
+    """批量计算多组工况各自的前 k 个产品，用于参数扫描等批量任务
+
+    各参数为长度相同的一维数组（或可广播的数值），box_width 为所有工况共用的车厢宽度 m。全部工况和产品的得分一次计算，
+    每组工况用 argpartition 做部分选择后只对选出的 k 个排序。
+
+    Returns
+    -------
+    tuple
+        (型号列表, (工况数, k) 的产品序号, (工况数, k) 的得分)，不足 k 个时序号为 -1、得分为 inf
+    """
+    catalog = product_info if isinstance(product_info, ProductCatalog) else ProductCatalog(product_info)
+    models = catalog.models_for_width(box_width)
+    env_temps, chi_temps, fro_temps, chi_loads, fro_loads = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(v, dtype=float)) for v in (env_temps, chi_temps, fro_temps, chi_loads, fro_loads)))
+    n = len(env_temps)
+    k = min(k, len(models))
+    if k == 0:
+        return models, np.full((n, 0), -1), np.full((n, 0), np.inf)
+
+    capacities = catalog.capacities(env_temps[:, None], np.stack([chi_temps, fro_temps], axis=-1),
+                                    models=models, method=method)
+    loads = np.stack([chi_loads, fro_loads], axis=-1)
+    scores = _rank_scores(catalog, models, capacities, loads, weights).T  # (工况数, 产品数)
+
+    top = np.argpartition(scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(top_scores, axis=1, kind='stable')
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+    top[np.isinf(top_scores)] = -1
+    return models, top, top_scores
+
+
+def recommend_combinations(chi_load: float, fro_load: float, env_temp_val: float, chi_temp_val: float,
+                           fro_temp_val: float, product_info, max_units: int = MAX_UNITS,
+                           objective: str = 'capacity', limit: int = RECOMMEND_TOP_K, method: str = TABLE,
+                           box_width: float = None) -> list:
+    """搜索合计制冷能力同时满足冷藏、冷冻负荷的机组组合（最多 max_units 台，可重复选择同一型号）
+
+    按分支定界搜索：产品按单台代价升序排列，已选代价加下一台代价不低于当前第 limit 好的组合时
+    停止该分支；剩余台数乘以后续产品的最大制冷能力仍不足以覆盖剩余负荷时同样停止。最后一台
+    机组在剩余产品中以数组运算一次筛选。已能满足负荷的组合不再追加机组。
+
+    Parameters
+    ----------
+    product_info : dict or ProductCatalog
+        产品配置（键为产品型号）或已编译的产品目录
+    max_units : int
+        组合中机组数量的上限
+    objective : str
+        优化目标，见 COMBINATION_OBJECTIVES；按产品属性优化时缺少该字段的产品不参与组合
+    limit : int
+        返回的组合数量
+    box_width : float
+        车厢宽度 m，给出时只考虑适用的产品
+
+    Returns
+    -------
+    list
+        按 (代价, 台数) 从小到大排列的 (型号元组, 合计冷藏能力, 合计冷冻能力, 代价)
+    """
+    if objective not in COMBINATION_OBJECTIVES:
+        raise ValueError(f"未知的组合优化目标: {objective}")
+    catalog = product_info if isinstance(product_info, ProductCatalog) else ProductCatalog(product_info)
+    models = catalog.models_for_width(box_width)
+    capacities = catalog.capacities(env_temp_val, np.array([chi_temp_val, fro_temp_val], dtype=float),
+                                    models=models, method=method)
+    if objective == 'capacity':
+        costs = capacities.sum(axis=1)
+    else:
+        costs = catalog.attributes(objective, models)
+        missing = int(np.isnan(costs).sum())
+        if missing:
+            logger.warning(f"{missing} 个产品缺少 {objective} 字段，不参与组合")
+    usable = ~np.isnan(capacities).any(axis=1) & ~np.isnan(costs) & (costs >= 0)
+    if max_units < 1 or limit < 1 or not usable.any():
+        return []
+
+    index = np.flatnonzero(usable)
+    index = index[np.argsort(costs[index], kind='stable')]
+    chilled, frozen, cost = capacities[index, 0], capacities[index, 1], costs[index]
+    # 第 j 个及之后产品的最大制冷能力，用于剩余台数的能力上界
+    chilled_bound = np.maximum.accumulate(chilled[::-1])[::-1]
+    frozen_bound = np.maximum.accumulate(frozen[::-1])[::-1]
+    n = len(index)
+
+    best = []  # 最大堆 (-代价, -台数, 序号, 组合)，保留最好的 limit 个组合
+    counter = 0
+
+    def bound():
+        return -best[0][0] if len(best) >= limit else np.inf
+
+    def push(combo, total_cost):
+        nonlocal counter
+        item = (-total_cost, -len(combo), counter, combo)
+        counter += 1
+        if len(best) < limit:
+            heapq.heappush(best, item)
+        elif item > best[0]:
+            heapq.heapreplace(best, item)
+
+    def search(start, chilled_left, frozen_left, units_left, cost_so_far, chosen):
+        # 再加一台即可满足负荷的产品，已按代价排序，依次加入直到超出界限
+        enough = np.flatnonzero((chilled[start:] >= chilled_left) & (frozen[start:] >= frozen_left)) + start
+        for j in enough.tolist():
+            total_cost = cost_so_far + cost[j]
+            if total_cost >= bound():
+                break
+            push(chosen + (j,), total_cost)
+        if units_left == 1:
+            return
+
+        for j in range(start, n):
+            if cost_so_far + cost[j] >= bound():
+                break
+            if (chilled_left > units_left * chilled_bound[j]) or (frozen_left > units_left * frozen_bound[j]):
+                break
+            if chilled[j] >= chilled_left and frozen[j] >= frozen_left:
+                continue  # 单台已满足，追加机组的组合只会更差
+            search(j, chilled_left - chilled[j], frozen_left - frozen[j], units_left - 1,
+                   cost_so_far + cost[j], chosen + (j,))
+
+    search(0, max(float(chi_load), 0.0), max(float(fro_load), 0.0), max_units, 0.0, ())
+
+    results = []
+    for negative_cost, _, _, combo in sorted(best, reverse=True):
+        results.append((
+            tuple(models[index[j]] for j in combo),
+            float(chilled[list(combo)].sum()),
+            float(frozen[list(combo)].sum()),
+            float(-negative_cost),
+        ))
+    return results
+
+
+class RecommendationTable(ft.Column):
+    """分页显示的推荐产品表格
+
+    表格只持有一页数量的 DataRow，重新计算、翻页和排序时只改写这些行中文本的值，
+    界面控件的数量和每次刷新的开销与产品目录的大小无关。
+    """
+
+    def __init__(self, empty_message: str, page_size: int = PAGE_SIZE, width: int = 200):
+        super().__init__()
+        self.empty_message = empty_message
+        self.page_size = page_size
+        self.products = []
+        self.page_index = 0
+
+        self.table = ft.DataTable(
+            width=width,
+            data_row_max_height=40,
+            heading_row_height=40,
+            columns=[
+                # 型号 - 左对齐
+                ft.DataColumn(ft.Text("型号", text_align=ft.TextAlign.LEFT), numeric=False, on_sort=self._on_sort),
+                # 冷藏能力 - 左对齐
+                ft.DataColumn(ft.Text("冷藏能力", text_align=ft.TextAlign.LEFT), numeric=False, on_sort=self._on_sort),
+                # 冷冻能力 - 左对齐
+                ft.DataColumn(ft.Text("冷冻能力", text_align=ft.TextAlign.LEFT), numeric=False, on_sort=self._on_sort),
+                # 单位 - 居中对齐
+                ft.DataColumn(ft.Text("单位", text_align=ft.TextAlign.CENTER), numeric=False),
+            ],
+            rows=[self._create_row() for _ in range(page_size)],
+        )
+        self.page_label = ft.Text(size=12)
+        self.prev_button = ft.IconButton(icon=ft.Icons.CHEVRON_LEFT, on_click=lambda e: self.turn_page(-1))
+        self.next_button = ft.IconButton(icon=ft.Icons.CHEVRON_RIGHT, on_click=lambda e: self.turn_page(1))
+        self.pager = ft.Row([self.prev_button, self.page_label, self.next_button], visible=False)
+
+        self.controls = [self.table, self.pager]
+        self.visible = False
+
+    @staticmethod
+    def _create_row() -> ft.DataRow:
+        return ft.DataRow(
+            cells=[
+                ft.DataCell(ft.Text("", text_align=ft.TextAlign.LEFT)),
+                ft.DataCell(ft.Text("", text_align=ft.TextAlign.LEFT)),
+                ft.DataCell(ft.Text("", text_align=ft.TextAlign.LEFT)),
                 ft.DataCell(ft.Text("  W", text_align=ft.TextAlign.CENTER)),
-            ]
-            table.rows.append(ft.DataRow(cells=cells))
-        table.visible = True
-
-    add_rows(table_chilled_only, products_chilled_only)
-    add_rows(table_frozen_only, products_frozen_only)
-    add_rows(table_both, products_both)
-
-    def set_empty_message(table, message):
-        if len(table.rows) == 0:
-            table.rows.append(
-                ft.DataRow(cells=[
-                    ft.DataCell(ft.Text(message, color=ft.Colors.RED_500)),
-                    ft.DataCell(ft.Text("N/A")),
-                    ft.DataCell(ft.Text("N/A")),
-                    ft.DataCell(ft.Text("  W")),
-                ])
-            )
-
-    set_empty_message(table_chilled_only, "无仅冷藏产品")
-    set_empty_message(table_frozen_only, "无仅冷冻产品")
-    set_empty_message(table_both, "无同时满足产品")
-
-    table_chilled_only.visible = len(table_chilled_only.rows) > 0
-    table_frozen_only.visible = len(table_frozen_only.rows) > 0
-    table_both.visible = len(table_both.rows) > 0
-
-    page.update()
\ No newline at end of file
+            ],
+            visible=False,
+        )
+
+    @staticmethod
+    def _set_row(row: ft.DataRow, model: str, chilled: str, frozen: str, color=None):
+        """只修改发生变化的文本，未变化的控件不会被重新发送到前端"""
+        for cell, value in zip(row.cells, (model, chilled, frozen)):
+            if cell.content.value != value:
+                cell.content.value = value
+        if row.cells[0].content.color != color:
+            row.cells[0].content.color = color
+        row.visible = True
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.products) // self.page_size))
+
+    def set_products(self, products: list):
+        """更新表格数据，保持当前排序方式，页码超出范围时回到最后一页"""
+        self.products = list(products)
+        self._sort()
+        self.page_index = min(self.page_index, self.page_count - 1)
+        self.visible = True
+        self._render()
+
+    def turn_page(self, step: int):
+        page_index = min(max(self.page_index + step, 0), self.page_count - 1)
+        if page_index != self.page_index:
+            self.page_index = page_index
+            self._render()
+            self.update()
+
+    def _on_sort(self, e):
+        self.table.sort_column_index = e.column_index
+        self.table.sort_ascending = e.ascending
+        self._sort()
+        self.page_index = 0
+        self._render()
+        self.update()
+
+    def _sort(self):
+        column = self.table.sort_column_index
+        if column is None:
+            return
+        self.products.sort(key=lambda item: item[column], reverse=not self.table.sort_ascending)
+
+    def _render(self):
+        rows = self.table.rows
+        if not self.products:
+            self._set_row(rows[0], self.empty_message, "N/A", "N/A", ft.Colors.RED_500)
+            for row in rows[1:]:
+                row.visible = False
+            self.pager.visible = False
+            return
+
+        start = self.page_index * self.page_size
+        visible_products = self.products[start:start + self.page_size]
+        for i, row in enumerate(rows):
+            if i < len(visible_products):
+                # 排名结果另含得分，表格只显示前三项
+                model, chilled, frozen = visible_products[i][:3]
+                self._set_row(row, model, str(chilled), str(frozen))
+            else:
+                row.visible = False
+
+        self.pager.visible = len(self.products) > self.page_size
+        self.page_label.value = f"{self.page_index + 1}/{self.page_count} 页，共 {len(self.products)} 项"
+        self.prev_button.disabled = self.page_index == 0
+        self.next_button.disabled = self.page_index >= self.page_count - 1
+
+
+def update_recommendations(chi_load, fro_load, result_output_tabs, env_temp, chi_temp, fro_temp, product_info, page,
+                           box_width=None, message_show=None):
+    """计算并刷新推荐表格
+
+    env_temp、chi_temp、fro_temp 为已换算为 ℃ 的温度；box_width 为车厢宽度 m，给出时只推荐适用宽度与之相符的产品。
+    没有任何产品适用于该车厢宽度时不按宽度筛选，并通过 message_show(page, 消息, 'warning') 提示。
+
+    :return: (仅冷藏满足列表, 仅冷冻满足列表, 同时满足列表)
+    """
+    chi_load = float(chi_load or 0)
+    fro_load = float(fro_load or 0)
+    env_temp, chi_temp, fro_temp = float(env_temp), float(chi_temp), float(fro_temp)
+
+    table_chilled_only = result_output_tabs.tabs[0].content
+    table_frozen_only = result_output_tabs.tabs[1].content
+    table_both = result_output_tabs.tabs[2].content
+
+    if chi_load <= 0 and fro_load <= 0:
+        for table in [table_chilled_only, table_frozen_only, table_both]:
+            table.visible = False
+        page.update()
+        return [], [], []
+
+    catalog = product_info if isinstance(product_info, ProductCatalog) else ProductCatalog(product_info)
+    if box_width is not None and not catalog.models_for_width(box_width):
+        msg = f"没有适用于车厢宽度 {box_width:.2f} m 的产品，推荐结果未按车厢宽度筛选"
+        logger.warning(msg)
+        if message_show is not None:
+            message_show(page, msg, 'warning')
+        box_width = None
+
+    products_chilled_only, products_frozen_only, _ = find_qualified_products(
+        chi_load, fro_load, env_temp, chi_temp, fro_temp, catalog,
+        box_width=box_width
+    )
+    # 同时满足的产品按能力裕量排名，只显示排名靠前的部分
+    products_both = rank_products(
+        chi_load, fro_load, env_temp, chi_temp, fro_temp, catalog,
+        box_width=box_width
+    )
+    if not products_both:
+        # 没有单台产品能同时满足时，推荐多台机组的组合
+        combinations = recommend_combinations(
+            chi_load, fro_load, env_temp, chi_temp, fro_temp, catalog,
+            box_width=box_width
+        )
+        products_both = [(" + ".join(combo), chilled, frozen, cost) for combo, chilled, frozen, cost in combinations]
+
+    table_chilled_only.set_products(products_chilled_only)
+    table_frozen_only.set_products(products_frozen_only)
+    table_both.set_products(products_both)
+
+    page.update()
+    return products_chilled_only, products_frozen_only, products_both
@@ -0,0 +1,359 @@
+import json
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from itertools import repeat
+
+import numpy as np
+
+from logger_config import setup_logger
+from units import convert, input_unit
+
+logger = setup_logger()
+
+# 默认数据库位置，放在用户目录下，打包后的程序同样可写
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".refrtruck_heatload", "results.db")
+# 后台写入线程每个事务最多写入的记录数
+WRITE_BATCH_SIZE = 5000
+
+# 建立索引的查询字段，数值字段统一换算为国际单位（长度 m、温度 ℃、负荷 W）
+INDEXED_COLUMNS = ('length', 'env_temp', 'Q_total_chi', 'Q_total_fro', 'product')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id              INTEGER PRIMARY KEY,
+    created_at      REAL NOT NULL,
+    source          TEXT NOT NULL,
+    htc_advanced    INTEGER NOT NULL,
+    precool         INTEGER NOT NULL,
+    length          REAL,
+    env_temp        REAL,
+    chi_temp        REAL,
+    fro_temp        REAL,
+    Q_total_chi     REAL,
+    Q_total_fro     REAL,
+    product         TEXT,
+    inputs          TEXT NOT NULL,
+    outputs         TEXT NOT NULL,
+    recommendations TEXT
+);
+""" + "".join(f"CREATE INDEX IF NOT EXISTS idx_runs_{column} ON runs ({column});\n" for column in INDEXED_COLUMNS)
+
+INSERT_SQL = """
+INSERT INTO runs (created_at, source, htc_advanced, precool, length, env_temp, chi_temp, fro_temp,
+                  Q_total_chi, Q_total_fro, product, inputs, outputs, recommendations)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# 查询结果中以 JSON 保存、需要还原的字段
+JSON_COLUMNS = ('inputs', 'outputs', 'recommendations')
+
+# 复用同一个编码器，numpy 数值按 float 输出
+_json_encoder = json.JSONEncoder(ensure_ascii=False, default=float, separators=(',', ':'))
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _normalize(inputs, key, unit_type, si_unit):
+    """把带单位的输入换算为国际单位，缺失或无法换算时返回 None"""
+    value = _to_float(inputs.get(key))
+    if value is None:
+        return None
+    try:
+        return convert(value, inputs.get(f"{key}_unit") or si_unit, si_unit, unit_type)
+    except (KeyError, ValueError):
+        return None
+
+
+def _to_row(record, created_at):
+    """把一条计算记录转换为 runs 表的一行
+
+    :param record: 字典，包含 inputs（输入字典）、outputs（calculate_all 的结果），可选 htc_advanced、
+                   precool、product（选定产品型号）、recommendations（推荐结果）、source（来源）
+    :param created_at: 记录入队的时间戳，记录中给出 created_at 时以记录为准
+    """
+    inputs = record['inputs']
+    outputs = record['outputs']
+    recommendations = record.get('recommendations')
+    return (
+        record.get('created_at', created_at),
+        record.get('source', 'gui'),
+        int(bool(record.get('htc_advanced', False))),
+        int(bool(record.get('precool', False))),
+        _normalize(inputs, 'length', 'length', 'm'),
+        _normalize(inputs, 'env_temp', 'temp', '℃'),
+        _normalize(inputs, 'chi_temp', 'temp', '℃'),
+        _normalize(inputs, 'fro_temp', 'temp', '℃'),
+        _to_float(outputs.get('Q_total_chi')),
+        _to_float(outputs.get('Q_total_fro')),
+        record.get('product'),
+        _json_encoder.encode(inputs),
+        _json_encoder.encode(outputs),
+        None if recommendations is None else _json_encoder.encode(recommendations),
+    )
+
+
+# 按列写入时，查询字段对应的 (物理量, 国际单位)
+_INDEXED_INPUTS = {'length': ('length', 'm'), 'env_temp': ('temp', '℃'), 'chi_temp': ('temp', '℃'), 'fro_temp': ('temp', '℃')}
+
+
+def _json_number(value):
+    """有限浮点数的 JSON 文本，NaN 和无穷返回 None"""
+    return repr(value) if math.isfinite(value) else None
+
+
+class _TableChunk:
+    """按列写入的一段计算结果，由写入线程展开为 runs 表的行
+
+    共用输入只编码一次 JSON，每行只拼接变化字段和负荷项的数值文本，不为每行构造和编码字典。
+    """
+
+    def __init__(self, source, htc_advanced, precool, base_inputs, columns, outputs, output_keys):
+        self.source = source
+        self.htc_advanced = int(bool(htc_advanced))
+        self.precool = int(bool(precool))
+        self.fields = tuple(columns)
+        self.base_inputs = {key: value for key, value in base_inputs.items() if key not in columns}
+        self.columns = [np.asarray(columns[field], dtype=np.float64) for field in self.fields]
+        self.outputs = outputs
+        self.output_keys = tuple(output_keys)
+        # 查询字段：变化的字段按列换算为国际单位，其余取共用输入
+        self.indexed = {}
+        for key, (quantity, si_unit) in _INDEXED_INPUTS.items():
+            if key in columns:
+                self.indexed[key] = convert(np.asarray(columns[key], dtype=np.float64),
+                                            input_unit(base_inputs, key), si_unit, quantity).tolist()
+            else:
+                self.indexed[key] = [_normalize(base_inputs, key, quantity, si_unit)] * len(self)
+
+    def __len__(self):
+        return self.outputs.shape[1]
+
+    def rows(self, created_at):
+        base = _json_encoder.encode(self.base_inputs)[:-1]
+        separator = ',' if self.base_inputs else ''
+        names = [f'"{field}":' for field in self.fields]
+        keys = [f'"{key}":' for key in self.output_keys]
+        i_chi, i_fro = self.output_keys.index('Q_total_chi'), self.output_keys.index('Q_total_fro')
+        length, env_temp, chi_temp, fro_temp = (self.indexed[key] for key in _INDEXED_INPUTS)
+        values = zip(*(column.tolist() for column in self.columns)) if self.columns else repeat(())
+        for i, (row_values, outputs) in enumerate(zip(values, self.outputs.T.tolist())):
+            if all(value != value for value in outputs):
+                continue  # 未计算或计算失败的工况不保存
+            inputs = base + separator + ','.join(
+                name + (_json_number(value) or 'null') for name, value in zip(names, row_values)) + '}'
+            outputs_json = '{' + ','.join(
+                key + text for key, value in zip(keys, outputs) if (text := _json_number(value)) is not None) + '}'
+            yield (
+                created_at, self.source, self.htc_advanced, self.precool,
+                length[i], env_temp[i], chi_temp[i], fro_temp[i],
+                None if outputs[i_chi] != outputs[i_chi] else outputs[i_chi],
+                None if outputs[i_fro] != outputs[i_fro] else outputs[i_fro],
+                None, inputs, outputs_json, None,
+            )
+
+
+class ResultStore:
+    """基于 SQLite 的计算记录库
+
+    每次计算的输入、模式开关、输出和推荐结果保存为一行，常用查询字段单独成列并建立索引。
+    写入由后台线程独占一个连接完成：add() 只把记录放入队列，后台线程攒批后在一个事务中
+    executemany，计算线程不会被磁盘写入阻塞；查询使用另一个只读连接，数据库采用 WAL 模式，
+    读写互不阻塞。
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, batch_size=WRITE_BATCH_SIZE):
+        if path == ":memory:":
+            raise ValueError("计算记录库需要使用文件数据库，以便后台写入线程和查询共用")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        self._read_conn = self._connect(check_same_thread=False)
+        self._read_conn.row_factory = sqlite3.Row
+        self._read_lock = threading.Lock()
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="result_store_writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self, check_same_thread=True):
+        conn = sqlite3.connect(self.path, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------
+    def _write_loop(self):
+        conn = self._connect()
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+            batches = [item]
+            count = len(item[1])
+            # 取出队列中已有的记录，合并到同一个事务
+            while count < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False  # 写完这一批后退出
+                    self._queue.task_done()
+                    break
+                batches.append(item)
+                count += len(item[1])
+            # 序列化也在写入线程中进行，调用方只负责入队；无法序列化的记录单独跳过，不影响同批的其他记录
+            rows = []
+            for created_at, records in batches:
+                if isinstance(records, _TableChunk):
+                    try:
+                        rows.extend(records.rows(created_at))
+                    except Exception as ex:
+                        logger.error(f"按列写入的计算结果无法序列化，已跳过 {len(records)} 条: {ex!r}")
+                    continue
+                for record in records:
+                    try:
+                        rows.append(_to_row(record, created_at))
+                    except Exception as ex:
+                        logger.error(f"计算记录无法序列化，已跳过: {ex!r}")
+            try:
+                if rows:
+                    with conn:
+                        conn.executemany(INSERT_SQL, rows)
+            except Exception as ex:
+                # 写入线程必须继续运行，否则 flush() 会一直等待、之后的记录也无法写入
+                logger.error(f"写入计算记录失败，丢弃 {len(rows)} 条记录: {ex!r}")
+            finally:
+                for _ in batches:
+                    self._queue.task_done()
+        conn.close()
+
+    def add(self, record):
+        """异步保存一条计算记录，记录格式见 _to_row"""
+        self._queue.put((time.time(), (record,)))
+
+    def add_many(self, records):
+        """异步保存多条计算记录，整批作为一个队列元素，适用于参数扫描"""
+        records = list(records)
+        if records:
+            self._queue.put((time.time(), records))
+
+    def add_table(self, base_inputs, columns, table, htc_advanced, precool, source='sweep'):
+        """异步保存按列给出的批量计算结果（参数扫描、异步批量计算）
+
+        按 batch_size 行分段入队，每段在一个事务中 executemany；负荷项全部为 NaN 的工况不保存。
+
+        :param base_inputs: 所有工况共用的输入字典，格式同 sweep.run_sweep
+        :param columns: 字典 输入字段名 -> 长度相同的数值数组，单位为 base_inputs 中的 <字段>_unit
+        :param table: result_table.ResultTable，行与 columns 对应
+        """
+        data = table.data
+        rows = data.shape[1]
+        if any(len(np.asarray(values).reshape(-1)) != rows for values in columns.values()):
+            raise ValueError("输入列与计算结果的行数不一致")
+        created_at = time.time()
+        for start in range(0, rows, self.batch_size):
+            stop = min(start + self.batch_size, rows)
+            chunk = {field: np.asarray(values).reshape(-1)[start:stop] for field, values in columns.items()}
+            self._queue.put((created_at, _TableChunk(source, htc_advanced, precool, base_inputs, chunk,
+                                                     data[:, start:stop].copy(), table.columns)))
+
+    def flush(self):
+        """等待队列中的记录全部写入"""
+        self._queue.join()
+
+    def close(self):
+        """写完剩余记录后关闭数据库"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        self._read_conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------
+    def query(self, limit=None, order_by='id', descending=False, **conditions):
+        """按字段条件查询计算记录
+
+        条件字段可以是 runs 表中除 JSON 字段外的任意列：数值给出单个值时按相等匹配，
+        给出 (下限, 上限) 时按闭区间匹配，任一端为 None 表示不限；字符串按相等匹配。
+        数值条件使用国际单位。
+
+        示例：store.query(length=(7, 8), env_temp=35, product='XT-800', limit=100)
+
+        :return: 字典列表，inputs、outputs、recommendations 已还原为 Python 对象
+        """
+        columns = self._columns()
+        if order_by not in columns:
+            raise ValueError(f"未知的排序字段: {order_by}")
+        clauses, params = [], []
+        for column, condition in conditions.items():
+            if column not in columns or column in JSON_COLUMNS:
+                raise ValueError(f"不支持按字段 {column} 查询")
+            if isinstance(condition, (tuple, list)):
+                low, high = condition
+                if low is not None:
+                    clauses.append(f"{column} >= ?")
+                    params.append(low)
+                if high is not None:
+                    clauses.append(f"{column} <= ?")
+                    params.append(high)
+            elif condition is None:
+                clauses.append(f"{column} IS NULL")
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(condition)
+
+        sql = "SELECT * FROM runs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._read_lock:
+            rows = self._read_conn.execute(sql, params).fetchall()
+        results = []
+        for row in rows:
+            item = dict(row)
+            for column in JSON_COLUMNS:
+                if item[column] is not None:
+                    item[column] = json.loads(item[column])
+            results.append(item)
+        return results
+
+    def count(self):
+        """已写入的记录数"""
+        with self._read_lock:
+            return self._read_conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def _columns(self):
+        if not hasattr(self, '_column_names'):
+            with self._read_lock:
+                self._column_names = {row[1] for row in self._read_conn.execute("PRAGMA table_info(runs)")}
+        return self._column_names
@@ -0,0 +1,117 @@
+import csv
+import numpy as np
+
+from core import OUTPUT_KEYS
+from logger_config import setup_logger
+
+logger = setup_logger()
+
+# 新建结果表的默认预留行数
+INITIAL_CAPACITY = 1024
+
+
+class ResultTable:
+    """固定列的列式计算结果
+
+    所有列存放在一个 (列数, 容量) 的 float64 数组中，每列在内存中连续，按名称取出的是视图。
+    默认列为 core.OUTPUT_KEYS，未计算的负荷项（如未开启预冷时的预冷负荷）为 NaN。追加结果时
+    只写入预分配的数组，容量不足时按倍数扩容，不为每个工况保留字典。
+    """
+
+    def __init__(self, columns=OUTPUT_KEYS, capacity=INITIAL_CAPACITY):
+        self.columns = tuple(columns)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+        self._data = np.full((len(self.columns), max(capacity, 1)), np.nan)
+        self._size = 0
+
+    @classmethod
+    def from_array(cls, data, columns=OUTPUT_KEYS):
+        """由 (列数, 行数) 的数组创建结果表，不复制数据"""
+        data = np.asarray(data, dtype=np.float64)
+        if data.ndim != 2 or data.shape[0] != len(columns):
+            raise ValueError(f"结果数组的形状 {data.shape} 与列数 {len(columns)} 不一致")
+        table = cls(columns, capacity=1)
+        table._data = data
+        table._size = data.shape[1]
+        return table
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, name):
+        """某一列已写入部分的视图"""
+        return self._data[self._index[name], :self._size]
+
+    def __contains__(self, name):
+        return name in self._index
+
+    @property
+    def data(self):
+        """(列数, 行数) 的结果数组视图"""
+        return self._data[:, :self._size]
+
+    def as_dict(self):
+        """列名 -> 列视图"""
+        return {name: self[name] for name in self.columns}
+
+    def row(self, i):
+        """第 i 行的结果字典，只包含非 NaN 的项，格式与 calculate_all 的返回值相同"""
+        return {name: float(value) for name, value in zip(self.columns, self._data[:, i]) if value == value}
+
+    def _reserve(self, rows):
+        capacity = self._data.shape[1]
+        if self._size + rows <= capacity:
+            return
+        # from_array() 或 load() 得到的空表容量可能为 0，按倍数扩容前至少为 1
+        capacity = max(capacity, 1)
+        while capacity < self._size + rows:
+            capacity *= 2
+        data = np.full((len(self.columns), capacity), np.nan)
+        data[:, :self._size] = self._data[:, :self._size]
+        self._data = data
+
+    def append(self, result):
+        """追加一个工况的结果，result 为 calculate_all 返回的字典，缺少的项为 NaN"""
+        self._reserve(1)
+        self._data[:, self._size] = [result.get(name, np.nan) for name in self.columns]
+        self._size += 1
+
+    def extend(self, data):
+        """追加多行结果
+
+        :param data: (列数, 行数) 的数组，或列名 -> 数组的字典（缺少的列为 NaN）
+        """
+        if isinstance(data, dict):
+            rows = len(next(iter(data.values()))) if data else 0
+            self._reserve(rows)
+            for name, i in self._index.items():
+                if name in data:
+                    self._data[i, self._size:self._size + rows] = data[name]
+        else:
+            data = np.asarray(data, dtype=np.float64)
+            rows = data.shape[1]
+            self._reserve(rows)
+            self._data[:, self._size:self._size + rows] = data
+        self._size += rows
+
+    def to_csv(self, path, float_format='%.6f'):
+        """写入 CSV 文件，首行为列名，NaN 写为空值"""
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columns)
+            for row in self.data.T:
+                writer.writerow(['' if value != value else float_format % value for value in row.tolist()])
+        logger.info(f"已写入 {self._size} 行计算结果: {path}")
+
+    def save(self, path):
+        """以 numpy .npz 格式保存，每列一个数组"""
+        np.savez(path, **self.as_dict())
+        logger.info(f"已保存 {self._size} 行计算结果: {path}")
+
+    @classmethod
+    def load(cls, path):
+        """读取 save() 保存的文件"""
+        with np.load(path) as f:
+            columns = tuple(f.files)
+            data = np.stack([f[name] for name in columns]) if columns else np.empty((0, 0))
+        return cls.from_array(data, columns)
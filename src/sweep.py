@@ -0,0 +1,199 @@
+import logging
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from core import OUTPUT_KEYS, HeatLoadCalculator, raise_message
+from input_schema import VALID, input_validator
+from logger_config import setup_logger
+from result_table import ResultTable
+from units import ENGINE_UNITS, INPUT_QUANTITIES, columns_to_engine_units, to_engine_units
+
+logger = setup_logger()
+
+# 每个进程分到的任务块数，块越多负载越均衡，调度开销也越大
+CHUNKS_PER_WORKER = 8
+# 输入共享数组中记录该行是否通过输入校验的列（1 为通过）
+VALID_COLUMN = '_valid'
+
+
+class SharedColumns:
+    """共享内存中的列式 float64 数组，形状为 (列数, 行数)
+
+    主进程用 create() 分配，子进程用 attach() 按名称映射同一块内存，各自按行号读写，
+    数据不经过序列化。由创建方负责 unlink()。
+    """
+
+    def __init__(self, shm, names, rows, owner):
+        self._shm = shm
+        self.names = tuple(names)
+        self.rows = rows
+        self.owner = owner
+        self.data = np.ndarray((len(self.names), rows), dtype=np.float64, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, names, rows, fill=np.nan):
+        size = max(len(names) * rows * 8, 1)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        columns = cls(shm, names, rows, owner=True)
+        columns.data.fill(fill)
+        return columns
+
+    @classmethod
+    def attach(cls, name, names, rows):
+        return cls(shared_memory.SharedMemory(name=name), names, rows, owner=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def column(self, name):
+        return self.data[self.names.index(name)]
+
+    def close(self):
+        # 先释放数组对内存的引用，否则 SharedMemory.close() 会报 BufferError
+        self.data = None
+        self._shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self._shm.unlink()
+
+
+def init_worker():
+    """子进程初始化：关闭 INFO 日志，避免大量计算的日志输出成为瓶颈"""
+    logging.disable(logging.INFO)
+
+
+def calculate_rows(base_inputs, fields, values, valid, htc_advanced, precool, out):
+    """逐行计算工况，结果写入 out
+
+    :param fields: 变化的输入字段名
+    :param values: 每行各字段的取值（二维列表）
+    :param valid: 每行是否通过输入校验，未通过的行不计算
+    :param out: (len(OUTPUT_KEYS), 行数) 的数组，第 i 行工况的结果写入 out[:, i]
+    :return: (失败的工况数, 第一个失败工况的行序号和错误信息)
+    """
+    failed, first_error = 0, None
+    inputs = dict(base_inputs)
+    # 相邻工况的外表面温度接近，以上一个工况的解作为初值
+    T_surface = None
+    for row, (row_valid, row_values) in enumerate(zip(valid, values)):
+        if not row_valid:
+            continue
+        inputs.update(zip(fields, row_values))
+        try:
+            calculator = HeatLoadCalculator(dict(inputs), None, raise_message, T_surface)
+            result = calculator.calculate_all(htc_advanced, precool)
+            T_surface = calculator.surface_solution['T_surface']
+            out[:, row] = [result.get(key, np.nan) for key in OUTPUT_KEYS]
+        except Exception as ex:
+            failed += 1
+            if first_error is None:
+                first_error = (row, str(ex))
+    return failed, first_error
+
+
+def _sweep_chunk(input_name, input_fields, output_name, rows, base_inputs, htc_advanced, precool, start, stop):
+    """在子进程中计算 [start, stop) 行的工况，结果直接写入共享内存
+
+    :return: (失败的工况数, 第一个失败工况的行号和错误信息)
+    """
+    inputs_columns = SharedColumns.attach(input_name, input_fields, rows)
+    outputs = SharedColumns.attach(output_name, OUTPUT_KEYS, rows)
+    try:
+        valid = inputs_columns.column(VALID_COLUMN)[start:stop].tolist()
+        fields = [field for field in input_fields if field != VALID_COLUMN]
+        values = inputs_columns.data[[input_fields.index(field) for field in fields], start:stop].T.tolist()
+        failed, first_error = calculate_rows(base_inputs, fields, values, valid, htc_advanced, precool,
+                                             outputs.data[:, start:stop])
+    finally:
+        inputs_columns.close()
+        outputs.close()
+    if first_error is not None:
+        first_error = (first_error[0] + start, first_error[1])
+    return failed, first_error
+
+
+def validate_columns(base_inputs, columns, htc_advanced, precool):
+    """扫描前校验输入：共用输入只校验一次，不合法时报错；变化参数按列批量校验
+
+    共用输入和变化参数（按 base_inputs 中给出的单位）先整体换算为计算单位，子进程中不再换算。
+
+    :return: (去掉变化字段后的共用输入, 变化字段名元组, 各字段的 float64 数组列表, 每行是否通过校验的布尔数组)
+    """
+    fields = tuple(columns)
+    converted = columns_to_engine_units(columns, base_inputs)
+    arrays = [converted[field].reshape(-1) for field in fields]
+    rows = len(arrays[0]) if arrays else 1
+    if any(len(array) != rows for array in arrays):
+        raise ValueError("扫描参数的长度不一致")
+
+    base_inputs = to_engine_units({key: value for key, value in base_inputs.items() if key not in columns})
+    for field in fields:
+        if field in INPUT_QUANTITIES:
+            base_inputs[f"{field}_unit"] = ENGINE_UNITS[INPUT_QUANTITIES[field]]
+    errors = [input_validator.message(name, code)
+              for name, code in input_validator.check(base_inputs, htc_advanced, precool).items() if name not in columns]
+    if errors:
+        raise ValueError(f"输入校验未通过：{'  '.join(errors)}")
+    codes = input_validator.validate_batch(dict(zip(fields, arrays)), htc_advanced, precool)
+    checked = [input_validator.index[field] for field in fields if field in input_validator.index]
+    valid = np.all(codes[:, checked] == VALID, axis=1) if checked else np.ones(rows, dtype=bool)
+    if not valid.all():
+        logger.warning(f"{int((~valid).sum())} 个工况的输入校验未通过，不参与计算")
+    return base_inputs, fields, arrays, valid
+
+
+def run_sweep(base_inputs, columns, htc_advanced, precool, max_workers=None, chunk_size=None, store=None):
+    """多进程参数扫描
+
+    变化的数值参数和负荷结果都放在共享内存的列式数组中，子进程按行号读取输入、直接写入
+    结果，主进程与子进程之间只传递内存名称和行号区间。计算前按 validate_columns 校验输入，
+    变化参数不合法的行不计算，结果为 NaN。
+
+    :param base_inputs: 所有工况共用的输入字典（含单位、各层参数等），格式同 HeatLoadCalculator
+    :param columns: 字典 输入字段名 -> 长度相同的数值数组，覆盖 base_inputs 中对应的值，单位为 base_inputs 中的 <字段>_unit
+    :param max_workers: 进程数，默认为 CPU 核数
+    :param chunk_size: 每个任务块的行数，默认按进程数均分为 CHUNKS_PER_WORKER 份
+    :param store: 可选的 result_store.ResultStore，给出时按列异步保存计算结果（输入为计算单位）
+    :return: ResultTable，列为 core.OUTPUT_KEYS，单位 W；计算失败或未计算的项为 NaN
+    """
+    base_inputs, fields, arrays, valid = validate_columns(base_inputs, columns, htc_advanced, precool)
+    rows = len(valid)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, -(-rows // (max_workers * CHUNKS_PER_WORKER)))
+    inputs_columns = SharedColumns.create(fields + (VALID_COLUMN,), rows)
+    outputs = SharedColumns.create(OUTPUT_KEYS, rows)
+    try:
+        for i, array in enumerate(arrays):
+            inputs_columns.data[i] = array
+        inputs_columns.data[-1] = valid
+
+        failed = 0
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker) as executor:
+            futures = [
+                executor.submit(_sweep_chunk, inputs_columns.name, inputs_columns.names, outputs.name, rows, base_inputs,
+                                htc_advanced, precool, start, min(start + chunk_size, rows))
+                for start in range(0, rows, chunk_size)
+            ]
+            for future in futures:
+                chunk_failed, first_error = future.result()
+                if chunk_failed:
+                    failed += chunk_failed
+                    logger.warning(f"第 {first_error[0]} 个工况计算失败: {first_error[1]}")
+        if failed:
+            logger.warning(f"共 {failed}/{rows} 个工况计算失败，结果为 NaN")
+
+        # 复制出共享内存后释放
+        table = ResultTable.from_array(outputs.data.copy())
+        if store is not None:
+            store.add_table(base_inputs, dict(zip(fields, arrays)), table, htc_advanced, precool, source='sweep')
+        return table
+    finally:
+        inputs_columns.close()
+        outputs.close()
+        inputs_columns.unlink()
+        outputs.unlink()
@@ -0,0 +1,134 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+# 各物理量支持的单位：单位 -> (比例, 偏移)，计算单位下的值 = 输入值 × 比例 + 偏移
+# 各物理量中单位的顺序即界面下拉框中的顺序
+UNITS = {
+    'length': {'m': (1.0, 0.0), 'cm': (0.01, 0.0), 'mm': (0.001, 0.0), 'ft': (0.3048, 0.0), 'in': (0.0254, 0.0)},
+    'temp': {'℃': (1.0, 0.0), 'K': (1.0, -273.15), '℉': (5 / 9, -32 * 5 / 9)},
+    'power': {'W': (1.0, 0.0), 'kW': (1000.0, 0.0), 'BTU/h': (1055.05585262 / 3600, 0.0)},
+    'speed': {'km/h': (1000 / 3600, 0.0), 'm/s': (1.0, 0.0), 'mph': (0.44704, 0.0)},
+    'time': {'h': (1.0, 0.0), 'min': (1 / 60, 0.0), 's': (1 / 3600, 0.0)},
+}
+
+# 单位的其他写法
+UNIT_ALIASES = {
+    '°C': '℃', 'degC': '℃', '°F': '℉', 'degF': '℉',
+    'Btu/h': 'BTU/h', 'inch': 'in', 'kph': 'km/h', 'mile/h': 'mph',
+}
+
+# 计算引擎内部使用的单位，计算公式均按这些单位编写
+ENGINE_UNITS = {'length': 'm', 'temp': '℃', 'power': 'W', 'speed': 'm/s', 'time': 'h'}
+
+# 带单位的输入字段 -> 物理量，单位由同名的 <字段>_unit 给出，未给出单位时视为计算单位
+INPUT_QUANTITIES = {
+    'length': 'length', 'width': 'length', 'height': 'length', 'thickness': 'length', 'thickness_walls': 'length',
+    'speed': 'speed',
+    'env_temp': 'temp', 'chi_temp': 'temp', 'fro_temp': 'temp', 'fro_out_temp': 'temp',
+    'radiation_time': 'time', 'cabin_precool_time': 'time', 'fan_time': 'time', 'light_time': 'time',
+    'fan_power': 'power', 'light_power': 'power',
+}
+
+# 以空格分隔的多层数值字段，逐个数值换算
+LAYER_FIELDS = ('thickness_walls',)
+
+
+def unit_options(quantity):
+    """某物理量支持的单位列表，用于界面下拉框"""
+    return list(UNITS[quantity])
+
+
+@lru_cache(maxsize=None)
+def conversion(quantity, from_unit, to_unit):
+    """两个单位之间的换算系数，按单位对缓存
+
+    :return: (比例, 偏移)，目标单位下的值 = 原值 × 比例 + 偏移
+    """
+    units = UNITS.get(quantity)
+    if units is None:
+        raise ValueError(f"不支持的物理量: {quantity}")
+    try:
+        scale_from, offset_from = units[UNIT_ALIASES.get(from_unit, from_unit)]
+        scale_to, offset_to = units[UNIT_ALIASES.get(to_unit, to_unit)]
+    except KeyError as ex:
+        raise ValueError(f"不支持的单位: {ex.args[0]}（{quantity}）") from None
+    return scale_from / scale_to, (offset_from - offset_to) / scale_to
+
+
+def convert(value, from_unit, to_unit, quantity):
+    """单位换算，value 可以是数值、numpy 数组或 Dual"""
+    scale, offset = conversion(quantity, from_unit, to_unit)
+    if scale != 1.0:
+        value = value * scale
+    if offset:
+        value = value + offset
+    return value
+
+
+def _convert_input(value, from_unit, to_unit, quantity):
+    """换算单个输入值，数字字符串先转换为浮点数；空值和无法解析的字符串原样返回，由输入校验报错"""
+    if value is None:
+        return value
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return value
+    return convert(value, from_unit, to_unit, quantity)
+
+
+def _convert_layers(text, from_unit, to_unit, quantity):
+    """换算以空格分隔的多层数值，无法解析时原样返回，由使用该字段的计算报错"""
+    try:
+        values = [float(t) for t in str(text).split()]
+    except ValueError:
+        return text
+    return ' '.join(repr(convert(v, from_unit, to_unit, quantity)) for v in values)
+
+
+def input_unit(inputs, key):
+    """输入字段的单位，未给出时为计算单位"""
+    return inputs.get(f"{key}_unit") or ENGINE_UNITS[INPUT_QUANTITIES[key]]
+
+
+def to_engine_units(inputs):
+    """把输入字典中带单位的字段换算为计算单位
+
+    在输入边界调用一次，之后的校验和计算直接使用换算后的数值，不再处理单位。带单位字段中的
+    数字字符串一律转换为浮点数，无法解析的值原样保留，由输入校验报错。
+    :return: 新的输入字典，换算过的字段的单位改为计算单位
+    """
+    converted = dict(inputs)
+    for key, quantity in INPUT_QUANTITIES.items():
+        if key not in inputs:
+            continue
+        unit = input_unit(inputs, key)
+        engine_unit = ENGINE_UNITS[quantity]
+        if unit == engine_unit:
+            # 单位无需换算时仍把数字字符串转换为浮点数，与换算过的字段一致
+            if key not in LAYER_FIELDS:
+                converted[key] = _convert_input(inputs[key], unit, engine_unit, quantity)
+            continue
+        if key in LAYER_FIELDS:
+            converted[key] = _convert_layers(inputs[key], unit, engine_unit, quantity)
+        else:
+            converted[key] = _convert_input(inputs[key], unit, engine_unit, quantity)
+        converted[f"{key}_unit"] = engine_unit
+    return converted
+
+
+def columns_to_engine_units(columns, inputs):
+    """把按列给出的输入（字段名 -> 数组）整列换算为计算单位，单位取自 inputs 中的 <字段>_unit
+
+    :return: 字段名 -> float64 数组，不带单位的字段原样转换为数组
+    """
+    converted = {}
+    for key, values in columns.items():
+        values = np.asarray(values, dtype=np.float64)
+        quantity = INPUT_QUANTITIES.get(key)
+        if quantity is not None and key not in LAYER_FIELDS:
+            values = convert(values, input_unit(inputs, key), ENGINE_UNITS[quantity], quantity)
+        converted[key] = values
+    return converted
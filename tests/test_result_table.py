@@ -0,0 +1,34 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+from core import OUTPUT_KEYS  # noqa: E402
+from result_table import ResultTable  # noqa: E402
+
+
+def test_append_to_empty_table_from_array():
+    table = ResultTable.from_array(np.empty((len(OUTPUT_KEYS), 0)))
+    table.append({'Q_total_chi': 1.0})
+    assert len(table) == 1
+    assert table['Q_total_chi'][0] == 1.0
+    assert np.isnan(table['Q_total_fro'][0])
+
+
+def test_extend_empty_table_from_array():
+    table = ResultTable.from_array(np.empty((len(OUTPUT_KEYS), 0)))
+    table.extend(np.ones((len(OUTPUT_KEYS), 3)))
+    table.extend({'Q_total_chi': [2.0, 3.0]})
+    assert len(table) == 5
+    assert table['Q_total_chi'].tolist() == [1.0, 1.0, 1.0, 2.0, 3.0]
+
+
+def test_append_after_loading_empty_file(tmp_path):
+    path = tmp_path / "empty.npz"
+    ResultTable.from_array(np.empty((len(OUTPUT_KEYS), 0))).save(path)
+    table = ResultTable.load(path)
+    assert len(table) == 0
+    table.append({'Q_electric': 5.0})
+    assert table.row(0) == {'Q_electric': 5.0}
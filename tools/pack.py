@@ -62,6 +62,8 @@ console = Console(theme=custom_theme)
 PROJECT_NAME = __project_name__
 ENTRY_POINT = Path("src/__main__.py")
 CONFIG_DIR = Path("src/config")
+# 配置快照，文件名与 src/load_configuration.py 中的 SNAPSHOT_FILENAME 一致
+SNAPSHOT_FILE = Path("build/config_snapshot/config_snapshot.pkl")
 DATA_DIR = Path("src/assets")
 ICON_FILE = Path("src/assets/logo.ico")
 REQUIREMENTS = "requirements.txt"
@@ -196,6 +198,30 @@ def install_dependencies(venv_name: str = VENV_NAME) -> bool:
         )
     ])
 
+def build_config_snapshot(venv_name: str = VENV_NAME) -> bool:
+    """校验配置文件并生成配置快照
+
+    使用虚拟环境中的 Python 生成，保证快照与打包进程序的 Python 和 numpy 版本一致。
+    """
+    python_path = get_venv_tool(venv_name, "python")
+
+    if not python_path.exists():
+        console.print(f"✗ 找不到Python可执行文件: [underline]{python_path}[/]", style="error")
+        return False
+
+    console.print("🧊 开始生成配置快照", style="status")
+    script = (
+        "import sys; sys.path.insert(0, 'src'); "
+        "from load_configuration import build_snapshot; "
+        f"build_snapshot({str(SNAPSHOT_FILE.resolve())!r})"
+    )
+    return run_command(
+        command=[str(python_path), "-c", script],
+        success_msg=f"配置快照生成成功 → [bold underline]{SNAPSHOT_FILE}[/]",
+        error_msg="配置文件校验失败",
+        process_name="生成配置快照"
+    )
+
 def run_pyinstaller(venv_name: str = VENV_NAME) -> bool:
     """flet pack 打包应用程序"""
     flet_path = get_venv_tool(venv_name, "flet")
@@ -206,6 +232,7 @@ def run_pyinstaller(venv_name: str = VENV_NAME) -> bool:
         "-i", str(ICON_FILE.resolve()),
         "--add-data", f"{DATA_DIR.resolve()}:assets",
         "--add-data", f"{CONFIG_DIR.resolve()};config",
+        "--add-data", f"{SNAPSHOT_FILE.resolve()};config",
         "-n", PROJECT_NAME,
         "-D",
         "--product-version", __version__,
@@ -367,6 +394,7 @@ if __name__ == "__main__":
             steps.extend([
                 create_venv(),
                 install_dependencies(),
+                build_config_snapshot(),
                 run_pyinstaller(),
                 verify_pack()
             ])